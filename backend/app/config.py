@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 def _str_env(var_name: str, default: str) -> str:
@@ -21,6 +21,25 @@ def _int_env(var_name: str, default: int) -> int:
         return default
 
 
+def _float_env(var_name: str, default: float) -> float:
+    """Safely parse float environment variables with fallback defaults."""
+    raw_value = os.getenv(var_name)
+    if raw_value is None or raw_value.strip() == "":
+        return default
+    try:
+        return float(raw_value)
+    except ValueError:
+        return default
+
+
+def _bool_env(var_name: str, default: bool) -> bool:
+    """Parse boolean environment variables ("true"/"false")."""
+    raw_value = os.getenv(var_name)
+    if raw_value is None or raw_value.strip() == "":
+        return default
+    return raw_value.strip().lower() == "true"
+
+
 class Settings:
     """Application settings sourced from environment variables."""
 
@@ -28,6 +47,42 @@ class Settings:
     MONGODB_URL: str = _str_env("MONGODB_URL", "mongodb://mongodb:27017/")
     MONGODB_DATABASE: str = _str_env("MONGODB_DATABASE", "zero_world")
 
+    # MongoDB connection pool and timeouts (milliseconds)
+    MONGODB_MAX_POOL_SIZE: int = _int_env("MONGODB_MAX_POOL_SIZE", 50)
+    MONGODB_MIN_POOL_SIZE: int = _int_env("MONGODB_MIN_POOL_SIZE", 0)
+    MONGODB_MAX_IDLE_TIME_MS: int = _int_env("MONGODB_MAX_IDLE_TIME_MS", 300000)
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = _int_env("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 1000)
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = _int_env("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 5000)
+    MONGODB_CONNECT_TIMEOUT_MS: int = _int_env("MONGODB_CONNECT_TIMEOUT_MS", 5000)
+    MONGODB_SOCKET_TIMEOUT_MS: int = _int_env("MONGODB_SOCKET_TIMEOUT_MS", 30000)
+    # Wire compression, in order of preference; the server picks the first it supports
+    MONGODB_COMPRESSORS: str = _str_env("MONGODB_COMPRESSORS", "zstd,snappy,zlib")
+
+    # Per-operation deadlines for CRUD calls (milliseconds; 0 disables)
+    MONGODB_READ_TIMEOUT_MS: int = _int_env("MONGODB_READ_TIMEOUT_MS", 2000)
+    MONGODB_AGGREGATE_TIMEOUT_MS: int = _int_env("MONGODB_AGGREGATE_TIMEOUT_MS", 5000)
+    MONGODB_WRITE_TIMEOUT_MS: int = _int_env("MONGODB_WRITE_TIMEOUT_MS", 2000)
+    MONGODB_BULK_TIMEOUT_MS: int = _int_env("MONGODB_BULK_TIMEOUT_MS", 30000)
+
+    # Database command monitoring
+    DB_MONITOR_ENABLED: bool = _bool_env("DB_MONITOR_ENABLED", True)
+    DB_SLOW_QUERY_MS: float = _float_env("DB_SLOW_QUERY_MS", 100.0)
+    DB_SLOW_QUERY_MAX_SHAPES: int = _int_env("DB_SLOW_QUERY_MAX_SHAPES", 200)
+
+    # Prometheus metrics (GET /metrics)
+    METRICS_ENABLED: bool = _bool_env("METRICS_ENABLED", True)
+
+    # Event-loop watchdog: heartbeat period, stall threshold for stack capture,
+    # and (debug/tests) the blocking time that fails a request (0 disables)
+    LOOP_WATCHDOG_ENABLED: bool = _bool_env("LOOP_WATCHDOG_ENABLED", True)
+    LOOP_WATCHDOG_INTERVAL_MS: int = _int_env("LOOP_WATCHDOG_INTERVAL_MS", 20)
+    LOOP_STALL_THRESHOLD_MS: int = _int_env("LOOP_STALL_THRESHOLD_MS", 100)
+    LOOP_BLOCK_FAIL_MS: int = _int_env("LOOP_BLOCK_FAIL_MS", 0)
+
+    # Request profiling (X-Profile: 1 with an admin token, or sampled)
+    PROFILE_SAMPLE_RATE: float = _float_env("PROFILE_SAMPLE_RATE", 0.0)
+    PROFILE_BUFFER_SIZE: int = _int_env("PROFILE_BUFFER_SIZE", 20)
+
     # JWT Configuration
     JWT_SECRET_KEY: str = _str_env("JWT_SECRET", "fallback-secret-change-in-production")
     JWT_ALGORITHM: str = _str_env("JWT_ALGORITHM", "HS256")
@@ -44,12 +99,75 @@ class Settings:
     EXTERNAL_MONGODB_HOST: Optional[str] = _str_env("EXTERNAL_MONGODB_HOST", "") or None
 
     # Security
+    # Admin endpoints are disabled (404) unless a token is configured
+    ADMIN_TOKEN: Optional[str] = _str_env("ADMIN_TOKEN", "") or None
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
 
+    # Service provider resilience
+    PROVIDER_BREAKER_WINDOW: int = _int_env("PROVIDER_BREAKER_WINDOW", 50)
+    PROVIDER_BREAKER_MIN_CALLS: int = _int_env("PROVIDER_BREAKER_MIN_CALLS", 10)
+    PROVIDER_BREAKER_ERROR_RATE: float = _float_env("PROVIDER_BREAKER_ERROR_RATE", 0.5)
+    PROVIDER_BREAKER_RESET_SECONDS: float = _float_env("PROVIDER_BREAKER_RESET_SECONDS", 30.0)
+    PROVIDER_CALL_TIMEOUT_SECONDS: float = _float_env("PROVIDER_CALL_TIMEOUT_SECONDS", 5.0)
+    PROVIDER_HEDGE_ENABLED: bool = _bool_env("PROVIDER_HEDGE_ENABLED", True)
+    PROVIDER_HEDGE_MIN_DELAY_MS: int = _int_env("PROVIDER_HEDGE_MIN_DELAY_MS", 50)
+
+    # Trending leaderboards
+    TRENDING_HALF_LIFE_HOURS: float = _float_env("TRENDING_HALF_LIFE_HOURS", 24.0)
+    TRENDING_WINDOW_HOURS: int = _int_env("TRENDING_WINDOW_HOURS", 168)
+    TRENDING_SIZE: int = _int_env("TRENDING_SIZE", 100)
+    TRENDING_REFRESH_SECONDS: int = _int_env("TRENDING_REFRESH_SECONDS", 300)
+
+    # Facet counters (categories, tags)
+    FACET_CACHE_SECONDS: int = _int_env("FACET_CACHE_SECONDS", 30)
+
+    # HTTP caching: max-age sent with the ETag/Last-Modified of cacheable GETs
+    HTTP_CACHE_MAX_AGE_SECONDS: int = _int_env("HTTP_CACHE_MAX_AGE_SECONDS", 5)
+
+    # Response compression: encodings in order of preference (br and zstd are
+    # skipped when their modules are missing), smallest body worth compressing
+    # (bytes) and levels (see benchmarks/bench_compression.py)
+    COMPRESSION_ENABLED: bool = _bool_env("COMPRESSION_ENABLED", True)
+    COMPRESSION_ENCODINGS: str = _str_env("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+    COMPRESSION_MIN_SIZE: int = _int_env("COMPRESSION_MIN_SIZE", 1024)
+    COMPRESSION_GZIP_LEVEL: int = _int_env("COMPRESSION_GZIP_LEVEL", 3)
+    COMPRESSION_BROTLI_QUALITY: int = _int_env("COMPRESSION_BROTLI_QUALITY", 3)
+    COMPRESSION_ZSTD_LEVEL: int = _int_env("COMPRESSION_ZSTD_LEVEL", 1)
+
+    # Schema migrations: workers only check the version unless this is set
+    SCHEMA_AUTO_MIGRATE: bool = _bool_env("SCHEMA_AUTO_MIGRATE", False)
+
+    # Document ids: uuid7 (time-ordered, default), objectid (hex string) or uuid4
+    ID_STRATEGY: str = _str_env("ID_STRATEGY", "uuid7")
+
+    # Data retention (days; 0 keeps data forever). Deletes data, so it only
+    # runs when enabled; the `retention` job applies it (app.jobs.retention)
+    RETENTION_ENABLED: bool = _bool_env("RETENTION_ENABLED", False)
+    RETENTION_INACTIVE_LISTINGS_DAYS: int = _int_env("RETENTION_INACTIVE_LISTINGS_DAYS", 365)
+    RETENTION_MESSAGES_DAYS: int = _int_env("RETENTION_MESSAGES_DAYS", 0)
+    RETENTION_ORDERS_DAYS: int = _int_env("RETENTION_ORDERS_DAYS", 730)
+    RETENTION_BATCH_SIZE: int = _int_env("RETENTION_BATCH_SIZE", 500)
+    RETENTION_MAX_DELETES_PER_SECOND: int = _int_env("RETENTION_MAX_DELETES_PER_SECOND", 2000)
+    RETENTION_BATCH_PAUSE_SECONDS: float = _float_env("RETENTION_BATCH_PAUSE_SECONDS", 0.1)
+    RETENTION_INTERVAL_SECONDS: int = _int_env("RETENTION_INTERVAL_SECONDS", 3600)
+
     def get_mongodb_connection_string(self) -> str:
         """Get the MongoDB connection string."""
         return self.MONGODB_URL
 
+    def get_mongodb_client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for the application's MongoClient."""
+        return {
+            "maxPoolSize": self.MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": self.MONGODB_MIN_POOL_SIZE,
+            "maxIdleTimeMS": self.MONGODB_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": self.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": self.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            "connectTimeoutMS": self.MONGODB_CONNECT_TIMEOUT_MS,
+            "socketTimeoutMS": self.MONGODB_SOCKET_TIMEOUT_MS,
+            "compressors": self.MONGODB_COMPRESSORS,
+        }
+
     def get_external_mongodb_string(self) -> str:
         """Get external MongoDB connection string for documentation."""
         if self.EXTERNAL_MONGODB_HOST:
@@ -0,0 +1,228 @@
+"""
+Response compression: gzip, plus brotli (br) and zstd when their modules
+are installed.
+
+The encoding is the first of COMPRESSION_ENCODINGS (server preference) that
+the client accepts with q > 0. What happens to a response depends on its
+content type (CONTENT_TYPE_POLICY):
+
+- buffered (JSON, text): compressed if the body is at least
+  COMPRESSION_MIN_SIZE bytes; small bodies go out as they are, since the
+  framing costs more than it saves. A streamed body (more_body) is
+  compressed as it goes, without Content-Length.
+- stream (text/event-stream, NDJSON): every chunk is compressed and
+  flushed right away, so events are not held back in the compressor.
+- anything else (images, archives, unknown types) is passed through.
+
+Responses that already have a Content-Encoding, `Cache-Control:
+no-transform`, or no body (204, 304) are not touched. WebSocket frames are
+left to the server's permessage-deflate.
+"""
+import zlib
+from typing import Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: installed with pymongo[zstd]
+    zstandard = None
+
+BUFFERED = "buffered"
+STREAM = "stream"
+
+CONTENT_TYPE_POLICY: Dict[str, str] = {
+    "application/json": BUFFERED,
+    "application/problem+json": BUFFERED,
+    "application/javascript": BUFFERED,
+    "application/xml": BUFFERED,
+    "image/svg+xml": BUFFERED,
+    "text/css": BUFFERED,
+    "text/csv": BUFFERED,
+    "text/html": BUFFERED,
+    "text/plain": BUFFERED,
+    "application/x-ndjson": STREAM,
+    "text/event-stream": STREAM,
+}
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+
+def default_levels() -> Dict[str, int]:
+    return {
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    }
+
+
+def negotiate(accept_encoding: str, preference: Sequence[str]) -> Optional[str]:
+    """First encoding in `preference` that the Accept-Encoding value allows."""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+
+    for coding in preference:
+        if weights.get(coding, weights.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def encode(encoder, body: bytes, more_body: bool, mode: str) -> bytes:
+    data = encoder.compress(body)
+    if not more_body:
+        return data + encoder.finish()
+    if mode == STREAM:
+        return data + encoder.flush()
+    return data
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; streamed bodies are compressed chunk by chunk."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        encodings: Optional[Sequence[str]] = None,
+        levels: Optional[Dict[str, int]] = None,
+        policy: Optional[Dict[str, str]] = None,
+    ):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        if encodings is None:
+            encodings = [name.strip() for name in settings.COMPRESSION_ENCODINGS.split(",")]
+        # Encodings whose module is missing are skipped
+        self.encodings = [name for name in encodings if name in ENCODERS]
+        self.levels = {**default_levels(), **(levels or {})}
+        self.policy = CONTENT_TYPE_POLICY if policy is None else policy
+
+    def _mode(self, start) -> Optional[str]:
+        status = start["status"]
+        if status < 200 or status in (204, 304):
+            return None
+        headers = Headers(raw=start.get("headers", []))
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return None
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return self.policy.get(content_type)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        mode = None
+        encoder = None
+
+        async def send_wrapper(message):
+            nonlocal start, mode, encoder
+            if message["type"] == "http.response.start":
+                mode = self._mode(message)
+                if mode is None:
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether to compress
+                    start = message
+                return
+            if message["type"] != "http.response.body" or mode is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is not None:
+                data = encode(encoder, body, more_body, mode)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                mode = None
+                await send({**start, "headers": headers.raw})
+                await send(message)
+                return
+
+            encoder = ENCODERS[encoding](self.levels[encoding])
+            data = encode(encoder, body, more_body, mode)
+            headers["Content-Encoding"] = encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(data))
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
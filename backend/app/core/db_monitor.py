@@ -0,0 +1,276 @@
+"""
+MongoDB command monitoring.
+
+A pymongo CommandListener registered on the application client records a
+latency histogram per command, per collection and per origin (route + CRUD
+method). Commands slower than DB_SLOW_QUERY_MS are logged with their filter
+shape, every value replaced by "?", and aggregated by shape so the slowest
+query shapes can be listed from the admin API.
+
+The CRUD method is found by walking up the Python stack from the listener
+(which pymongo calls synchronously) to the outermost app.crud frame.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.config import settings
+from app.core.metrics import Histogram, registry
+from app.core.profiling import add_mongo_time
+from app.core.request_context import current_route
+
+logger = logging.getLogger(__name__)
+
+POOL_CHECKOUT = registry.histogram(
+    "mongodb_pool_checkout_seconds",
+    "Wait for a pooled connection (bounded by waitQueueTimeoutMS)",
+    ("outcome",),
+)
+POOL_CHECKED_OUT = registry.gauge(
+    "mongodb_pool_connections_checked_out", "Connections currently checked out of the pool"
+)
+
+CRUD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crud") + os.sep
+NO_METHOD = "-"
+REDACTED = "?"
+
+# Where each command keeps its filter (pipeline for aggregate)
+FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+}
+
+
+def crud_method() -> str:
+    """`CRUDClass.method` of the outermost CRUD frame on the current stack."""
+    frame = sys._getframe(1)
+    outermost = None
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(CRUD_DIR):
+            outermost = frame
+        elif outermost is not None:
+            break
+        frame = frame.f_back
+    if outermost is None:
+        return NO_METHOD
+    owner = outermost.f_locals.get("self")
+    name = outermost.f_code.co_name
+    return f"{type(owner).__name__}.{name}" if owner is not None else name
+
+
+def redact(value: Any) -> Any:
+    """Keep field names and operators, replace every value with "?"."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [redact(item) for item in value]
+    return REDACTED
+
+
+def filter_shape(command_name: str, command: Dict[str, Any]) -> Any:
+    if command_name in FILTER_FIELDS:
+        return redact(command.get(FILTER_FIELDS[command_name], {}))
+    # update/delete carry a list of statements, each with its own filter
+    statements = command.get(command_name + "s") if command_name in ("update", "delete") else None
+    if statements:
+        return redact(statements[0].get("q", {}))
+    return None
+
+
+def collection_name(command_name: str, command: Dict[str, Any]) -> Optional[str]:
+    if command_name == "getMore":
+        return command.get("collection")
+    target = command.get(command_name)
+    return target if isinstance(target, str) else None
+
+
+class SlowShape:
+    __slots__ = ("command", "collection", "shape", "route", "method", "count", "total_ms", "max_ms")
+
+    def __init__(self, command: str, collection: Optional[str], shape: str, route: str, method: str):
+        self.command = command
+        self.collection = collection
+        self.shape = shape
+        self.route = route
+        self.method = method
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "command": self.command,
+            "collection": self.collection,
+            "shape": self.shape,
+            "route": self.route,
+            "method": self.method,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "mean_ms": round(self.total_ms / self.count, 2),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class CommandMonitor(monitoring.CommandListener):
+    def __init__(self, slow_ms: float, max_shapes: int):
+        self.slow_ms = slow_ms
+        self.max_shapes = max_shapes
+        self.by_command: Dict[str, Histogram] = {}
+        self.by_collection: Dict[str, Histogram] = {}
+        self.by_origin: Dict[Tuple[str, str], Histogram] = {}
+        self.slow_shapes: Dict[Tuple[str, Optional[str], str], SlowShape] = {}
+        self._pending: Dict[Tuple[Any, int], Tuple[Dict[str, Any], Optional[str], str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        command = event.command
+        self._pending[(event.connection_id, event.request_id)] = (
+            command,
+            collection_name(event.command_name, command),
+            current_route(),
+            crud_method(),
+        )
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _histogram(self, table: Dict[Any, Histogram], key: Any) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram())
+        return histogram
+
+    def _finish(self, event) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        command, collection, route, method = pending
+        elapsed_ms = event.duration_micros / 1000
+        add_mongo_time(elapsed_ms / 1000)
+
+        self._histogram(self.by_command, event.command_name).observe(elapsed_ms)
+        if collection:
+            self._histogram(self.by_collection, collection).observe(elapsed_ms)
+        self._histogram(self.by_origin, (route, method)).observe(elapsed_ms)
+
+        if elapsed_ms >= self.slow_ms:
+            self._record_slow(event.command_name, command, collection, route, method, elapsed_ms)
+
+    def _record_slow(
+        self,
+        command_name: str,
+        command: Dict[str, Any],
+        collection: Optional[str],
+        route: str,
+        method: str,
+        elapsed_ms: float
+    ) -> None:
+        shape = json.dumps(filter_shape(command_name, command), sort_keys=True, default=str)
+        logger.warning(
+            "Slow %s on %s: %.1f ms (route %s, %s) filter %s",
+            command_name, collection, elapsed_ms, route, method, shape
+        )
+
+        key = (command_name, collection, shape)
+        with self._lock:
+            entry = self.slow_shapes.get(key)
+            if entry is None:
+                if len(self.slow_shapes) >= self.max_shapes:
+                    # Make room by forgetting the shape that has cost the least
+                    cheapest = min(self.slow_shapes, key=lambda k: self.slow_shapes[k].total_ms)
+                    del self.slow_shapes[cheapest]
+                entry = self.slow_shapes[key] = SlowShape(command_name, collection, shape, route, method)
+            entry.count += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.route, entry.method = route, method
+
+    def top_slow_shapes(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Slow query shapes ordered by total time spent in them."""
+        with self._lock:
+            entries = sorted(self.slow_shapes.values(), key=lambda entry: entry.total_ms, reverse=True)
+            return [entry.as_dict() for entry in entries[:limit]]
+
+    def latency(self) -> Dict[str, Any]:
+        """Latency summaries (milliseconds) by command, collection and origin."""
+        with self._lock:
+            by_command = sorted(self.by_command.items())
+            by_collection = sorted(self.by_collection.items())
+            by_origin = sorted(self.by_origin.items())
+        return {
+            "commands": {name: histogram.snapshot() for name, histogram in by_command},
+            "collections": {name: histogram.snapshot() for name, histogram in by_collection},
+            "origins": [
+                {"route": route, "method": method, **histogram.snapshot()}
+                for (route, method), histogram in by_origin
+            ],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.by_command.clear()
+            self.by_collection.clear()
+            self.by_origin.clear()
+            self.slow_shapes.clear()
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Pool checkout wait and connections in use, for the /metrics endpoint."""
+
+    def connection_checked_out(self, event):
+        POOL_CHECKED_OUT.inc()
+        duration = getattr(event, "duration", None)  # pymongo >= 4.7
+        if duration is not None:
+            POOL_CHECKOUT.observe(("ok",), duration)
+
+    def connection_check_out_failed(self, event):
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            POOL_CHECKOUT.observe((str(event.reason),), duration)
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.dec()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+pool_monitor = PoolMonitor()
+
+command_monitor = CommandMonitor(
+    slow_ms=settings.DB_SLOW_QUERY_MS,
+    max_shapes=settings.DB_SLOW_QUERY_MAX_SHAPES,
+)
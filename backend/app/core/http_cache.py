@@ -0,0 +1,111 @@
+"""
+Conditional GET: weak ETags, Last-Modified and 304 responses.
+
+Validators come from the data rather than from the rendered body, so a
+request whose copy is still current gets a 304 before anything is
+serialized:
+
+- one document: its `_id` and `updated_at` (or `created_at`)
+- a list: the collection's version counter (app.crud.versions) plus the
+  query parameters that select the page
+
+If-None-Match wins over If-Modified-Since, as RFC 9110 requires. Every
+response carries `Cache-Control: public, max-age=N, must-revalidate`, so the
+nginx cache and the app can serve N seconds without asking and then
+revalidate with the same validators.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from fastapi import Request
+from pymongo.database import Database
+from starlette.responses import Response
+
+from app.config import settings
+from app.crud.versions import CRUDVersions
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def document_validators(document: Dict[str, Any]) -> Validators:
+    changed = document.get("updated_at") or document.get("created_at")
+    return Validators(weak_etag(document["_id"], changed.isoformat() if changed else ""), changed)
+
+
+def collection_validators(database: Database, name: str, *variant: Any) -> Validators:
+    """Validators for a list over `name`; `variant` is what selects the page."""
+    counter = CRUDVersions.for_database(database).current(name)
+    return Validators(
+        weak_etag(name, counter["epoch"], counter["version"], *variant),
+        counter.get("updated_at")
+    )
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands back naive UTC datetimes
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match list."""
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or validators.last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole seconds
+    return _as_utc(validators.last_modified).replace(microsecond=0) <= since
+
+
+def cache_headers(validators: Validators, max_age: Optional[int] = None) -> Dict[str, str]:
+    if max_age is None:
+        max_age = settings.HTTP_CACHE_MAX_AGE_SECONDS
+    headers = {
+        "ETag": validators.etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(validators.last_modified), usegmt=True)
+    return headers
+
+
+def conditional_response(
+    request: Request,
+    validators: Validators,
+    render: Callable[[], Response],
+    max_age: Optional[int] = None,
+) -> Response:
+    """304 if the client's copy is current, else `render()`; both carry the validators."""
+    headers = cache_headers(validators, max_age)
+    if is_not_modified(request, validators):
+        return Response(status_code=304, headers=headers)
+    response = render()
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,58 @@
+"""
+Request metrics for every router: counts, latency, in-flight requests and
+response sizes, labelled with the route template (not the raw path, which
+would create a series per listing id).
+"""
+import time
+
+from app.core.metrics import BYTES_BUCKETS, registry
+from app.core.request_context import UNMATCHED_ROUTE
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled", ("route", "method", "status")
+)
+LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Time to the end of the response body", ("route", "method")
+)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "Response body size", ("route", "method"), buckets=BYTES_BUCKETS
+)
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled", ("method",)
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; the body is counted as it streams, never buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        IN_FLIGHT.inc((method,))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec((method,))
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            REQUESTS.inc((route, method, str(status)))
+            LATENCY.observe((route, method), elapsed)
+            RESPONSE_SIZE.observe((route, method), size)
@@ -0,0 +1,155 @@
+"""
+Event-loop lag and blocking-call watchdog.
+
+Any synchronous work inside an `async def` handler (pymongo, bcrypt) delays
+every other request on the worker by the same amount. A heartbeat task on
+the loop records how late its timer fires (event_loop_lag_seconds). A helper
+thread watches the heartbeat; once it is more than LOOP_STALL_THRESHOLD_MS
+overdue, the thread samples the loop thread's stack via sys._current_frames,
+which shows the call that is blocking, and notes the route of the task
+running at that moment. When the loop resumes the stall is logged, counted
+and kept for GET /admin/loop/stalls.
+
+Debug mode: with LOOP_BLOCK_FAIL_MS set, LoopBlockGuardMiddleware raises
+LoopBlockedError from any request that blocked the loop for longer, so a
+test suite run with e.g. `LOOP_BLOCK_FAIL_MS=50` fails on the offending
+request (TestClient re-raises server errors).
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.core.metrics import registry
+from app.core.request_context import route_for_task
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay of a periodic timer beyond its due time",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+LOOP_STALLS = registry.counter(
+    "event_loop_stalls_total", "Loop blocked longer than the stall threshold", ("route",)
+)
+
+
+class LoopBlockedError(RuntimeError):
+    """A request blocked the event loop for longer than LOOP_BLOCK_FAIL_MS."""
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float, threshold: float, history: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        # Stall seen by the watcher thread and not yet closed by the heartbeat
+        self._open: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Start on the running loop (no-op if already running there)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self.loop is loop:
+            return self._task
+
+        self.loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        self._task = loop.create_task(self._heartbeat())
+        return self._task
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                due = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                LOOP_LAG.observe((), max(0.0, loop.time() - due))
+                self.close_stall()
+        finally:
+            self._stopped.set()
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval / 2):
+            with self._lock:
+                overdue = time.monotonic() - self._last_beat - self.interval
+                if overdue < self.threshold or self._open is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                task = asyncio.current_task(self.loop)
+                self._open = {
+                    "route": route_for_task(task),
+                    "task_id": id(task) if task is not None else None,
+                    "stack": "".join(traceback.format_stack(frame)) if frame is not None else "",
+                }
+
+    def close_stall(self) -> Optional[Dict[str, Any]]:
+        """Called on the loop thread: the loop is running again."""
+        with self._lock:
+            now = time.monotonic()
+            blocked = now - self._last_beat - self.interval
+            self._last_beat = now
+            stall, self._open = self._open, None
+        if stall is None:
+            return None
+
+        stall["blocked_ms"] = round(blocked * 1000, 1)
+        stall["at"] = time.time()
+        self.stalls.append(stall)
+        LOOP_STALLS.inc((stall["route"],))
+        logger.warning(
+            "Event loop blocked for %.0f ms (route %s):\n%s",
+            stall["blocked_ms"], stall["route"], stall["stack"]
+        )
+        return stall
+
+    def recent_stalls(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in stall.items() if k != "task_id"} for stall in reversed(self.stalls)]
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL_MS / 1000,
+    threshold=settings.LOOP_STALL_THRESHOLD_MS / 1000,
+)
+
+
+class LoopBlockGuardMiddleware:
+    """Debug mode: fail requests that blocked the loop for longer than `fail_ms`."""
+
+    def __init__(self, app, fail_ms: float, watchdog: LoopWatchdog = loop_watchdog):
+        self.app = app
+        self.fail_ms = fail_ms
+        self.watchdog = watchdog
+        # Stalls shorter than the watchdog threshold are never captured
+        watchdog.threshold = min(watchdog.threshold, fail_ms / 1000)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Test clients often skip startup events; make sure someone is watching
+        self.watchdog.start()
+        task_id = id(asyncio.current_task())
+        await self.app(scope, receive, send)
+
+        stall = self.watchdog.close_stall()
+        if stall is not None and stall["task_id"] == task_id and stall["blocked_ms"] >= self.fail_ms:
+            raise LoopBlockedError(
+                f"{scope['method']} {stall['route']} blocked the event loop for "
+                f"{stall['blocked_ms']:.0f} ms (limit {self.fail_ms:.0f} ms):\n{stall['stack']}"
+            )
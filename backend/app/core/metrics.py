@@ -0,0 +1,246 @@
+"""
+In-process metric primitives and their Prometheus text exposition.
+
+Histograms use fixed bucket bounds, so recording is a bisect and an
+increment, memory stays constant, and percentiles are estimated by linear
+interpolation inside the bucket that holds them.
+
+Metric families live in `registry` and are rendered by GET /metrics.
+Families are labelled; each label combination is created on first use.
+Values that are cheaper to read at scrape time than to keep up to date
+(e.g. conversations per stage) are registered as gauge callbacks.
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Milliseconds
+DEFAULT_LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Seconds, the Prometheus convention
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Bucketed distribution of observed values (bucket bounds are inclusive)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One extra slot for values above the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Estimated value at a percentile (0-100); None before any observation."""
+        if not self.count:
+            return None
+        rank = percentile / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+        return self.max
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 2) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean": rounded(self.sum / self.count) if self.count else None,
+            "p50": rounded(self.percentile(50)),
+            "p95": rounded(self.percentile(95)),
+            "p99": rounded(self.percentile(99)),
+            "max": rounded(self.max) if self.count else None,
+        }
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricFamily:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class CounterFamily(MetricFamily):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self.values.items())
+        return self.header() + [
+            f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class GaugeFamily(CounterFamily):
+    kind = "gauge"
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class GaugeCallback(MetricFamily):
+    """Gauge whose samples are produced by a function at scrape time."""
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[LabelValues, float]]]
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.collect())
+        ]
+
+
+class HistogramFamily(MetricFamily):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = SECONDS_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[LabelValues, Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        histogram = self.histograms.get(values)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(values, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        self.labels(*labels).observe(value)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self.histograms.items())
+        lines = self.header()
+        for labels, histogram in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), histogram.counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(histogram.sum)}")
+            lines.append(f"{self.name}_count{label_text} {histogram.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        # Re-registering (e.g. a module reloaded in tests) keeps the existing family
+        with self._lock:
+            return self.families.setdefault(family.name, family)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> CounterFamily:
+        return self._register(CounterFamily(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> GaugeFamily:
+        return self._register(GaugeFamily(name, documentation, labelnames))
+
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[LabelValues, float]]]
+    ) -> GaugeCallback:
+        return self._register(GaugeCallback(name, documentation, labelnames, collect))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = SECONDS_BUCKETS
+    ) -> HistogramFamily:
+        return self._register(HistogramFamily(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All families in the Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
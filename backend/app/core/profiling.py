@@ -0,0 +1,214 @@
+"""
+Opt-in request profiling.
+
+A request is profiled when it carries `X-Profile: 1` together with a valid
+X-Admin-Token, or when it is picked by PROFILE_SAMPLE_RATE. The handler then
+runs under cProfile, and the response gets a Server-Timing header splitting
+the time into:
+
+- mongo: driver-measured command time (from the command listener)
+- provider: ServiceProvider call time (from ResilientProvider)
+- serialize: response model validation plus JSON rendering (from the profile)
+- python: everything else
+
+The profile stats are kept in a ring buffer of the last PROFILE_BUFFER_SIZE
+requests and can be downloaded from /admin/profiles in the pstats format
+(`python -m pstats`, snakeviz).
+
+cProfile sees the event-loop thread only, and only one request is profiled
+at a time. Other requests interleaved on the loop show up in the profile;
+work sent to the thread pool (sync endpoints, asyncio.to_thread) does not.
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.core.request_context import UNMATCHED_ROUTE
+from app.dependencies import has_admin_token
+
+# Functions whose cumulative time counts as serialization. The list
+# responses of app.core.responses validate and dump in their constructors.
+SERIALIZATION_FUNCTIONS = {
+    ("fastapi/routing.py", "serialize_response"),
+    ("starlette/responses.py", "render"),
+    ("fastapi/responses.py", "render"),
+    ("app/core/responses.py", "__init__"),
+    ("app/core/responses.py", "render"),
+    ("app/core/responses.py", "_orjson_default"),
+    ("pydantic/type_adapter.py", "dump_json"),
+    ("pydantic/type_adapter.py", "dump_python"),
+}
+
+
+class RequestTimings:
+    """Seconds spent per category while handling one request."""
+
+    def __init__(self):
+        self.mongo = 0.0
+        self.provider = 0.0
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def add_mongo_time(seconds: float) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.mongo += seconds
+
+
+def add_provider_time(seconds: float) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.provider += seconds
+
+
+def _is_serialization(function: tuple) -> bool:
+    filename, _, name = function
+    normalized = filename.replace("\\", "/")
+    return any(normalized.endswith(path) and name == target for path, target in SERIALIZATION_FUNCTIONS)
+
+
+def serialization_seconds(stats: pstats.Stats) -> float:
+    """Cumulative time in SERIALIZATION_FUNCTIONS, nested calls counted once."""
+    total = 0.0
+    for function, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not _is_serialization(function):
+            continue
+        # Time reached through another serialization function is already in its total
+        nested = sum(
+            timing[3] for caller, timing in callers.items() if _is_serialization(caller)
+        )
+        total += max(cumulative - nested, 0.0)
+    return total
+
+
+class ProfileStore:
+    """Ring buffer of recent request profiles."""
+
+    def __init__(self, size: int):
+        self.profiles: Deque[Dict[str, Any]] = deque(maxlen=max(1, size))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, summary: Dict[str, Any], stats: pstats.Stats) -> int:
+        with self._lock:
+            profile_id = next(self._ids)
+            self.profiles.append({"id": profile_id, **summary, "stats": marshal.dumps(stats.stats)})
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{k: v for k, v in profile.items() if k != "stats"} for profile in reversed(self.profiles)]
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((profile for profile in self.profiles if profile["id"] == profile_id), None)
+
+
+def profile_text(profile: Dict[str, Any], limit: int = 40, sort: str = "cumulative") -> str:
+    """Top functions of a stored profile, as `python -m pstats` would print them."""
+    stats = pstats.Stats(_StoredProfile(profile["stats"]), stream=io.StringIO())
+    stats.sort_stats(sort).print_stats(limit)
+    return stats.stream.getvalue()
+
+
+class _StoredProfile:
+    """Adapter so pstats.Stats can load marshalled stats from memory."""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+profile_store = ProfileStore(settings.PROFILE_BUFFER_SIZE)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate: Optional[float] = None, store: ProfileStore = profile_store):
+        self.app = app
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.store = store
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") == b"1":
+            return has_admin_token(headers.get(b"x-admin-token", b"").decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        # cProfile hooks the whole thread, so profiles cannot overlap
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        finished = False
+
+        def finish() -> Dict[str, float]:
+            nonlocal finished
+            profiler.disable()
+            finished = True
+            total = time.perf_counter() - started
+            stats = pstats.Stats(profiler)
+            serialize = serialization_seconds(stats)
+            breakdown = {
+                "mongo": timings.mongo,
+                "provider": timings.provider,
+                "serialize": serialize,
+                "python": max(0.0, total - timings.mongo - timings.provider - serialize),
+                "total": total,
+            }
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            profile_id = self.store.add({
+                "route": route,
+                "method": scope["method"],
+                "path": scope["path"],
+                "at": datetime.utcnow().isoformat(),
+                "timings_ms": {name: round(seconds * 1000, 3) for name, seconds in breakdown.items()},
+            }, stats)
+            return {"id": profile_id, **breakdown}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and not finished:
+                result = finish()
+                server_timing = ", ".join(
+                    f"{name};dur={seconds * 1000:.2f}"
+                    for name, seconds in result.items() if name != "id"
+                )
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", server_timing.encode()),
+                        (b"x-profile-id", str(result["id"]).encode()),
+                    ],
+                }
+            await send(message)
+
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                finish()
+            _current_timings.reset(token)
+            self._busy.release()
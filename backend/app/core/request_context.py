@@ -0,0 +1,56 @@
+"""
+Request context available to code that has no access to the Request.
+
+The middleware publishes the ASGI scope in a context variable. Routing
+fills in `scope["route"]` later on the same dict, so lookups made while the
+handler runs (e.g. from a pymongo command listener) see the matched route.
+The handler's thread-pool calls and asyncio.to_thread copy the context, so
+the lookup works there as well.
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+NO_REQUEST = "-"
+UNMATCHED_ROUTE = "unmatched"
+
+_current_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_scope", default=None)
+# Scope per running request task, for lookups from other threads (loop watchdog)
+_task_scopes: Dict[int, Dict[str, Any]] = {}
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware, so the context variable reaches the endpoint."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        task_id = id(asyncio.current_task())
+        _task_scopes[task_id] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _task_scopes.pop(task_id, None)
+            _current_scope.reset(token)
+
+
+def _route(scope: Optional[Dict[str, Any]]) -> str:
+    if scope is None:
+        return NO_REQUEST
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def current_route() -> str:
+    """Route template of the request being handled, e.g. `/listings/{listing_id}`."""
+    return _route(_current_scope.get())
+
+
+def route_for_task(task: Optional["asyncio.Task"]) -> str:
+    """Route a request task is handling; safe to call from another thread."""
+    return _route(_task_scopes.get(id(task))) if task is not None else NO_REQUEST
@@ -0,0 +1,79 @@
+"""
+Response classes for the JSON hot paths.
+
+List endpoints used to build one pydantic model per document in Python
+(`[ListingPublic(**doc) for doc in cursor]`); FastAPI then validated the
+list again against the response_model before encoding it. ModelListResponse
+validates the raw documents once, inside pydantic-core, with a TypeAdapter
+compiled once per model, and dumps straight to JSON bytes from there. The
+route keeps its response_model for the OpenAPI schema; FastAPI does not
+re-validate a Response returned by the endpoint. ModelResponse does the same
+for a single document.
+
+ORJSONResponse is for endpoints without a response_model (the concierge
+service search): orjson encodes the content, pydantic models included,
+without the jsonable_encoder pass. Routes with a response_model should keep
+the default response class, which already has FastAPI dump the validated
+model through pydantic-core.
+"""
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Optional, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+class ModelListResponse(Response):
+    """JSON list of `model`, validated once from DB documents (dicts or a cursor)."""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        documents: Iterable[Mapping[str, Any]],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        adapter = list_adapter(model)
+        # by_alias keeps `_id` in the output, as the response_model path did
+        content = adapter.dump_json(adapter.validate_python(documents), by_alias=True)
+        super().__init__(content, status_code, headers, background=background)
+
+
+class ModelResponse(Response):
+    """JSON of one `model`, validated once from a DB document."""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        document: Mapping[str, Any],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        content = model.model_validate(document).model_dump_json(by_alias=True)
+        super().__init__(content, status_code, headers, background=background)
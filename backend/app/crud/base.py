@@ -2,21 +2,76 @@
 Base CRUD operations for MongoDB collections.
 """
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
-from uuid import uuid4
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
-from pydantic import BaseModel
+import bson
+from pydantic import BaseModel, Field
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
 from pymongo.collection import Collection
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.crud.deadlines import with_deadlines
+from app.crud.ids import new_id, new_ids
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Chunk bulk writes well inside the server's per-batch limits
+MAX_BULK_OPS = 100_000
+MAX_BULK_BYTES = 16 * 1024 * 1024
+
+BulkOperation = Union[InsertOne, UpdateOne, DeleteOne]
+
+
+class BulkResult(BaseModel):
+    """Totals of a chunked bulk write; error indexes refer to the input list."""
+    inserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
+
+    def add(self, raw: Dict[str, Any], offset: int, positions: Optional[Sequence[int]] = None) -> None:
+        """Merge one chunk's result; positions maps op indexes to input indexes when inputs were skipped."""
+        self.inserted += raw.get("nInserted", 0)
+        self.matched += raw.get("nMatched", 0)
+        self.modified += raw.get("nModified", 0)
+        self.upserted += raw.get("nUpserted", 0)
+        self.deleted += raw.get("nRemoved", 0)
+        self.errors.extend(
+            {"index": _input_index(offset + error["index"], positions), "code": error.get("code"), "message": error.get("errmsg")}
+            for error in raw.get("writeErrors", [])
+        )
+
+
+def _input_index(index: int, positions: Optional[Sequence[int]]) -> int:
+    return index if positions is None else positions[index]
+
 
 class CRUDBase:
+    # Subclasses that maintain derived data set this and override _on_change
+    tracks_changes = False
+
     def __init__(self, collection: Collection):
-        self.collection = collection
+        # Every call through self.collection gets its operation-class deadline
+        self.collection = with_deadlines(collection)
+
+    def _on_change(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]]
+    ) -> None:
+        """Called after a write; before is None on create, after is None on delete."""
+
+    def _on_changes(
+        self,
+        changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Batch form of _on_change used by the bulk methods."""
+        for before, after in changes:
+            self._on_change(before, after)
 
     def create(
         self, 
@@ -31,7 +86,7 @@ class CRUDBase:
             obj_data = obj_in.copy()
         
         # Add default fields
-        obj_data["_id"] = str(uuid4())
+        obj_data["_id"] = new_id()
         obj_data["created_at"] = datetime.utcnow()
         obj_data["updated_at"] = None
         
@@ -41,9 +96,11 @@ class CRUDBase:
         
         try:
             self.collection.insert_one(obj_data)
-            return obj_data
         except DuplicateKeyError as e:
             raise ValueError(f"Document with this data already exists: {e}")
+        
+        self._on_change(None, obj_data)
+        return obj_data
 
     def get(self, id: str) -> Optional[Dict[str, Any]]:
         """Get a document by ID."""
@@ -72,13 +129,15 @@ class CRUDBase:
         self,
         *,
         id: str,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        filter_dict: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
-        """Update a document by ID."""
-        # Check if document exists
-        existing = self.collection.find_one({"_id": id})
-        if not existing:
-            return None
+        """Update a document by ID and return it as stored.
+        
+        `filter_dict` adds conditions (e.g. ownership) that are checked in the
+        same atomic write; None is returned if no document matches them.
+        """
+        query = {**(filter_dict or {}), "_id": id}
         
         if isinstance(obj_in, BaseModel):
             update_data = obj_in.model_dump(exclude_unset=True)
@@ -89,25 +148,42 @@ class CRUDBase:
         update_data = {k: v for k, v in update_data.items() if v is not None}
         
         if not update_data:
-            return existing
+            return self.collection.find_one(query)
         
         # Add updated timestamp
         update_data["updated_at"] = datetime.utcnow()
         
-        # Update the document
-        self.collection.update_one(
-            {"_id": id}, 
-            {"$set": update_data}
-        )
+        if not self.tracks_changes:
+            return self.collection.find_one_and_update(
+                query,
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
+            )
         
-        # Return updated document
-        existing.update(update_data)
-        return existing
+        # Hooks need both sides; the $set applied to the pre-image is exactly what was stored
+        before = self.collection.find_one_and_update(
+            query,
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        after = {**before, **update_data}
+        self._on_change(before, after)
+        return after
 
-    def delete(self, *, id: str) -> bool:
-        """Delete a document by ID."""
-        result = self.collection.delete_one({"_id": id})
-        return result.deleted_count > 0
+    def delete(self, *, id: str, filter_dict: Optional[Dict[str, Any]] = None) -> bool:
+        """Delete a document by ID, optionally only if it also matches `filter_dict`."""
+        query = {**(filter_dict or {}), "_id": id}
+        if not self.tracks_changes:
+            result = self.collection.delete_one(query)
+            return result.deleted_count > 0
+        
+        deleted = self.collection.find_one_and_delete(query)
+        if deleted is None:
+            return False
+        self._on_change(deleted, None)
+        return True
 
     def soft_delete(self, *, id: str) -> Optional[Dict[str, Any]]:
         """Soft delete a document by setting is_active to False."""
@@ -150,55 +226,184 @@ class CRUDBase:
         """Perform an aggregation query."""
         return list(self.collection.aggregate(pipeline))
 
-    def bulk_create(self, objects: List[Union[CreateSchemaType, Dict[str, Any]]]) -> List[Dict[str, Any]]:
-        """Create multiple documents at once."""
+    def _bulk_write(
+        self,
+        operations: Sequence[Tuple[BulkOperation, int]],
+        ordered: bool,
+        positions: Optional[Sequence[int]] = None
+    ) -> BulkResult:
+        """Run (operation, size) pairs in chunks; ordered mode stops at the first failing chunk.
+
+        Callers that skip input entries pass positions (the input index of each
+        operation) so error indexes still refer to their input list.
+        """
+        result = BulkResult()
+        offset = 0
+        chunk: List[BulkOperation] = []
+        chunk_bytes = 0
+
+        def flush() -> bool:
+            try:
+                raw = self.collection.bulk_write(chunk, ordered=ordered).bulk_api_result
+            except BulkWriteError as exc:
+                raw = exc.details
+            result.add(raw, offset, positions)
+            return not (ordered and raw.get("writeErrors"))
+
+        for operation, size in operations:
+            if chunk and (len(chunk) >= MAX_BULK_OPS or chunk_bytes + size > MAX_BULK_BYTES):
+                if not flush():
+                    return result
+                offset += len(chunk)
+                chunk, chunk_bytes = [], 0
+            chunk.append(operation)
+            chunk_bytes += size
+
+        if chunk:
+            flush()
+        return result
+
+    def _fetch_by_ids(self, ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        if not self.tracks_changes or not ids:
+            return {}
+        return {document["_id"]: document for document in self.collection.find({"_id": {"$in": ids}})}
+
+    def _notify_bulk(self, ids: List[Any], before: Dict[Any, Dict[str, Any]]) -> None:
+        if not self.tracks_changes:
+            return
+        after = self._fetch_by_ids(ids)
+        self._on_changes(
+            (before.get(doc_id), after.get(doc_id))
+            for doc_id in dict.fromkeys(ids)
+            if before.get(doc_id) != after.get(doc_id)
+        )
+
+    def bulk_create(
+        self,
+        objects: List[Union[CreateSchemaType, Dict[str, Any]]],
+        *,
+        ordered: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Create multiple documents at once; returns the documents inserted."""
+        now = datetime.utcnow()
         documents = []
-        for obj in objects:
-            if isinstance(obj, BaseModel):
-                obj_data = obj.model_dump()
-            else:
-                obj_data = obj.copy()
-            
-            obj_data["_id"] = str(uuid4())
-            obj_data["created_at"] = datetime.utcnow()
+        for obj, doc_id in zip(objects, new_ids(len(objects))):
+            obj_data = obj.model_dump() if isinstance(obj, BaseModel) else dict(obj)
+            obj_data["_id"] = doc_id
+            obj_data["created_at"] = now
             obj_data["updated_at"] = None
             documents.append(obj_data)
         
-        if documents:
-            self.collection.insert_many(documents)
+        if not documents:
+            return []
         
+        result = self._bulk_write(
+            [(InsertOne(document), len(bson.encode(document))) for document in documents],
+            ordered
+        )
+        if result.errors or result.inserted < len(documents):
+            failed = {error["index"] for error in result.errors}
+            # Ordered writes stop at the first error: nothing after it went in
+            cutoff = min(failed) if ordered and failed else len(documents)
+            documents = [
+                document for index, document in enumerate(documents[:cutoff])
+                if index not in failed
+            ]
+        self._on_changes((None, document) for document in documents)
         return documents
 
-    def bulk_update(self, updates: List[Dict[str, Any]]) -> int:
-        """Update multiple documents at once."""
-        if not updates:
-            return 0
+    def bulk_upsert(
+        self,
+        documents: List[Dict[str, Any]],
+        *,
+        key: Sequence[str] = ("_id",),
+        ordered: bool = False
+    ) -> BulkResult:
+        """Insert or update documents matched on the `key` fields.
         
+        The timestamps are managed here: `updated_at` is set on every write
+        and `created_at` (the document's own, if given) only on insert.
+        Change hooks only see documents that carry their `_id`.
+        """
+        now = datetime.utcnow()
         operations = []
-        for update in updates:
+        for document, generated_id in zip(documents, new_ids(len(documents))):
+            match = {field: document[field] for field in key}
+            # A path may appear in only one of $set and $setOnInsert
+            fields = {
+                k: v for k, v in document.items()
+                if k not in match and k not in ("_id", "created_at", "updated_at")
+            }
+            fields["updated_at"] = now
+            on_insert: Dict[str, Any] = {"created_at": document.get("created_at") or now}
+            if "_id" not in match:
+                on_insert["_id"] = document.get("_id", generated_id)
+            update = {"$set": fields, "$setOnInsert": on_insert}
+            operations.append((
+                UpdateOne(match, update, upsert=True),
+                len(bson.encode(match)) + len(bson.encode(update))
+            ))
+        
+        ids = [document["_id"] for document in documents if "_id" in document]
+        before = self._fetch_by_ids(ids)
+        result = self._bulk_write(operations, ordered)
+        self._notify_bulk(ids, before)
+        return result
+
+    def bulk_update(
+        self,
+        updates: List[Dict[str, Any]],
+        *,
+        ordered: bool = False
+    ) -> BulkResult:
+        """$set fields on multiple documents; each update dict carries its `_id`."""
+        now = datetime.utcnow()
+        operations = []
+        positions = []
+        ids = []
+        for position, update in enumerate(updates):
             if "_id" not in update:
                 continue
-            
-            doc_id = update.pop("_id")
-            update["updated_at"] = datetime.utcnow()
-            
-            operations.append({
-                "updateOne": {
-                    "filter": {"_id": doc_id},
-                    "update": {"$set": update}
-                }
-            })
-        
-        if operations:
-            result = self.collection.bulk_write(operations)
-            return result.modified_count
-        
-        return 0
-
-    def bulk_delete(self, ids: List[str]) -> int:
-        """Delete multiple documents by IDs."""
-        if not ids:
-            return 0
+            fields = {k: v for k, v in update.items() if k != "_id"}
+            fields["updated_at"] = now
+            ids.append(update["_id"])
+            operations.append((
+                UpdateOne({"_id": update["_id"]}, {"$set": fields}),
+                len(bson.encode(fields))
+            ))
+            positions.append(position)
         
-        result = self.collection.delete_many({"_id": {"$in": ids}})
-        return result.deleted_count
\ No newline at end of file
+        before = self._fetch_by_ids(ids)
+        result = self._bulk_write(operations, ordered, positions)
+        self._notify_bulk(ids, before)
+        return result
+
+    def bulk_inc(
+        self,
+        increments: Dict[str, Dict[str, Union[int, float]]],
+        *,
+        ordered: bool = False
+    ) -> BulkResult:
+        """Apply `{id: {field: amount}}` counter increments in one bulk write."""
+        ids = list(increments)
+        operations = []
+        positions = []
+        for position, (doc_id, amounts) in enumerate(increments.items()):
+            if not amounts:
+                continue
+            operations.append((UpdateOne({"_id": doc_id}, {"$inc": amounts}), len(bson.encode(amounts))))
+            positions.append(position)
+        before = self._fetch_by_ids(ids)
+        result = self._bulk_write(operations, ordered, positions)
+        self._notify_bulk(ids, before)
+        return result
+
+    def bulk_delete(self, ids: List[str], *, ordered: bool = False) -> BulkResult:
+        """Delete multiple documents by IDs."""
+        before = self._fetch_by_ids(ids)
+        result = self._bulk_write(
+            [(DeleteOne({"_id": doc_id}), len(bson.encode({"_id": doc_id}))) for doc_id in ids],
+            ordered
+        )
+        self._notify_bulk(ids, before)
+        return result
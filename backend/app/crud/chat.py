@@ -1,10 +1,13 @@
 """
 CRUD operations for Chat and Message collections.
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
 from app.crud.base import CRUDBase
+from app.crud.ids import new_id
 from app.schemas.chat import ChatCreate, MessageCreate
 
 
@@ -13,23 +16,54 @@ class CRUDChat(CRUDBase):
         super().__init__(collection)
 
     def create_chat(self, *, chat_in: ChatCreate, user_id: str) -> Dict[str, Any]:
-        """Create a new chat between two users."""
-        participants = sorted([user_id, chat_in.participant_id])
-        participants_hash = "::".join(participants)
-        
-        # Check if chat already exists
-        existing = self.find_one({"participants_hash": participants_hash})
-        if existing:
-            return existing
+        """Create a new chat between two users, or return the existing one."""
+        chat, _ = self.open_chat(participants=[user_id, chat_in.participant_id])
+        return chat
+
+    def open_chat(
+        self,
+        *,
+        participants: List[str],
+        listing_context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Find or create the chat for a set of participants in one upsert.
         
-        chat_data = {
+        Returns the chat and whether this call created it.
+        """
+        participants = sorted(participants)
+        participants_hash = "::".join(participants)
+        chat_id = new_id()
+        on_insert = {
+            "_id": chat_id,
             "participants": participants,
-            "participants_hash": participants_hash,
             "last_message_at": None,
-            "last_message": None
+            "last_message": None,
+            "created_at": datetime.utcnow(),
+            "updated_at": None
         }
+        if listing_context:
+            on_insert["listing_context"] = listing_context
+        
+        try:
+            chat = self.collection.find_one_and_update(
+                {"participants_hash": participants_hash},
+                {"$setOnInsert": on_insert},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost the race to a concurrent upsert on the unique hash
+            chat = self.collection.find_one({"participants_hash": participants_hash})
+        
+        # Chats opened before listing context existed pick it up once
+        if listing_context and not chat.get("listing_context"):
+            chat = self.collection.find_one_and_update(
+                {"_id": chat["_id"], "listing_context": None},
+                {"$set": {"listing_context": listing_context}},
+                return_document=ReturnDocument.AFTER
+            ) or self.get(chat["_id"])
         
-        return self.create(obj_in=chat_data)
+        return chat, chat["_id"] == chat_id
 
     def get_user_chats(self, *, user_id: str, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
         """Get all chats for a user."""
@@ -54,20 +88,31 @@ class CRUDChat(CRUDBase):
         *, 
         chat_id: str, 
         message_content: str, 
-        timestamp: datetime
-    ) -> Optional[Dict[str, Any]]:
-        """Update the last message info for a chat."""
-        update_data = {
-            "last_message": message_content,
-            "last_message_at": timestamp
-        }
+        timestamp: datetime,
+        sender_id: Optional[str] = None
+    ) -> bool:
+        """Update the last message info for a chat.
         
-        return self.update(id=chat_id, obj_in=update_data)
+        With `sender_id`, only a chat that has the sender as participant is
+        updated, so the return value doubles as the participant check.
+        """
+        query: Dict[str, Any] = {"_id": chat_id}
+        if sender_id is not None:
+            query["participants"] = sender_id
+        
+        result = self.collection.update_one(
+            query,
+            {"$set": {
+                "last_message": message_content,
+                "last_message_at": timestamp,
+                "updated_at": timestamp
+            }}
+        )
+        return result.matched_count > 0
 
     def is_participant(self, *, chat_id: str, user_id: str) -> bool:
         """Check if user is a participant in the chat."""
-        chat = self.get(chat_id)
-        return chat is not None and user_id in chat.get("participants", [])
+        return self.exists({"_id": chat_id, "participants": user_id})
 
 
 class CRUDMessage(CRUDBase):
@@ -82,29 +127,39 @@ class CRUDMessage(CRUDBase):
         chat_id: str, 
         sender_id: str
     ) -> Optional[Dict[str, Any]]:
-        """Create a new message in a chat."""
-        # Verify user is participant in chat
-        if not self.chat_crud.is_participant(chat_id=chat_id, user_id=sender_id):
-            return None
+        """Create a new message in a chat.
         
-        message_data = message_in.model_dump()
-        additional_fields = {
+        Two writes: the message insert, then the chat's last-message update
+        filtered on the sender being a participant. The message is removed
+        again when that update doesn't apply, so a chat never points at a
+        message that doesn't exist.
+        """
+        now = datetime.utcnow()
+        message = message_in.model_dump()
+        message.update({
+            "_id": new_id(),
             "chat_id": chat_id,
             "sender_id": sender_id,
             "is_read": False,
-            "edited_at": None
-        }
-        
-        # Create the message
-        message = self.create(obj_in=message_data, additional_fields=additional_fields)
-        
-        # Update chat's last message
-        self.chat_crud.update_last_message(
-            chat_id=chat_id,
-            message_content=message_data["content"],
-            timestamp=message["created_at"]
-        )
+            "edited_at": None,
+            "created_at": now,
+            "updated_at": None
+        })
         
+        self.collection.insert_one(message)
+        try:
+            updated = self.chat_crud.update_last_message(
+                chat_id=chat_id,
+                message_content=message["content"],
+                timestamp=now,
+                sender_id=sender_id
+            )
+        except Exception:
+            self.collection.delete_one({"_id": message["_id"]})
+            raise
+        if not updated:
+            self.collection.delete_one({"_id": message["_id"]})
+            return None
         return message
 
     def get_chat_messages(
@@ -137,26 +192,16 @@ class CRUDMessage(CRUDBase):
         sender_id: str
     ) -> Optional[Dict[str, Any]]:
         """Update a message (only by sender)."""
-        # Check if message exists and belongs to sender
-        existing = self.get(message_id)
-        if not existing or existing.get("sender_id") != sender_id:
-            return None
-        
         update_data = {
             "content": content,
             "edited_at": datetime.utcnow()
         }
         
-        return self.update(id=message_id, obj_in=update_data)
+        return self.update(id=message_id, obj_in=update_data, filter_dict={"sender_id": sender_id})
 
     def delete_message(self, *, message_id: str, sender_id: str) -> bool:
         """Delete a message (only by sender)."""
-        # Check if message exists and belongs to sender
-        existing = self.get(message_id)
-        if not existing or existing.get("sender_id") != sender_id:
-            return False
-        
-        return self.delete(id=message_id)
+        return self.delete(id=message_id, filter_dict={"sender_id": sender_id})
 
     def mark_as_read(self, *, message_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Mark a message as read."""
@@ -1,16 +1,49 @@
 """
 CRUD operations for Community Posts and Comments.
 """
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
 from app.crud.base import CRUDBase
+from app.crud.facets import CRUDFacets, POST_TAGS, post_tag_values
+from app.crud.trending import COMMENT_WEIGHT, CRUDTrending, POSTS
+from app.crud.versions import CRUDVersions
 from app.schemas.community import CommunityPostCreate, CommunityCommentCreate
 
 
 class CRUDCommunityPost(CRUDBase):
+    tracks_changes = True
+
     def __init__(self, collection: Collection):
         super().__init__(collection)
+        self.trending = CRUDTrending.for_database(collection.database)
+        self.facets = CRUDFacets.for_database(collection.database)
+        self.versions = CRUDVersions.for_database(collection.database)
+
+    def _on_change(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]]
+    ) -> None:
+        """Keep the tag counters in step with posts."""
+        self._on_changes([(before, after)])
+
+    def _on_changes(
+        self,
+        changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Fold a batch of changes into one counter update and one version bump."""
+        before_values: List[str] = []
+        after_values: List[str] = []
+        changed = False
+        for before, after in changes:
+            changed = True
+            before_values.extend(post_tag_values(before))
+            after_values.extend(post_tag_values(after))
+        self.facets.apply_change(facet=POST_TAGS, before=before_values, after=after_values)
+        if changed:
+            self.versions.bump(self.collection.name)
 
     def create_post(self, *, post_in: CommunityPostCreate, author_id: str) -> Dict[str, Any]:
         """Create a new community post."""
@@ -23,7 +56,9 @@ class CRUDCommunityPost(CRUDBase):
             "is_locked": False
         }
         
-        return self.create(obj_in=post_data, additional_fields=additional_fields)
+        post = self.create(obj_in=post_data, additional_fields=additional_fields)
+        self.trending.record_activity(kind=POSTS, item_id=post["_id"])
+        return post
 
     def get_posts(
         self, 
@@ -65,25 +100,15 @@ class CRUDCommunityPost(CRUDBase):
         author_id: str
     ) -> Optional[Dict[str, Any]]:
         """Update a post (only by author)."""
-        # Check if post exists and belongs to author
-        existing = self.get(post_id)
-        if not existing or existing.get("author_id") != author_id:
-            return None
-        
         # Remove fields that shouldn't be updated directly
         safe_fields = {k: v for k, v in post_data.items() 
                       if k not in ["_id", "author_id", "created_at", "like_count", "comment_count"]}
         
-        return self.update(id=post_id, obj_in=safe_fields)
+        return self.update(id=post_id, obj_in=safe_fields, filter_dict={"author_id": author_id})
 
     def delete_post(self, *, post_id: str, author_id: str) -> bool:
         """Delete a post (only by author)."""
-        # Check if post exists and belongs to author
-        existing = self.get(post_id)
-        if not existing or existing.get("author_id") != author_id:
-            return False
-        
-        return self.delete(id=post_id)
+        return self.delete(id=post_id, filter_dict={"author_id": author_id})
 
     def search_posts(
         self, 
@@ -135,7 +160,11 @@ class CRUDCommunityPost(CRUDBase):
         limit: int = 10, 
         days: int = 7
     ) -> List[Dict[str, Any]]:
-        """Get most liked posts in the last N days."""
+        """Get trending posts created in the last N days from the precomputed leaderboard.
+        
+        The most liked posts of the last N days fill the page until the
+        first refresh, or when too few leaderboard posts pass the filter.
+        """
         from datetime import timedelta
         
         since_date = datetime.utcnow() - timedelta(days=days)
@@ -144,11 +173,17 @@ class CRUDCommunityPost(CRUDBase):
             "is_locked": {"$ne": True}
         }
         
-        return self.get_multi(
-            limit=limit,
-            filter_dict=filter_dict,
-            sort_by="like_count"
-        )
+        posts = self.trending.get_top_documents(
+            self.collection, kind=POSTS, limit=limit, extra_filter=filter_dict
+        ) or []
+        if len(posts) < limit:
+            seen = [post["_id"] for post in posts]
+            posts += self.get_multi(
+                limit=limit - len(posts),
+                filter_dict={**filter_dict, "_id": {"$nin": seen}},
+                sort_by="like_count"
+            )
+        return posts
 
     def get_pinned_posts(self) -> List[Dict[str, Any]]:
         """Get pinned posts."""
@@ -177,36 +212,40 @@ class CRUDCommunityPost(CRUDBase):
 
     def increment_comment_count(self, *, post_id: str) -> Optional[Dict[str, Any]]:
         """Increment comment count for a post."""
-        result = self.collection.update_one(
+        post = self.collection.find_one_and_update(
             {"_id": post_id},
-            {"$inc": {"comment_count": 1}}
+            {"$inc": {"comment_count": 1}},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count > 0:
-            return self.get(post_id)
-        return None
+        if post is not None:
+            self.trending.record_activity(kind=POSTS, item_id=post_id, weight=COMMENT_WEIGHT)
+        return post
 
     def decrement_comment_count(self, *, post_id: str) -> Optional[Dict[str, Any]]:
         """Decrement comment count for a post."""
-        result = self.collection.update_one(
+        return self.collection.find_one_and_update(
             {"_id": post_id},
-            {"$inc": {"comment_count": -1}}
+            {"$inc": {"comment_count": -1}},
+            return_document=ReturnDocument.AFTER
         )
-        
-        if result.modified_count > 0:
-            return self.get(post_id)
-        return None
 
     def get_all_tags(self) -> List[str]:
         """Get all unique tags used in posts."""
+        return [facet["name"] for facet in self.get_tag_counts()]
+
+    def get_tag_counts(self) -> List[Dict[str, Any]]:
+        """Get post counts per tag from the facet counters."""
+        return self.facets.get_counts(facet=POST_TAGS, rebuild=self._aggregate_tag_counts)
+
+    def _aggregate_tag_counts(self) -> List[Dict[str, Any]]:
+        """Full scan used only to seed the tag counters."""
         pipeline = [
+            {"$project": {"tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}}},
             {"$unwind": "$tags"},
-            {"$group": {"_id": "$tags"}},
-            {"$sort": {"_id": 1}}
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}}
         ]
-        
-        results = self.aggregate(pipeline)
-        return [result["_id"] for result in results if result["_id"]]
+        return self.aggregate(pipeline)
 
 
 class CRUDCommunityComment(CRUDBase):
@@ -269,35 +308,23 @@ class CRUDCommunityComment(CRUDBase):
         author_id: str
     ) -> Optional[Dict[str, Any]]:
         """Update a comment (only by author)."""
-        # Check if comment exists and belongs to author
-        existing = self.get(comment_id)
-        if not existing or existing.get("author_id") != author_id:
-            return None
-        
         update_data = {
             "content": content,
             "is_edited": True
         }
         
-        return self.update(id=comment_id, obj_in=update_data)
+        return self.update(id=comment_id, obj_in=update_data, filter_dict={"author_id": author_id})
 
     def delete_comment(self, *, comment_id: str, author_id: str) -> bool:
         """Delete a comment (only by author)."""
-        # Check if comment exists and belongs to author
-        existing = self.get(comment_id)
-        if not existing or existing.get("author_id") != author_id:
+        deleted = self.collection.find_one_and_delete({"_id": comment_id, "author_id": author_id})
+        if deleted is None:
             return False
         
-        post_id = existing.get("post_id")
-        
-        # Delete the comment
-        if self.delete(id=comment_id):
-            # Decrement comment count on post
-            if post_id:
-                self.post_crud.decrement_comment_count(post_id=post_id)
-            return True
-        
-        return False
+        # Decrement comment count on post
+        if deleted.get("post_id"):
+            self.post_crud.decrement_comment_count(post_id=deleted["post_id"])
+        return True
 
     def get_user_comments(
         self, 
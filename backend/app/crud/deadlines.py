@@ -0,0 +1,106 @@
+"""
+Per-operation deadlines for CRUD collection access.
+
+Every CRUD class talks to MongoDB through a DeadlineCollection, which gives
+each pymongo call the deadline of its operation class (read, aggregate,
+write, bulk) from settings. Find cursors get a server-side maxTimeMS; calls
+that run a command straight away run inside pymongo.timeout(), which also
+bounds server selection and the wait for a pooled connection. An overloaded
+database then fails requests fast instead of letting them queue.
+"""
+from typing import Any, Dict, Optional
+
+import pymongo
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+
+READ = "read"
+AGGREGATE = "aggregate"
+WRITE = "write"
+BULK = "bulk"
+
+OPERATION_CLASSES = {
+    "find_one": READ,
+    "count_documents": READ,
+    "estimated_document_count": READ,
+    "distinct": READ,
+    "aggregate": AGGREGATE,
+    "insert_one": WRITE,
+    "insert_many": BULK,
+    "update_one": WRITE,
+    "update_many": BULK,
+    "replace_one": WRITE,
+    "delete_one": WRITE,
+    "delete_many": BULK,
+    "find_one_and_update": WRITE,
+    "find_one_and_replace": WRITE,
+    "find_one_and_delete": WRITE,
+    "bulk_write": BULK,
+}
+
+
+def default_deadlines_ms() -> Dict[str, int]:
+    """Operation class -> deadline in milliseconds (0 disables)."""
+    return {
+        READ: settings.MONGODB_READ_TIMEOUT_MS,
+        AGGREGATE: settings.MONGODB_AGGREGATE_TIMEOUT_MS,
+        WRITE: settings.MONGODB_WRITE_TIMEOUT_MS,
+        BULK: settings.MONGODB_BULK_TIMEOUT_MS,
+    }
+
+
+class DeadlineCollection:
+    """Collection wrapper that applies operation-class deadlines."""
+
+    def __init__(self, collection: Collection, deadlines_ms: Optional[Dict[str, int]] = None):
+        self.collection = collection
+        self.deadlines_ms = deadlines_ms if deadlines_ms is not None else default_deadlines_ms()
+
+    def find(self, *args: Any, **kwargs: Any):
+        cursor = self.collection.find(*args, **kwargs)
+        if self.deadlines_ms[READ] and "max_time_ms" not in kwargs:
+            cursor = cursor.max_time_ms(self.deadlines_ms[READ])
+        return cursor
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.collection, name)
+        operation_class = OPERATION_CLASSES.get(name)
+        if operation_class is None or not self.deadlines_ms[operation_class]:
+            return attribute
+
+        seconds = self.deadlines_ms[operation_class] / 1000
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            # Nested timeouts keep the tighter deadline
+            with pymongo.timeout(seconds):
+                return attribute(*args, **kwargs)
+
+        return call
+
+    def __getitem__(self, name: str) -> Any:
+        return self.collection[name]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, DeadlineCollection):
+            other = other.collection
+        return self.collection == other
+
+    def __hash__(self) -> int:
+        return hash(self.collection)
+
+    def __repr__(self) -> str:
+        return f"DeadlineCollection({self.collection!r})"
+
+
+def with_deadlines(collection: Collection) -> DeadlineCollection:
+    """Wrap a collection once; already wrapped collections are returned as is."""
+    if isinstance(collection, DeadlineCollection):
+        return collection
+    return DeadlineCollection(collection)
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """True for errors raised because a deadline or pool wait ran out."""
+    return isinstance(exc, PyMongoError) and exc.timeout
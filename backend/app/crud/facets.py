@@ -0,0 +1,125 @@
+"""
+Incrementally maintained facet counters (listing categories, post tags).
+
+One small document per facet value holds its count. The listing and post
+CRUD classes adjust the counters on create/update/delete, so reading all
+categories or tags costs O(#values) instead of aggregating every document.
+Reads go through a short-lived in-process cache.
+"""
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from app.config import settings
+from app.crud.base import CRUDBase
+
+LISTING_CATEGORIES = "listing_category"
+POST_TAGS = "post_tag"
+
+# (collection full name, facet) -> (expires_at, counts)
+_cache: Dict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]] = {}
+
+
+def listing_category_values(listing: Optional[Dict[str, Any]]) -> List[str]:
+    """Category counted for a listing: active listings with a category only."""
+    if not listing or not listing.get("is_active") or not listing.get("category"):
+        return []
+    return [listing["category"]]
+
+
+def post_tag_values(post: Optional[Dict[str, Any]]) -> List[str]:
+    """Distinct non-empty tags of a post."""
+    if not post:
+        return []
+    return sorted({tag for tag in post.get("tags") or [] if tag})
+
+
+class CRUDFacets(CRUDBase):
+    def __init__(self, collection: Collection):
+        super().__init__(collection)
+
+    @classmethod
+    def for_database(cls, database: Database) -> "CRUDFacets":
+        return cls(database["facets"])
+
+    def apply_change(
+        self,
+        *,
+        facet: str,
+        before: Iterable[str] = (),
+        after: Iterable[str] = ()
+    ) -> None:
+        """Move counts from the values a document had to the values it has now."""
+        delta = Counter(after)
+        delta.subtract(Counter(before))
+
+        operations = [
+            UpdateOne(
+                {"_id": f"{facet}:{value}"},
+                {"$inc": {"count": amount}, "$set": {"facet": facet, "value": value}},
+                upsert=True
+            )
+            for value, amount in delta.items()
+            if amount
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+            self._invalidate(facet)
+
+    def get_counts(
+        self,
+        *,
+        facet: str,
+        rebuild: Optional[Callable[[], List[Dict[str, Any]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """`[{"name", "count"}]` for a facet, sorted by name.
+
+        If the facet has never been built, `rebuild` is called to produce
+        the initial `{"_id": value, "count": n}` rows.
+        """
+        key = (self.collection.full_name, facet)
+        cached = _cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        if rebuild and not self.collection.find_one({"_id": f"meta:{facet}"}):
+            self.rebuild(facet=facet, rows=rebuild())
+
+        counts = [
+            {"name": doc["value"], "count": doc["count"]}
+            for doc in self.collection.find(
+                {"facet": facet, "count": {"$gt": 0}},
+                {"value": 1, "count": 1}
+            ).sort("value", 1)
+        ]
+        _cache[key] = (time.monotonic() + settings.FACET_CACHE_SECONDS, counts)
+        return counts
+
+    def rebuild(self, *, facet: str, rows: List[Dict[str, Any]]) -> None:
+        """Replace a facet's counters with freshly aggregated rows."""
+        self.collection.delete_many({"facet": facet})
+        operations = [
+            UpdateOne(
+                {"_id": f"{facet}:{row['_id']}"},
+                {"$set": {"facet": facet, "value": row["_id"], "count": row["count"]}},
+                upsert=True
+            )
+            for row in rows
+            if row["_id"]
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        self.collection.update_one(
+            {"_id": f"meta:{facet}"},
+            {"$set": {"rebuilt_at": datetime.utcnow()}},
+            upsert=True
+        )
+        self._invalidate(facet)
+
+    def _invalidate(self, facet: str) -> None:
+        _cache.pop((self.collection.full_name, facet), None)
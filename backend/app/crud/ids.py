@@ -0,0 +1,112 @@
+"""
+Document id generation.
+
+New documents get time-ordered string ids by default (UUIDv7), so inserts
+land at the right edge of the `_id` index and `_id` order follows creation
+time. Ids stay strings in the same format as the existing uuid4 ids, so old
+and new documents are looked up the same way.
+"""
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Union
+
+from bson import ObjectId
+
+from app.config import settings
+
+IdGenerator = Callable[[], str]
+
+_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+
+
+def _uuid7_from(ms: int, sequence: int, random_bits: int) -> str:
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | (sequence & 0xFFF) << 64
+        | 0b10 << 62
+        | random_bits & 0x3FFF_FFFF_FFFF_FFFF
+    )
+    return str(uuid.UUID(int=value))
+
+
+def _next_sequence(count: int) -> tuple:
+    """Reserve `count` sequence numbers; ids stay monotonic within a millisecond."""
+    global _last_ms, _sequence
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            _sequence = int.from_bytes(os.urandom(2), "big") & 0x3FF
+        if _sequence + count > 0xFFF:
+            # Sequence space for this millisecond is used up: borrow the next one
+            _last_ms += 1
+            _sequence = 0
+        start = _sequence
+        _sequence += count
+        return _last_ms, start
+
+
+def uuid7() -> str:
+    """A time-ordered UUIDv7 string (RFC 9562, 12-bit sequence counter)."""
+    ms, sequence = _next_sequence(1)
+    return _uuid7_from(ms, sequence, int.from_bytes(os.urandom(8), "big"))
+
+
+def uuid7_batch(count: int) -> List[str]:
+    ids: List[str] = []
+    while count > 0:
+        size = min(count, 0xFFF)
+        ms, start = _next_sequence(size)
+        raw = os.urandom(8 * size)
+        ids.extend(
+            _uuid7_from(ms, start + i, int.from_bytes(raw[8 * i:8 * i + 8], "big"))
+            for i in range(size)
+        )
+        count -= size
+    return ids
+
+
+def objectid_hex() -> str:
+    """An ObjectId as a 24-character hex string (time-ordered to the second)."""
+    return str(ObjectId())
+
+
+def uuid4_str() -> str:
+    """Random ids, the original behaviour."""
+    return str(uuid.uuid4())
+
+
+GENERATORS: Dict[str, IdGenerator] = {
+    "uuid7": uuid7,
+    "objectid": objectid_hex,
+    "uuid4": uuid4_str,
+}
+
+_generator: IdGenerator = GENERATORS.get(settings.ID_STRATEGY, uuid7)
+
+
+def set_id_generator(generator: Union[str, IdGenerator]) -> None:
+    """Switch the generator by name (see GENERATORS) or to a custom callable."""
+    global _generator
+    if isinstance(generator, str):
+        if generator not in GENERATORS:
+            raise ValueError(f"Unknown id strategy {generator!r}; expected one of {sorted(GENERATORS)}")
+        generator = GENERATORS[generator]
+    _generator = generator
+
+
+def new_id() -> str:
+    """Id for a new document."""
+    return _generator()
+
+
+def new_ids(count: int) -> List[str]:
+    """Ids for a batch of new documents, in generation order."""
+    if _generator is uuid7:
+        return uuid7_batch(count)
+    return [_generator() for _ in range(count)]
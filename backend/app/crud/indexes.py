@@ -0,0 +1,102 @@
+"""
+Index registry: every index the application relies on, in one place.
+
+Each entry backs a CRUD query shape (noted alongside). Indexes use the
+server's default names, so applying the registry to a database that already
+has them is a no-op. TTL indexes whose expiry comes from settings are retuned
+in place with collMod. Retention TTL indexes live with their policies in
+app.jobs.retention.
+"""
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from app.config import settings
+
+# Server error codes for "an index with this key already exists, with other options"
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+
+def registry() -> Dict[str, List[IndexModel]]:
+    """Collection name -> index models (built per call so settings apply)."""
+    return {
+        "users": [
+            IndexModel("email", unique=True),                        # login, get_by_email
+            IndexModel([("created_at", DESCENDING)]),                # get_active_users
+            IndexModel([("name", ASCENDING)]),                       # search_users (sorted by name)
+        ],
+        "listings": [
+            IndexModel([("is_active", ASCENDING), ("created_at", DESCENDING)]),  # browse, recent, category, search
+            IndexModel([("is_active", ASCENDING), ("view_count", DESCENDING)]),  # popular fallback
+            IndexModel([("owner_id", ASCENDING), ("created_at", DESCENDING)]),   # get_user_listings
+            IndexModel([("geo_location", GEOSPHERE)]),                           # get_listings_near
+        ],
+        "chats": [
+            IndexModel("participants_hash", unique=True),                             # open_chat
+            IndexModel([("participants", ASCENDING), ("last_message_at", DESCENDING)]),  # get_user_chats
+        ],
+        "messages": [
+            IndexModel([("chat_id", ASCENDING), ("created_at", ASCENDING)]),  # get_chat_messages, search_messages
+            IndexModel([("chat_id", ASCENDING), ("is_read", ASCENDING)]),     # unread counts, mark as read
+        ],
+        "community_posts": [
+            IndexModel([("created_at", DESCENDING)]),                                 # get_posts, search_posts
+            IndexModel([("tags", ASCENDING), ("created_at", DESCENDING)]),            # get_posts_by_tag
+            IndexModel([("author_id", ASCENDING), ("created_at", DESCENDING)]),       # posts by author
+            IndexModel([("is_pinned", ASCENDING), ("created_at", DESCENDING)]),       # get_pinned_posts
+            IndexModel([("like_count", DESCENDING), ("created_at", DESCENDING)]),     # popular fallback
+        ],
+        "community_comments": [
+            IndexModel([("post_id", ASCENDING), ("created_at", ASCENDING)]),     # get_post_comments
+            IndexModel([("author_id", ASCENDING), ("created_at", DESCENDING)]),  # get_user_comments
+        ],
+        "conversation_states": [
+            IndexModel("conversation_id", unique=True),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel("session_id"),
+        ],
+        "orders": [
+            IndexModel("order_id", unique=True),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel("conversation_id"),
+        ],
+        "trending_buckets": [
+            IndexModel([("kind", ASCENDING), ("item_id", ASCENDING), ("hour", ASCENDING)], unique=True),  # record_activity
+            IndexModel([("kind", ASCENDING), ("hour", ASCENDING)]),                                       # refresh
+            IndexModel("hour", expireAfterSeconds=settings.TRENDING_WINDOW_HOURS * 3600),
+        ],
+        "facets": [
+            IndexModel([("facet", ASCENDING), ("value", ASCENDING)]),  # get_counts
+        ],
+    }
+
+
+def apply_collection_indexes(collection: Collection, models: List[IndexModel]) -> List[str]:
+    """Create a collection's indexes; returns the names now in place."""
+    names = []
+    for model in models:
+        spec = model.document
+        try:
+            names.append(collection.create_indexes([model])[0])
+        except OperationFailure as exc:
+            if exc.code not in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT) or "expireAfterSeconds" not in spec:
+                raise
+            collection.database.command(
+                "collMod",
+                collection.name,
+                index={"name": spec["name"], "expireAfterSeconds": spec["expireAfterSeconds"]}
+            )
+            names.append(spec["name"])
+    return names
+
+
+def apply_indexes(database: Database) -> Dict[str, List[str]]:
+    """Apply the whole registry; safe to run repeatedly."""
+    return {
+        name: apply_collection_indexes(database[name], models)
+        for name, models in registry().items()
+    }
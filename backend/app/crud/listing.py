@@ -1,16 +1,52 @@
 """
 CRUD operations for Listing collection.
 """
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
 from app.crud.base import CRUDBase
+from app.crud.facets import CRUDFacets, LISTING_CATEGORIES, listing_category_values
+from app.crud.trending import CRUDTrending, LISTINGS
+from app.crud.versions import CRUDVersions
 from app.schemas.listing import ListingCreate, ListingUpdate
 
+DEFAULT_PRICE_EDGES = [0, 25, 50, 100, 250, 500, 1000]
+DEFAULT_COUNT_LIMIT = 10000
+
 
 class CRUDListing(CRUDBase):
+    tracks_changes = True
+
     def __init__(self, collection: Collection):
         super().__init__(collection)
+        self.trending = CRUDTrending.for_database(collection.database)
+        self.facets = CRUDFacets.for_database(collection.database)
+        self.versions = CRUDVersions.for_database(collection.database)
+
+    def _on_change(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]]
+    ) -> None:
+        """Keep the category counters in step with active listings."""
+        self._on_changes([(before, after)])
+
+    def _on_changes(
+        self,
+        changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Fold a batch of changes into one counter update and one version bump."""
+        before_values: List[str] = []
+        after_values: List[str] = []
+        changed = False
+        for before, after in changes:
+            changed = True
+            before_values.extend(listing_category_values(before))
+            after_values.extend(listing_category_values(after))
+        self.facets.apply_change(facet=LISTING_CATEGORIES, before=before_values, after=after_values)
+        if changed:
+            self.versions.bump(self.collection.name)
 
     def create_listing(self, *, listing_in: ListingCreate, owner_id: str) -> Dict[str, Any]:
         """Create a new listing."""
@@ -35,6 +71,142 @@ class CRUDListing(CRUDBase):
         max_price: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """Get active listings with optional filtering."""
+        filter_dict = self._active_filter(
+            category=category,
+            location=location,
+            min_price=min_price,
+            max_price=max_price
+        )
+        
+        return self.get_multi(
+            skip=skip, 
+            limit=limit, 
+            filter_dict=filter_dict, 
+            sort_by="created_at"
+        )
+
+    def get_listings_near(
+        self,
+        *,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        skip: int = 0,
+        limit: int = 50,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Get active listings within radius_km of a point, nearest first.
+        
+        Uses $geoNear on the geo_location 2dsphere index; each result
+        carries its distance as distance_km.
+        """
+        filter_dict = self._active_filter(
+            category=category,
+            min_price=min_price,
+            max_price=max_price
+        )
+        
+        pipeline = [
+            {
+                "$geoNear": {
+                    "near": {"type": "Point", "coordinates": [lng, lat]},
+                    "key": "geo_location",
+                    "distanceField": "distance_km",
+                    "distanceMultiplier": 0.001,
+                    "maxDistance": radius_km * 1000,
+                    "spherical": True,
+                    "query": filter_dict
+                }
+            },
+            {"$skip": skip},
+            {"$limit": min(limit, 100)}
+        ]
+        
+        return self.aggregate(pipeline)
+
+    def faceted_search(
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 50,
+        category: Optional[str] = None,
+        location: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        price_edges: Optional[List[float]] = None,
+        count_limit: int = DEFAULT_COUNT_LIMIT
+    ) -> Dict[str, Any]:
+        """Page of results, total, category counts and price histogram in one query.
+        
+        All four are computed by a single $facet aggregation over the same
+        filter. The total stops counting at count_limit, in which case
+        total_is_estimate is set.
+        """
+        filter_dict = self._active_filter(
+            category=category,
+            location=location,
+            min_price=min_price,
+            max_price=max_price
+        )
+        edges = sorted(set(price_edges or DEFAULT_PRICE_EDGES))
+        
+        facets: Dict[str, Any] = {
+            "results": [
+                {"$sort": {"created_at": -1}},
+                {"$skip": skip},
+                {"$limit": min(limit, 100)}
+            ],
+            "total": [{"$limit": count_limit}, {"$count": "count"}],
+            "categories": [
+                {"$match": {"category": {"$ne": None}}},
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ]
+        }
+        if len(edges) >= 2:
+            facets["prices"] = [
+                {
+                    "$bucket": {
+                        "groupBy": "$price",
+                        "boundaries": edges,
+                        "default": "other",
+                        "output": {"count": {"$sum": 1}}
+                    }
+                }
+            ]
+        
+        result = self.aggregate([{"$match": filter_dict}, {"$facet": facets}])[0]
+        
+        total = result["total"][0]["count"] if result["total"] else 0
+        bucket_counts = {bucket["_id"]: bucket["count"] for bucket in result.get("prices", [])}
+        price_buckets = [
+            {"min": low, "max": high, "count": bucket_counts.get(low, 0)}
+            for low, high in zip(edges, edges[1:])
+        ]
+        if bucket_counts.get("other"):
+            price_buckets.append({"min": None, "max": None, "count": bucket_counts["other"]})
+        
+        return {
+            "results": result["results"],
+            "total": total,
+            "total_is_estimate": total >= count_limit,
+            "categories": [
+                {"name": row["_id"], "count": row["count"]} for row in result["categories"]
+            ],
+            "price_buckets": price_buckets
+        }
+
+    @staticmethod
+    def _active_filter(
+        *,
+        category: Optional[str] = None,
+        location: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Build the filter shared by the active listing queries."""
         filter_dict = {"is_active": True}
         
         if category:
@@ -51,12 +223,7 @@ class CRUDListing(CRUDBase):
                 price_filter["$lte"] = max_price
             filter_dict["price"] = price_filter
         
-        return self.get_multi(
-            skip=skip, 
-            limit=limit, 
-            filter_dict=filter_dict, 
-            sort_by="created_at"
-        )
+        return filter_dict
 
     def get_user_listings(
         self, 
@@ -87,30 +254,27 @@ class CRUDListing(CRUDBase):
         owner_id: str
     ) -> Optional[Dict[str, Any]]:
         """Update a listing (only by owner)."""
-        # Check if listing exists and belongs to user
-        existing = self.get(listing_id)
-        if not existing or existing.get("owner_id") != owner_id:
-            return None
-        
-        return self.update(id=listing_id, obj_in=listing_update)
+        return self.update(id=listing_id, obj_in=listing_update, filter_dict={"owner_id": owner_id})
 
     def deactivate_listing(self, *, listing_id: str, owner_id: str) -> Optional[Dict[str, Any]]:
         """Deactivate a listing (soft delete)."""
-        # Check if listing exists and belongs to user
-        existing = self.get(listing_id)
-        if not existing or existing.get("owner_id") != owner_id:
-            return None
-        
-        return self.update(id=listing_id, obj_in={"is_active": False})
+        return self.update(
+            id=listing_id,
+            obj_in={"is_active": False},
+            filter_dict={"owner_id": owner_id}
+        )
 
     def reactivate_listing(self, *, listing_id: str, owner_id: str) -> Optional[Dict[str, Any]]:
         """Reactivate a listing."""
-        # Check if listing exists and belongs to user
-        existing = self.get(listing_id)
-        if not existing or existing.get("owner_id") != owner_id:
-            return None
-        
-        return self.update(id=listing_id, obj_in={"is_active": True})
+        return self.update(
+            id=listing_id,
+            obj_in={"is_active": True},
+            filter_dict={"owner_id": owner_id}
+        )
+
+    def delete_listing(self, *, listing_id: str, owner_id: str) -> bool:
+        """Delete a listing permanently (only by owner)."""
+        return self.delete(id=listing_id, filter_dict={"owner_id": owner_id})
 
     def search_listings(
         self, 
@@ -139,22 +303,33 @@ class CRUDListing(CRUDBase):
 
     def increment_view_count(self, *, listing_id: str) -> Optional[Dict[str, Any]]:
         """Increment the view count for a listing."""
-        result = self.collection.update_one(
+        listing = self.collection.find_one_and_update(
             {"_id": listing_id},
-            {"$inc": {"view_count": 1}}
+            {"$inc": {"view_count": 1}},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count > 0:
-            return self.get(listing_id)
-        return None
+        if listing is not None:
+            self.trending.record_activity(kind=LISTINGS, item_id=listing_id)
+        return listing
 
     def get_popular_listings(self, *, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get most viewed active listings."""
-        return self.get_multi(
-            limit=limit,
-            filter_dict={"is_active": True},
-            sort_by="view_count"
-        )
+        """Get trending active listings from the precomputed leaderboard.
+        
+        Listings sorted by view_count fill the page until the first refresh,
+        or when too few leaderboard listings are still active.
+        """
+        listings = self.trending.get_top_documents(
+            self.collection, kind=LISTINGS, limit=limit, extra_filter={"is_active": True}
+        ) or []
+        if len(listings) < limit:
+            seen = [listing["_id"] for listing in listings]
+            listings += self.get_multi(
+                limit=limit - len(listings),
+                filter_dict={"is_active": True, "_id": {"$nin": seen}},
+                sort_by="view_count"
+            )
+        return listings
 
     def get_recent_listings(self, *, limit: int = 10) -> List[Dict[str, Any]]:
         """Get most recent active listings."""
@@ -186,11 +361,19 @@ class CRUDListing(CRUDBase):
 
     def get_categories(self) -> List[str]:
         """Get all unique categories."""
+        return [facet["name"] for facet in self.get_category_counts()]
+
+    def get_category_counts(self) -> List[Dict[str, Any]]:
+        """Get active listing counts per category from the facet counters."""
+        return self.facets.get_counts(
+            facet=LISTING_CATEGORIES,
+            rebuild=self._aggregate_category_counts
+        )
+
+    def _aggregate_category_counts(self) -> List[Dict[str, Any]]:
+        """Full scan used only to seed the category counters."""
         pipeline = [
             {"$match": {"is_active": True, "category": {"$ne": None}}},
-            {"$group": {"_id": "$category"}},
-            {"$sort": {"_id": 1}}
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
         ]
-        
-        results = self.aggregate(pipeline)
-        return [result["_id"] for result in results if result["_id"]]
\ No newline at end of file
+        return self.aggregate(pipeline)
\ No newline at end of file
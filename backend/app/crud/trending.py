@@ -0,0 +1,152 @@
+"""
+Trending leaderboards for listings and community posts.
+
+Activity (listing views, new posts, comments) is counted in hourly buckets.
+A periodic refresh folds the buckets into a time-decayed score per item and
+stores the top entries as one small leaderboard document per kind, so
+"popular" reads fetch k ids instead of sorting a whole collection.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from app.config import settings
+from app.crud.base import CRUDBase
+from app.crud.deadlines import with_deadlines
+
+LISTINGS = "listings"
+POSTS = "community_posts"
+
+# A comment says more about a post than a view does about a listing
+COMMENT_WEIGHT = 2
+
+
+class CRUDTrending(CRUDBase):
+    def __init__(self, collection: Collection, leaderboards: Collection):
+        super().__init__(collection)
+        self.leaderboards = with_deadlines(leaderboards)
+
+    @classmethod
+    def for_database(cls, database: Database) -> "CRUDTrending":
+        """Build from a database handle (buckets + leaderboards collections)."""
+        return cls(database["trending_buckets"], database["leaderboards"])
+
+    def record_activity(
+        self,
+        *,
+        kind: str,
+        item_id: str,
+        weight: float = 1,
+        at: Optional[datetime] = None
+    ) -> None:
+        """Add activity for an item to its current hourly bucket."""
+        hour = (at or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        self.collection.update_one(
+            {"kind": kind, "item_id": item_id, "hour": hour},
+            {"$inc": {"count": weight}},
+            upsert=True
+        )
+
+    def refresh(
+        self,
+        *,
+        kind: str,
+        half_life_hours: Optional[float] = None,
+        window_hours: Optional[int] = None,
+        size: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Recompute the decayed scores for a kind and store its leaderboard."""
+        now = now or datetime.utcnow()
+        half_life_hours = half_life_hours or settings.TRENDING_HALF_LIFE_HOURS
+        window_hours = window_hours or settings.TRENDING_WINDOW_HOURS
+        size = size or settings.TRENDING_SIZE
+
+        half_life_ms = half_life_hours * 3600 * 1000
+        pipeline = [
+            {"$match": {"kind": kind, "hour": {"$gte": now - timedelta(hours=window_hours)}}},
+            {
+                "$group": {
+                    "_id": "$item_id",
+                    "score": {
+                        "$sum": {
+                            "$multiply": [
+                                "$count",
+                                {"$pow": [0.5, {"$divide": [{"$subtract": [now, "$hour"]}, half_life_ms]}]}
+                            ]
+                        }
+                    }
+                }
+            },
+            {"$sort": {"score": DESCENDING}},
+            {"$limit": size}
+        ]
+        entries = [
+            {"item_id": result["_id"], "score": round(result["score"], 4)}
+            for result in self.aggregate(pipeline)
+        ]
+
+        return self.leaderboards.find_one_and_update(
+            {"_id": f"trending:{kind}"},
+            {"$set": {"entries": entries, "refreshed_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def get_top_ids(self, *, kind: str, limit: int, skip: int = 0) -> Optional[List[str]]:
+        """Top item ids for a kind, or None if no leaderboard has been built yet."""
+        board = self.leaderboards.find_one(
+            {"_id": f"trending:{kind}"},
+            {"entries": {"$slice": [skip, limit]}}
+        )
+        if board is None:
+            return None
+        return [entry["item_id"] for entry in board.get("entries", [])]
+
+    def get_top_documents(
+        self,
+        collection: Collection,
+        *,
+        kind: str,
+        limit: int,
+        extra_filter: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Top documents of a kind that pass `extra_filter`, in rank order.
+
+        Pages through the leaderboard until `limit` documents survive the
+        filter or the board runs out, so the result is short only when the
+        whole board is. None if no leaderboard has been built yet.
+        """
+        page_size = limit * 2
+        documents: List[Dict[str, Any]] = []
+        skip = 0
+        while len(documents) < limit:
+            ids = self.get_top_ids(kind=kind, limit=page_size, skip=skip)
+            if ids is None:
+                return None
+            documents.extend(fetch_in_rank_order(collection, ids, extra_filter))
+            if len(ids) < page_size:
+                break
+            skip += page_size
+        return documents[:limit]
+
+    def refresh_all(self) -> None:
+        """Refresh every leaderboard."""
+        for kind in (LISTINGS, POSTS):
+            self.refresh(kind=kind)
+
+
+def fetch_in_rank_order(
+    collection: Collection,
+    ids: List[str],
+    extra_filter: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Fetch documents by id and return them in the order of `ids`."""
+    query: Dict[str, Any] = {"_id": {"$in": ids}}
+    if extra_filter:
+        query.update(extra_filter)
+    documents = {document["_id"]: document for document in collection.find(query)}
+    return [documents[doc_id] for doc_id in ids if doc_id in documents]
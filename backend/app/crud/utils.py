@@ -6,81 +6,31 @@ from typing import Any, Dict, List, Optional, Union
 from pymongo.collection import Collection
 from pymongo import ASCENDING, DESCENDING
 
+from app.crud.community import CRUDCommunityPost
+from app.crud.ids import new_id
+from app.crud.indexes import apply_collection_indexes, registry
+from app.crud.listing import CRUDListing
+from app.jobs.collection_io import export_collection, import_collection
+from app.jobs.migrate import run_migration
+from app.jobs.retention import RetentionPolicy, sweep
+
 
 class DatabaseUtils:
     """Utility class for common database operations."""
     
     @staticmethod
     def create_indexes(collections: Dict[str, Collection]) -> Dict[str, List[str]]:
-        """Create recommended indexes for all collections."""
+        """Create the registered indexes (app.crud.indexes) for the given collections."""
         index_results = {}
+        indexes = registry()
         
-        try:
-            # Users collection indexes
-            users = collections.get("users")
-            if users:
-                user_indexes = []
-                user_indexes.append(users.create_index("email", unique=True))
-                user_indexes.append(users.create_index("created_at"))
-                user_indexes.append(users.create_index([("name", "text"), ("email", "text")]))
-                index_results["users"] = user_indexes
-            
-            # Listings collection indexes
-            listings = collections.get("listings")
-            if listings:
-                listing_indexes = []
-                listing_indexes.append(listings.create_index([("is_active", 1), ("created_at", -1)]))
-                listing_indexes.append(listings.create_index("owner_id"))
-                listing_indexes.append(listings.create_index("category"))
-                listing_indexes.append(listings.create_index("location"))
-                listing_indexes.append(listings.create_index([("price", 1)]))
-                listing_indexes.append(listings.create_index([("title", "text"), ("description", "text")]))
-                listing_indexes.append(listings.create_index("view_count"))
-                index_results["listings"] = listing_indexes
-            
-            # Chats collection indexes
-            chats = collections.get("chats")
-            if chats:
-                chat_indexes = []
-                chat_indexes.append(chats.create_index("participants_hash", unique=True))
-                chat_indexes.append(chats.create_index("participants"))
-                chat_indexes.append(chats.create_index("last_message_at"))
-                index_results["chats"] = chat_indexes
-            
-            # Messages collection indexes
-            messages = collections.get("messages")
-            if messages:
-                message_indexes = []
-                message_indexes.append(messages.create_index([("chat_id", 1), ("created_at", 1)]))
-                message_indexes.append(messages.create_index("sender_id"))
-                message_indexes.append(messages.create_index([("chat_id", 1), ("is_read", 1)]))
-                message_indexes.append(messages.create_index([("content", "text")]))
-                index_results["messages"] = message_indexes
-            
-            # Community posts collection indexes
-            community_posts = collections.get("community_posts")
-            if community_posts:
-                post_indexes = []
-                post_indexes.append(community_posts.create_index([("created_at", -1)]))
-                post_indexes.append(community_posts.create_index("author_id"))
-                post_indexes.append(community_posts.create_index("tags"))
-                post_indexes.append(community_posts.create_index("like_count"))
-                post_indexes.append(community_posts.create_index([("title", "text"), ("content", "text")]))
-                post_indexes.append(community_posts.create_index("is_pinned"))
-                post_indexes.append(community_posts.create_index("is_locked"))
-                index_results["community_posts"] = post_indexes
-            
-            # Community comments collection indexes
-            community_comments = collections.get("community_comments")
-            if community_comments:
-                comment_indexes = []
-                comment_indexes.append(community_comments.create_index([("post_id", 1), ("created_at", 1)]))
-                comment_indexes.append(community_comments.create_index("author_id"))
-                comment_indexes.append(community_comments.create_index([("content", "text")]))
-                index_results["community_comments"] = comment_indexes
-                
-        except Exception as e:
-            print(f"Index creation error: {e}")
+        for name, collection in collections.items():
+            if name not in indexes:
+                continue
+            try:
+                index_results[name] = apply_collection_indexes(collection, indexes[name])
+            except Exception as e:
+                print(f"Index creation error on {name}: {e}")
         
         return index_results
     
@@ -89,27 +39,22 @@ class DatabaseUtils:
         collections: Dict[str, Collection], 
         days_to_keep: int = 365
     ) -> Dict[str, int]:
-        """Clean up old data from collections."""
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+        """Clean up old inactive listings in small rate-limited batches.
+        
+        Scheduled retention for all collections runs from app.jobs.retention.
+        """
         cleanup_results = {}
         
         try:
-            # Clean up old inactive listings
             listings = collections.get("listings")
-            if listings:
-                result = listings.delete_many({
-                    "is_active": False,
-                    "updated_at": {"$lt": cutoff_date}
-                })
-                cleanup_results["old_listings"] = result.deleted_count
-            
-            # Clean up old messages (optional - be careful with this)
-            # messages = collections.get("messages")
-            # if messages:
-            #     result = messages.delete_many({
-            #         "created_at": {"$lt": cutoff_date}
-            #     })
-            #     cleanup_results["old_messages"] = result.deleted_count
+            if listings is not None:
+                policy = RetentionPolicy(
+                    collection="listings",
+                    field="updated_at",
+                    days=days_to_keep,
+                    filter={"is_active": False}
+                )
+                cleanup_results["old_listings"] = sweep(listings, policy)
             
         except Exception as e:
             print(f"Cleanup error: {e}")
@@ -129,7 +74,7 @@ class DatabaseUtils:
                 # Get some basic aggregation stats
                 if name == "listings":
                     active_count = collection.count_documents({"is_active": True})
-                    categories = list(collection.distinct("category", {"is_active": True}))
+                    categories = CRUDListing(collection).get_categories()
                     
                     stats[name] = {
                         "total_count": count,
@@ -152,7 +97,7 @@ class DatabaseUtils:
                     recent_posts = collection.count_documents({
                         "created_at": {"$gte": datetime.utcnow() - timedelta(days=30)}
                     })
-                    tags = list(collection.distinct("tags"))
+                    tags = CRUDCommunityPost(collection).get_all_tags()
                     
                     stats[name] = {
                         "total_count": count,
@@ -174,58 +119,61 @@ class DatabaseUtils:
     @staticmethod
     def backup_collection_data(
         collection: Collection, 
-        filter_query: Optional[Dict] = None
-    ) -> List[Dict]:
-        """Backup collection data to a list."""
-        query = filter_query or {}
-        return list(collection.find(query))
+        directory: str,
+        filter_query: Optional[Dict] = None,
+        fmt: str = "ndjson"
+    ) -> Dict[str, Any]:
+        """Stream collection data to compressed segment files in `directory`.
+        
+        Returns the export manifest (segments and throughput stats).
+        """
+        return export_collection(collection, directory, query=filter_query, fmt=fmt)
     
     @staticmethod
     def restore_collection_data(
         collection: Collection, 
-        data: List[Dict], 
+        directory: str, 
         clear_existing: bool = False
     ) -> int:
-        """Restore collection data from a list."""
+        """Restore collection data from a backup directory; resumes if interrupted."""
         if clear_existing:
             collection.delete_many({})
         
-        if data:
-            result = collection.insert_many(data)
-            return len(result.inserted_ids)
-        
-        return 0
+        stats = import_collection(collection, directory, resume=not clear_existing)
+        return stats["inserted"]
     
     @staticmethod
     def migrate_data(
         source_collection: Collection,
         target_collection: Collection,
         transformation_func: Optional[callable] = None,
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        name: Optional[str] = None,
+        workers: int = 1,
+        resume: bool = False
     ) -> int:
-        """Migrate data between collections with optional transformation."""
-        migrated_count = 0
-        
-        cursor = source_collection.find().batch_size(batch_size)
-        
-        batch = []
-        for document in cursor:
-            if transformation_func:
-                document = transformation_func(document)
-            
-            batch.append(document)
-            
-            if len(batch) >= batch_size:
-                target_collection.insert_many(batch)
-                migrated_count += len(batch)
-                batch = []
-        
-        # Insert remaining documents
-        if batch:
-            target_collection.insert_many(batch)
-            migrated_count += len(batch)
+        """Migrate data between collections with optional transformation.
         
-        return migrated_count
+        Runs the range-based migration engine in this process; calling again
+        with the same `name` resumes from the recorded checkpoints. Without a
+        name every call is a fresh run, unless `resume` asks to pick up the
+        last resumable run between the same two collections. Pass `workers`
+        > 1 to copy ranges in parallel processes, which needs a picklable
+        module-level `transformation_func`.
+        """
+        if name is None:
+            name = f"{source_collection.full_name}->{target_collection.full_name}"
+            if not resume:
+                name = f"{name}:{new_id()}"
+        stats = run_migration(
+            source_collection,
+            target_collection,
+            transformation_func,
+            name=name,
+            workers=workers,
+            batch_size=batch_size
+        )
+        return stats["written"]
 
 
 class QueryBuilder:
@@ -0,0 +1,54 @@
+"""
+Per-collection version counters, used as HTTP validators for list endpoints.
+
+The listing and post CRUD classes bump the counter of their collection on
+every write that can change a public list (create, update, delete). A list
+route builds its weak ETag from the counter and its Last-Modified from the
+time of the last bump, so a conditional GET costs one `_id` lookup instead
+of the list query and its serialization.
+
+Each counter document gets a random epoch when it is created: if the
+counters are dropped, versions start over under a new epoch and never
+repeat an ETag a client may still hold. Writes that bypass the CRUD classes
+do not bump the counter.
+"""
+from datetime import datetime
+from typing import Any, Dict
+
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from app.crud.base import CRUDBase
+from app.crud.ids import new_id
+
+
+class CRUDVersions(CRUDBase):
+    def __init__(self, collection: Collection):
+        super().__init__(collection)
+
+    @classmethod
+    def for_database(cls, database: Database) -> "CRUDVersions":
+        return cls(database["collection_versions"])
+
+    def bump(self, name: str) -> None:
+        self.collection.update_one(
+            {"_id": name},
+            {
+                "$inc": {"version": 1},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$setOnInsert": {"epoch": new_id()},
+            },
+            upsert=True
+        )
+
+    def current(self, name: str) -> Dict[str, Any]:
+        """`{"epoch", "version", "updated_at"}` of a collection, created on first use."""
+        counter = self.collection.find_one({"_id": name})
+        if counter is None:
+            self.collection.update_one(
+                {"_id": name},
+                {"$setOnInsert": {"epoch": new_id(), "version": 0, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+            counter = self.collection.find_one({"_id": name})
+        return counter
@@ -1,6 +1,9 @@
+import hmac
+
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
+from app.config import settings
 from app.core.security import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -26,3 +29,19 @@ async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)
 
     user.pop("hashed_password", None)
     return user
+
+
+def has_admin_token(token: str) -> bool:
+    """Whether `token` matches ADMIN_TOKEN (always False when none is configured)."""
+    if not settings.ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+async def require_admin(request: Request):
+    """Gate operational endpoints behind the X-Admin-Token header."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not has_admin_token(request.headers.get("X-Admin-Token", "")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
@@ -0,0 +1,3 @@
+"""
+One-off and scheduled maintenance jobs, runnable with `python -m app.jobs.<name>`.
+"""
@@ -0,0 +1,134 @@
+"""
+Backfill listing geo_location from the free-text location field.
+
+Resolves each listing's `location` string against a local gazetteer CSV
+(`name,lat,lng`) and stores the match as a GeoJSON point, so listings
+created before geo support show up in `near=` searches.
+
+Usage:
+    python -m app.jobs.backfill_listing_geo [--gazetteer PATH] [--dry-run]
+"""
+import argparse
+import csv
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.collection import Collection
+
+from app.config import settings
+from app.crud.versions import CRUDVersions
+
+DEFAULT_GAZETTEER = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.csv"
+)
+
+Gazetteer = Dict[str, Tuple[float, float]]
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def load_gazetteer(path: str = DEFAULT_GAZETTEER) -> Gazetteer:
+    """Load `name,lat,lng` rows keyed by normalized place name."""
+    gazetteer: Gazetteer = {}
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            gazetteer[_normalize(row["name"])] = (float(row["lat"]), float(row["lng"]))
+    return gazetteer
+
+
+def geocode(location: str, gazetteer: Gazetteer) -> Optional[Tuple[float, float]]:
+    """Match the full string first, then each comma-separated part."""
+    candidates = [location] + location.split(",")
+    for candidate in candidates:
+        match = gazetteer.get(_normalize(candidate))
+        if match:
+            return match
+    return None
+
+
+def backfill(
+    collection: Collection,
+    gazetteer: Gazetteer,
+    batch_size: int = 500,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """Geocode listings that have a location string but no geo_location.
+
+    Updated listings get a fresh updated_at, and the listings collection
+    version is bumped once at the end so cached pages and ETags move on.
+    """
+    now = datetime.utcnow()
+    stats = {"scanned": 0, "matched": 0, "unmatched": 0, "updated": 0}
+    cursor = collection.find(
+        {"location": {"$type": "string"}, "geo_location": None},
+        {"location": 1},
+    ).batch_size(batch_size)
+
+    operations: List[UpdateOne] = []
+    for document in cursor:
+        stats["scanned"] += 1
+        match = geocode(document["location"], gazetteer)
+        if not match:
+            stats["unmatched"] += 1
+            continue
+
+        stats["matched"] += 1
+        lat, lng = match
+        operations.append(UpdateOne(
+            {"_id": document["_id"], "geo_location": None},
+            {"$set": {
+                "geo_location": {"type": "Point", "coordinates": [lng, lat]},
+                "updated_at": now,
+            }},
+        ))
+
+        if len(operations) >= batch_size:
+            stats["updated"] += _flush(collection, operations, dry_run)
+            operations = []
+
+    if operations:
+        stats["updated"] += _flush(collection, operations, dry_run)
+
+    if stats["updated"]:
+        CRUDVersions.for_database(collection.database).bump(collection.name)
+    return stats
+
+
+def _flush(collection: Collection, operations: List[UpdateOne], dry_run: bool) -> int:
+    if dry_run:
+        return 0
+    result = collection.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--gazetteer", default=DEFAULT_GAZETTEER)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.get_mongodb_connection_string())
+    try:
+        listings = client[settings.MONGODB_DATABASE]["listings"]
+        stats = backfill(
+            listings,
+            load_gazetteer(args.gazetteer),
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+    finally:
+        client.close()
+
+    print(
+        f"Scanned {stats['scanned']} listings: {stats['matched']} matched, "
+        f"{stats['unmatched']} unmatched, {stats['updated']} updated"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Streaming collection export/import.
+
+Export reads a collection through a batched cursor and writes gzip-compressed
+segment files (NDJSON in MongoDB extended JSON, or raw BSON), so memory use is
+bounded by one batch regardless of collection size. Import replays the
+segments with unordered batched insert_many and records a checkpoint after
+every batch, so an interrupted restore resumes where it stopped. A checkpoint
+belongs to one export (its manifest's `exported_at`); exporting again into
+the same directory removes the old manifest, segments and checkpoint.
+
+Usage:
+    python -m app.jobs.collection_io export --collection messages --dir /backups/messages
+    python -m app.jobs.collection_io import --collection messages --dir /backups/messages [--no-resume]
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+
+FORMATS = ("ndjson", "bson")
+MANIFEST = "manifest.json"
+CHECKPOINT = "import-checkpoint.json"
+DUPLICATE_KEY = 11000
+
+
+def _segment_name(collection_name: str, index: int, fmt: str) -> str:
+    return f"{collection_name}-{index:05d}.{fmt}.gz"
+
+
+def _clear_previous_export(collection_name: str, directory: str) -> None:
+    """Remove an earlier export's files so none of them outlive the new manifest."""
+    segment = re.compile(rf"{re.escape(collection_name)}-\d{{5}}\.({'|'.join(FORMATS)})\.gz")
+    for name in os.listdir(directory):
+        if name in (MANIFEST, CHECKPOINT, f"{CHECKPOINT}.tmp") or segment.fullmatch(name):
+            os.remove(os.path.join(directory, name))
+
+
+def _throughput(docs: int, raw_bytes: int, started: float) -> Dict[str, float]:
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return {
+        "documents": docs,
+        "bytes": raw_bytes,
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(docs / elapsed, 1),
+        "mb_per_second": round(raw_bytes / elapsed / 1_000_000, 2),
+    }
+
+
+def export_collection(
+    collection: Collection,
+    directory: str,
+    *,
+    query: Optional[Dict[str, Any]] = None,
+    fmt: str = "ndjson",
+    batch_size: int = 1000,
+    segment_docs: int = 100_000,
+    compresslevel: int = 6
+) -> Dict[str, Any]:
+    """Stream a collection into compressed segment files plus a manifest."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    os.makedirs(directory, exist_ok=True)
+    _clear_previous_export(collection.name, directory)
+
+    # Raw documents skip decoding entirely on the BSON path
+    source = collection
+    if fmt == "bson":
+        source = collection.with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument)
+        )
+    cursor = source.find(query or {}).sort("_id", 1).batch_size(batch_size)
+
+    started = time.perf_counter()
+    segments: List[Dict[str, Any]] = []
+    total_docs = total_bytes = 0
+    handle = None
+
+    try:
+        for document in cursor:
+            if handle is None or segments[-1]["documents"] >= segment_docs:
+                if handle is not None:
+                    handle.close()
+                name = _segment_name(collection.name, len(segments), fmt)
+                handle = gzip.open(os.path.join(directory, name), "wb", compresslevel=compresslevel)
+                segments.append({"file": name, "documents": 0, "bytes": 0})
+
+            if fmt == "bson":
+                data = document.raw
+            else:
+                data = json_util.dumps(
+                    document, json_options=json_util.CANONICAL_JSON_OPTIONS
+                ).encode("utf-8") + b"\n"
+
+            handle.write(data)
+            segments[-1]["documents"] += 1
+            segments[-1]["bytes"] += len(data)
+            total_docs += 1
+            total_bytes += len(data)
+    finally:
+        if handle is not None:
+            handle.close()
+
+    manifest = {
+        "collection": collection.name,
+        "format": fmt,
+        "query": json_util.dumps(query or {}),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "segments": segments,
+        "stats": _throughput(total_docs, total_bytes, started),
+    }
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+def _read_segment(path: str, fmt: str) -> Iterator[tuple]:
+    """Yield (document, raw_size) pairs from one segment file."""
+    with gzip.open(path, "rb") as handle:
+        if fmt == "bson":
+            while True:
+                header = handle.read(4)
+                if not header:
+                    return
+                size = int.from_bytes(header, "little")
+                raw = header + handle.read(size - 4)
+                yield RawBSONDocument(raw), size
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json_util.loads(line), len(line)
+
+
+def _load_checkpoint(path: str, exported_at: str) -> Dict[str, Any]:
+    """The checkpoint for this export, or a fresh one if it belongs to another."""
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as handle:
+            checkpoint = json.load(handle)
+        if checkpoint.get("exported_at") == exported_at:
+            return checkpoint
+    return {"exported_at": exported_at, "completed": [], "current": None, "offset": 0}
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    # Write-then-rename so a crash never leaves a torn checkpoint
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(checkpoint, handle)
+    os.replace(temp_path, path)
+
+
+def _insert_batch(collection: Collection, batch: List[Any]) -> Dict[str, int]:
+    """Unordered insert; duplicates (already restored) are not failures."""
+    try:
+        result = collection.insert_many(batch, ordered=False)
+        return {"inserted": len(result.inserted_ids), "duplicates": 0, "failed": 0}
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        duplicates = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY)
+        return {
+            "inserted": exc.details.get("nInserted", 0),
+            "duplicates": duplicates,
+            "failed": len(errors) - duplicates,
+        }
+
+
+def import_collection(
+    collection: Collection,
+    directory: str,
+    *,
+    batch_size: int = 1000,
+    resume: bool = True
+) -> Dict[str, Any]:
+    """Stream segment files back into a collection with resumable checkpoints."""
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    fmt = manifest["format"]
+
+    checkpoint_path = os.path.join(directory, CHECKPOINT)
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = _load_checkpoint(checkpoint_path, manifest["exported_at"])
+
+    started = time.perf_counter()
+    counts = {"inserted": 0, "duplicates": 0, "failed": 0}
+    total_docs = total_bytes = 0
+
+    for segment in manifest["segments"]:
+        name = segment["file"]
+        if name in checkpoint["completed"]:
+            continue
+        skip = checkpoint["offset"] if checkpoint["current"] == name else 0
+        checkpoint.update({"current": name, "offset": skip})
+
+        batch: List[Any] = []
+        position = 0
+        for document, size in _read_segment(os.path.join(directory, name), fmt):
+            position += 1
+            if position <= skip:
+                continue
+            batch.append(document)
+            total_docs += 1
+            total_bytes += size
+            if len(batch) >= batch_size:
+                for key, value in _insert_batch(collection, batch).items():
+                    counts[key] += value
+                batch = []
+                checkpoint["offset"] = position
+                _save_checkpoint(checkpoint_path, checkpoint)
+
+        if batch:
+            for key, value in _insert_batch(collection, batch).items():
+                counts[key] += value
+
+        checkpoint["completed"].append(name)
+        checkpoint.update({"current": None, "offset": 0})
+        _save_checkpoint(checkpoint_path, checkpoint)
+
+    stats = _throughput(total_docs, total_bytes, started)
+    stats.update(counts)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming collection export/import")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--collection", required=True)
+    export_parser.add_argument("--dir", required=True)
+    export_parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    export_parser.add_argument("--query", default="{}", help="Filter in MongoDB extended JSON")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser.add_argument("--segment-docs", type=int, default=100_000)
+
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument("--collection", required=True)
+    import_parser.add_argument("--dir", required=True)
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.add_argument(
+        "--no-resume", dest="resume", action="store_false",
+        help="Ignore any existing checkpoint and start over"
+    )
+
+    args = parser.parse_args()
+    client = MongoClient(settings.get_mongodb_connection_string())
+    try:
+        collection = client[settings.MONGODB_DATABASE][args.collection]
+        if args.command == "export":
+            manifest = export_collection(
+                collection,
+                args.dir,
+                query=json_util.loads(args.query),
+                fmt=args.format,
+                batch_size=args.batch_size,
+                segment_docs=args.segment_docs,
+            )
+            stats = manifest["stats"]
+            print(f"Exported {len(manifest['segments'])} segment(s) to {args.dir}")
+        else:
+            stats = import_collection(
+                collection, args.dir, batch_size=args.batch_size, resume=args.resume
+            )
+            print(
+                f"Imported {stats['inserted']} documents "
+                f"({stats['duplicates']} already present, {stats['failed']} failed)"
+            )
+    finally:
+        client.close()
+
+    print(
+        f"{stats['documents']} docs, {stats['bytes'] / 1_000_000:.1f} MB in {stats['seconds']}s: "
+        f"{stats['docs_per_second']} docs/s, {stats['mb_per_second']} MB/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Parallel, resumable collection migration.
+
+The source collection is split into `_id` ranges. Each range is read in
+batches, transformed, and written with unordered upserting bulk ops, so one
+bad document never aborts a batch and re-running a range is idempotent.
+After every batch the last `_id` finished is recorded in
+`migration_checkpoints`; re-running a migration with the same name resumes
+every range from its checkpoint. Ranges run one at a time unless --workers
+asks for parallel processes.
+
+Usage:
+    python -m app.jobs.migrate --name listings-v2 --source listings --target listings_v2 \
+        [--transform package.module:function] [--parts 16] [--workers 4]
+"""
+import argparse
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import MongoClient, ReplaceOne, ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+
+CHECKPOINTS = "migration_checkpoints"
+# Errors kept per range so a bad migration doesn't bloat its checkpoint
+MAX_RECORDED_ERRORS = 20
+
+# Client options that hold live objects and can't be sent to a worker process
+UNPICKLABLE_CLIENT_ARGS = ("connect", "event_listeners", "server_selector", "type_registry")
+
+Transform = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def plan_ranges(
+    collection: Collection,
+    parts: int,
+    query: Optional[Dict[str, Any]] = None
+) -> List[Tuple[Any, Any]]:
+    """Split a collection into at most `parts` contiguous `_id` ranges.
+
+    Ranges are half-open `[low, high)`; None means unbounded on that side.
+    """
+    query = query or {}
+    total = collection.count_documents(query)
+    step = max(1, -(-total // max(parts, 1)))
+
+    bounds = []
+    for offset in range(step, total, step):
+        boundary = list(
+            collection.find(query, {"_id": 1}).sort("_id", 1).skip(offset).limit(1)
+        )
+        if boundary:
+            bounds.append(boundary[0]["_id"])
+
+    edges = [None] + bounds + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def _range_filter(
+    query: Dict[str, Any],
+    low: Any,
+    high: Any,
+    after: Any = None
+) -> Dict[str, Any]:
+    id_filter: Dict[str, Any] = {}
+    if after is not None:
+        id_filter["$gt"] = after
+    elif low is not None:
+        id_filter["$gte"] = low
+    if high is not None:
+        id_filter["$lt"] = high
+
+    range_query = dict(query)
+    if id_filter:
+        range_query["_id"] = id_filter
+    return range_query
+
+
+def _flush(
+    target: Collection,
+    checkpoints: Collection,
+    key: str,
+    batch: List[Dict[str, Any]],
+    transform: Optional[Transform]
+) -> None:
+    errors: List[Dict[str, Any]] = []
+    operations = []
+    for document in batch:
+        original_id = document["_id"]
+        try:
+            new_document = transform(document) if transform else document
+        except Exception as e:
+            errors.append({"_id": original_id, "error": f"transform: {e}"})
+            continue
+        if new_document is None:
+            continue
+        new_document.setdefault("_id", original_id)
+        operations.append(ReplaceOne({"_id": new_document["_id"]}, new_document, upsert=True))
+
+    written = len(operations)
+    if operations:
+        try:
+            target.bulk_write(operations, ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors", [])
+            written -= len(write_errors)
+            errors.extend(
+                {"_id": error.get("op", {}).get("_id"), "error": error.get("errmsg")}
+                for error in write_errors
+            )
+
+    update: Dict[str, Any] = {
+        "$set": {"last_id": batch[-1]["_id"], "updated_at": datetime.utcnow()},
+        "$inc": {"processed": len(batch), "written": written, "failed": len(errors)},
+    }
+    if errors:
+        update["$push"] = {"errors": {"$each": errors, "$slice": -MAX_RECORDED_ERRORS}}
+    checkpoints.update_one({"_id": key}, update, upsert=True)
+
+
+def copy_range(
+    source: Collection,
+    target: Collection,
+    checkpoints: Collection,
+    *,
+    name: str,
+    index: int,
+    low: Any,
+    high: Any,
+    query: Optional[Dict[str, Any]] = None,
+    transform: Optional[Transform] = None,
+    batch_size: int = 1000
+) -> Dict[str, Any]:
+    """Copy one `_id` range, resuming after its last checkpointed `_id`."""
+    key = f"{name}:{index}"
+    state = checkpoints.find_one({"_id": key}) or {}
+    if state.get("done"):
+        return state
+
+    checkpoints.update_one(
+        {"_id": key},
+        {"$set": {"migration": name, "range": index}},
+        upsert=True
+    )
+    cursor = source.find(
+        _range_filter(query or {}, low, high, state.get("last_id"))
+    ).sort("_id", 1).batch_size(batch_size)
+
+    batch: List[Dict[str, Any]] = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            _flush(target, checkpoints, key, batch, transform)
+            batch = []
+    if batch:
+        _flush(target, checkpoints, key, batch, transform)
+
+    return checkpoints.find_one_and_update(
+        {"_id": key},
+        {"$set": {"done": True, "finished_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def connection_args(client: MongoClient) -> Dict[str, Any]:
+    """Arguments that connect a worker process to the same deployment as `client`."""
+    # pymongo keeps the constructor arguments (they back its repr); listeners and
+    # other live objects stay behind, a worker's client doesn't need them
+    init_kwargs = getattr(client, "_MongoClient__init_kwargs", None)
+    if not init_kwargs:
+        raise ValueError("Cannot tell where this client connects; pass mongo_url to use workers > 1")
+    return {
+        key: value
+        for key, value in init_kwargs.items()
+        if value is not None and key not in UNPICKLABLE_CLIENT_ARGS
+    }
+
+
+def _copy_range_in_worker(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool entry point: each worker opens its own client."""
+    client = MongoClient(**task.pop("connection"))
+    try:
+        source_db, source_name = task.pop("source")
+        target_db, target_name = task.pop("target")
+        return copy_range(
+            client[source_db][source_name],
+            client[target_db][target_name],
+            client[target_db][CHECKPOINTS],
+            **task
+        )
+    finally:
+        client.close()
+
+
+def _progress(
+    checkpoints: Collection,
+    name: str,
+    total: int,
+    baseline: int,
+    started: float
+) -> Dict[str, Any]:
+    totals = {"processed": 0, "written": 0, "failed": 0, "done": 0}
+    for state in checkpoints.find({"migration": name, "range": {"$exists": True}}):
+        for field in ("processed", "written", "failed"):
+            totals[field] += state.get(field, 0)
+        totals["done"] += 1 if state.get("done") else 0
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    rate = (totals["processed"] - baseline) / elapsed
+    remaining = max(total - totals["processed"], 0)
+    totals.update({
+        "total": total,
+        "seconds": round(elapsed, 1),
+        "docs_per_second": round(rate, 1),
+        "eta_seconds": round(remaining / rate, 1) if rate > 0 else None,
+    })
+    return totals
+
+
+def run_migration(
+    source: Collection,
+    target: Collection,
+    transform: Optional[Transform] = None,
+    *,
+    name: str,
+    query: Optional[Dict[str, Any]] = None,
+    parts: int = 16,
+    workers: int = 1,
+    batch_size: int = 1000,
+    mongo_url: Optional[str] = None,
+    progress_interval: float = 5.0,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """Migrate `source` into `target`, resuming a previous run with the same name.
+
+    Ranges run one after another in this process by default. With
+    `workers` > 1 they run in separate processes that connect like the
+    client of `source` (or with `mongo_url`), so `transform` must be a
+    picklable module-level function.
+    """
+    query = query or {}
+    checkpoints = target.database[CHECKPOINTS]
+    plan_key = f"{name}:plan"
+
+    # The plan is stored so a resumed run uses the same range boundaries
+    plan = checkpoints.find_one({"_id": plan_key})
+    if plan is None:
+        plan = {
+            "_id": plan_key,
+            "source": source.full_name,
+            "target": target.full_name,
+            "total": source.count_documents(query),
+            "ranges": [list(bounds) for bounds in plan_ranges(source, parts, query)],
+            "created_at": datetime.utcnow(),
+        }
+        checkpoints.insert_one(plan)
+
+    started = time.perf_counter()
+    baseline = _progress(checkpoints, name, plan["total"], 0, started)["processed"]
+    tasks = [
+        {
+            "name": name,
+            "index": index,
+            "low": low,
+            "high": high,
+            "query": query,
+            "transform": transform,
+            "batch_size": batch_size,
+        }
+        for index, (low, high) in enumerate(plan["ranges"])
+    ]
+
+    if workers <= 1:
+        for task in tasks:
+            copy_range(source, target, checkpoints, **task)
+            if on_progress:
+                on_progress(_progress(checkpoints, name, plan["total"], baseline, started))
+    else:
+        # Spawn rather than fork: MongoClient is not fork-safe
+        context = multiprocessing.get_context("spawn")
+        connection = {"host": mongo_url} if mongo_url else connection_args(source.database.client)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending = {
+                pool.submit(_copy_range_in_worker, {
+                    **task,
+                    "connection": connection,
+                    "source": (source.database.name, source.name),
+                    "target": (target.database.name, target.name),
+                })
+                for task in tasks
+            }
+            while pending:
+                finished, pending = wait(pending, timeout=progress_interval, return_when=FIRST_EXCEPTION)
+                for future in finished:
+                    future.result()
+                if on_progress:
+                    on_progress(_progress(checkpoints, name, plan["total"], baseline, started))
+
+    return _progress(checkpoints, name, plan["total"], baseline, started)
+
+
+def load_transform(path: Optional[str]) -> Optional[Transform]:
+    """Resolve a `package.module:function` transformation."""
+    if not path:
+        return None
+    module_name, _, function_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def _print_progress(stats: Dict[str, Any]) -> None:
+    eta = f"{stats['eta_seconds']}s" if stats["eta_seconds"] is not None else "?"
+    print(
+        f"{stats['processed']}/{stats['total']} docs, {stats['failed']} failed, "
+        f"{stats['docs_per_second']} docs/s, ETA {eta}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--name", required=True, help="Migration name; re-use it to resume")
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--transform", help="package.module:function applied to each document")
+    parser.add_argument("--parts", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="Processes copying ranges in parallel")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = MongoClient(settings.get_mongodb_connection_string())
+    try:
+        database = client[settings.MONGODB_DATABASE]
+        stats = run_migration(
+            database[args.source],
+            database[args.target],
+            load_transform(args.transform),
+            name=args.name,
+            parts=args.parts,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            on_progress=_print_progress,
+        )
+    finally:
+        client.close()
+
+    print(
+        f"Migrated {stats['written']} of {stats['total']} documents "
+        f"({stats['failed']} failed) in {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
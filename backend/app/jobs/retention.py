@@ -0,0 +1,201 @@
+"""
+Data retention for listings, messages, conversation states and orders.
+
+Where a rule can be expressed as "delete N seconds after a date field",
+the policy is enforced by a MongoDB TTL index and the server does the work.
+The remaining policies are swept in small `_id`-ordered batches with a
+deletes-per-second cap and a pause between batches, so a large backlog
+never turns into one long-running delete on the primary.
+
+Nothing is deleted unless RETENTION_ENABLED is set. The `retention` compose
+service runs the job once per deployment with --loop; API workers don't.
+
+Usage:
+    python -m app.jobs.retention [--dry-run]
+    python -m app.jobs.retention --loop   # every RETENTION_INTERVAL_SECONDS
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.crud.indexes import INDEX_KEY_SPECS_CONFLICT, INDEX_OPTIONS_CONFLICT
+
+TERMINAL_ORDER_STATUSES = ["delivered", "completed", "cancelled"]
+
+
+class RetentionPolicy(BaseModel):
+    """Delete documents of a collection once `field` is older than `days`."""
+    collection: str
+    field: str
+    days: float
+    filter: Dict[str, Any] = Field(default_factory=dict)
+    # Enforced by a TTL index instead of batched sweeps
+    ttl: bool = False
+
+    @property
+    def index_name(self) -> str:
+        return f"retention_{self.field}_ttl"
+
+    def expired_filter(self, now: datetime) -> Dict[str, Any]:
+        return {**self.filter, self.field: {"$lt": now - timedelta(days=self.days)}}
+
+
+def default_policies() -> List[RetentionPolicy]:
+    """Policies from settings; a zero retention period disables a policy."""
+    policies = [
+        # expires_at is already the deadline, so the TTL offset is zero
+        RetentionPolicy(collection="conversation_states", field="expires_at", days=0, ttl=True),
+    ]
+    if settings.RETENTION_INACTIVE_LISTINGS_DAYS:
+        policies.append(RetentionPolicy(
+            collection="listings",
+            field="updated_at",
+            days=settings.RETENTION_INACTIVE_LISTINGS_DAYS,
+            filter={"is_active": False},
+            ttl=True,
+        ))
+    if settings.RETENTION_MESSAGES_DAYS:
+        policies.append(RetentionPolicy(
+            collection="messages",
+            field="created_at",
+            days=settings.RETENTION_MESSAGES_DAYS,
+        ))
+    if settings.RETENTION_ORDERS_DAYS:
+        # Orders still in flight are kept regardless of age
+        policies.append(RetentionPolicy(
+            collection="orders",
+            field="created_at",
+            days=settings.RETENTION_ORDERS_DAYS,
+            filter={"status": {"$in": TERMINAL_ORDER_STATUSES}},
+        ))
+    return policies
+
+
+def ensure_ttl_index(collection: Collection, policy: RetentionPolicy) -> None:
+    """Create the policy's TTL index, or retune its expiry if it already exists."""
+    expire_after = int(policy.days * 86400)
+    options: Dict[str, Any] = {"name": policy.index_name, "expireAfterSeconds": expire_after}
+    if policy.filter:
+        options["partialFilterExpression"] = policy.filter
+
+    try:
+        collection.create_index(policy.field, **options)
+    except OperationFailure as exc:
+        if exc.code not in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+            raise
+        collection.database.command(
+            "collMod",
+            collection.name,
+            index={"name": policy.index_name, "expireAfterSeconds": expire_after}
+        )
+
+
+def sweep(
+    collection: Collection,
+    policy: RetentionPolicy,
+    *,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_deletes_per_second: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    dry_run: bool = False
+) -> int:
+    """Delete expired documents in `_id` order, one small batch at a time."""
+    expired = policy.expired_filter(now or datetime.utcnow())
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    max_deletes_per_second = max_deletes_per_second or settings.RETENTION_MAX_DELETES_PER_SECOND
+    pause_seconds = settings.RETENTION_BATCH_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+
+    if dry_run:
+        return collection.count_documents(expired)
+
+    deleted = 0
+    last_id = None
+    while True:
+        started = time.monotonic()
+        page_filter = dict(expired)
+        if last_id is not None:
+            page_filter["_id"] = {"$gt": last_id}
+        ids = [
+            document["_id"]
+            for document in collection.find(page_filter, {"_id": 1}).sort("_id", 1).limit(batch_size)
+        ]
+        if not ids:
+            break
+
+        # Re-check the policy filter so documents changed since the read survive
+        result = collection.delete_many({**expired, "_id": {"$in": ids}})
+        deleted += result.deleted_count
+        last_id = ids[-1]
+
+        elapsed = time.monotonic() - started
+        time.sleep(max(pause_seconds, len(ids) / max_deletes_per_second - elapsed))
+
+    return deleted
+
+
+def run_retention(
+    database: Database,
+    policies: Optional[List[RetentionPolicy]] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Apply every policy: ensure TTL indexes, sweep the rest."""
+    results: Dict[str, Any] = {}
+    for policy in policies if policies is not None else default_policies():
+        collection = database[policy.collection]
+        if policy.ttl:
+            if not dry_run:
+                ensure_ttl_index(collection, policy)
+            results[policy.collection] = "ttl"
+        else:
+            results[policy.collection] = sweep(collection, policy, dry_run=dry_run)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Count expired documents only")
+    parser.add_argument("--loop", action="store_true", help="Run every RETENTION_INTERVAL_SECONDS")
+    args = parser.parse_args()
+
+    if not settings.RETENTION_ENABLED and not args.dry_run:
+        print("Retention is disabled (set RETENTION_ENABLED=true to delete expired data)")
+        return
+
+    client = MongoClient(settings.get_mongodb_connection_string())
+    try:
+        while True:
+            try:
+                results = run_retention(client[settings.MONGODB_DATABASE], dry_run=args.dry_run)
+            except PyMongoError as exc:
+                if not args.loop:
+                    raise
+                print(f"Retention run failed: {exc}")
+            else:
+                _print_results(results, args.dry_run)
+            if not args.loop:
+                break
+            time.sleep(settings.RETENTION_INTERVAL_SECONDS)
+    finally:
+        client.close()
+
+
+def _print_results(results: Dict[str, Any], dry_run: bool) -> None:
+    verb = "would delete" if dry_run else "deleted"
+    for collection, outcome in results.items():
+        if outcome == "ttl":
+            print(f"{collection}: enforced by TTL index")
+        else:
+            print(f"{collection}: {verb} {outcome} documents")
+
+
+if __name__ == "__main__":
+    main()
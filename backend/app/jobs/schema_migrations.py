@@ -0,0 +1,105 @@
+"""
+Versioned schema migrations (indexes, collection options).
+
+Each migration is an idempotent step with an increasing version number.
+Applied versions are recorded in the `_migrations` collection, so running
+the command again only applies what is new. Run it once per deploy, before
+the API workers start; the workers themselves only compare the recorded
+version with SCHEMA_VERSION (one indexed read) instead of rebuilding every
+index on each boot.
+
+Changing the index registry means appending a migration here.
+
+Usage:
+    python -m app.jobs.schema_migrations [--status]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from pymongo import DESCENDING, MongoClient
+from pymongo.database import Database
+
+from app.config import settings
+from app.crud.indexes import apply_indexes
+
+MIGRATIONS_COLLECTION = "_migrations"
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Database], object]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Index registry baseline", apply_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def applied_version(database: Database) -> int:
+    """Highest migration version recorded in the database (0 if none)."""
+    latest = database[MIGRATIONS_COLLECTION].find_one(
+        {}, {"_id": 1}, sort=[("_id", DESCENDING)]
+    )
+    return latest["_id"] if latest else 0
+
+
+def pending_migrations(database: Database) -> List[Migration]:
+    current = applied_version(database)
+    return [migration for migration in MIGRATIONS if migration.version > current]
+
+
+def migrate(database: Database, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to `target`; returns the versions applied."""
+    applied = []
+    for migration in pending_migrations(database):
+        if target is not None and migration.version > target:
+            break
+        started = time.perf_counter()
+        migration.apply(database)
+        # Steps are idempotent, so a concurrent run recording the same
+        # version is harmless: the first record wins
+        database[MIGRATIONS_COLLECTION].update_one(
+            {"_id": migration.version},
+            {"$setOnInsert": {
+                "description": migration.description,
+                "applied_at": datetime.utcnow(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            }},
+            upsert=True
+        )
+        applied.append(migration.version)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--status", action="store_true", help="Show versions without applying anything")
+    parser.add_argument("--target", type=int, help="Stop after this version")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.get_mongodb_connection_string())
+    try:
+        database = client[settings.MONGODB_DATABASE]
+        if args.status:
+            print(f"Schema version {applied_version(database)} (code expects {SCHEMA_VERSION})")
+            for migration in pending_migrations(database):
+                print(f"  pending {migration.version}: {migration.description}")
+            return
+
+        applied = migrate(database, target=args.target)
+    finally:
+        client.close()
+
+    if applied:
+        print(f"Applied migrations {', '.join(map(str, applied))}")
+    else:
+        print("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Refresh the trending leaderboards (app.crud.trending).
+
+Runs as one process per deployment (the `trending` compose service), not in
+every API worker: the refresh aggregates the whole bucket window, and N
+workers would repeat it N times per period.
+
+Usage:
+    python -m app.jobs.trending           # refresh every TRENDING_REFRESH_SECONDS
+    python -m app.jobs.trending --once
+"""
+import argparse
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.crud.trending import CRUDTrending
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.get_mongodb_connection_string())
+    try:
+        trending = CRUDTrending.for_database(client[settings.MONGODB_DATABASE])
+        while True:
+            try:
+                trending.refresh_all()
+                print("Trending leaderboards refreshed")
+            except PyMongoError as exc:
+                if args.once:
+                    raise
+                print(f"Trending refresh failed: {exc}")
+            if args.once:
+                break
+            time.sleep(settings.TRENDING_REFRESH_SECONDS)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pymongo import MongoClient
 from pymongo.errors import OperationFailure, PyMongoError
 
-from app.routers import auth, chat, community, listings, concierge
+from app.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.db_monitor import command_monitor, pool_monitor
+from app.core.http_metrics import MetricsMiddleware
+from app.core.loop_monitor import LoopBlockGuardMiddleware, loop_watchdog
+from app.core.metrics import registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.request_context import RequestContextMiddleware
+from app.crud.deadlines import is_timeout
+from app.jobs.schema_migrations import SCHEMA_VERSION, applied_version, migrate
+from app.routers import admin, auth, chat, community, listings, concierge
 
 app = FastAPI()
 
@@ -15,13 +26,31 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.LOOP_BLOCK_FAIL_MS:
+    app.add_middleware(LoopBlockGuardMiddleware, fail_ms=settings.LOOP_BLOCK_FAIL_MS)
+if settings.COMPRESSION_ENABLED:
+    # Inside metrics and profiling, so they see the bytes that go on the wire
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 @app.on_event("startup")
 def startup_db_client():
     from app.config import settings
     
     mongodb_url = settings.get_mongodb_connection_string()
-    app.mongodb_client = MongoClient(mongodb_url)
+    event_listeners = []
+    if settings.DB_MONITOR_ENABLED:
+        event_listeners.append(command_monitor)
+    if settings.METRICS_ENABLED:
+        event_listeners.append(pool_monitor)
+    app.mongodb_client = MongoClient(
+        mongodb_url,
+        event_listeners=event_listeners,
+        **settings.get_mongodb_client_options()
+    )
     app.database = app.mongodb_client[settings.MONGODB_DATABASE]
     print(f"Connected to the {settings.MONGODB_DATABASE} database!")
 
@@ -30,23 +59,17 @@ def startup_db_client():
         app.database.command("ismaster")
         print("Database connection verified successfully!")
         
-        # Create indexes only if we have proper permissions
-        app.database["users"].create_index("email", unique=True)
-        app.database["chats"].create_index("participants_hash", unique=True)
-        app.database["messages"].create_index([("chat_id", 1), ("created_at", 1)])
-        app.database["listings"].create_index([("is_active", 1), ("created_at", -1)])
-        app.database["community_posts"].create_index([("created_at", -1)])
-        app.database["community_posts"].create_index("tags")
-        
-        # AI Concierge indexes
-        app.database["conversation_states"].create_index("conversation_id", unique=True)
-        app.database["conversation_states"].create_index([("user_id", 1), ("created_at", -1)])
-        app.database["conversation_states"].create_index("session_id")
-        app.database["orders"].create_index("order_id", unique=True)
-        app.database["orders"].create_index([("user_id", 1), ("created_at", -1)])
-        app.database["orders"].create_index("conversation_id")
-        
-        print("Database indexes created successfully!")
+        # Indexes are applied by `python -m app.jobs.schema_migrations`;
+        # workers only check that it has run
+        version = applied_version(app.database)
+        if version < SCHEMA_VERSION and settings.SCHEMA_AUTO_MIGRATE:
+            migrate(app.database)
+            version = SCHEMA_VERSION
+        if version < SCHEMA_VERSION:
+            print(f"Database schema is at version {version}, expected {SCHEMA_VERSION}. "
+                  "Run `python -m app.jobs.schema_migrations`.")
+        else:
+            print(f"Database schema version {version} verified")
     except OperationFailure as exc:
         print(f"Database operation note: {exc}. Application will continue with existing indexes.")
     except Exception as exc:
@@ -59,8 +82,32 @@ def startup_db_client():
     except Exception as exc:
         print(f"Warning: Could not initialize service providers: {exc}")
 
+@app.exception_handler(PyMongoError)
+async def database_error_handler(request: Request, exc: PyMongoError):
+    """Deadlines and pool waits that ran out mean overload: ask clients to back off."""
+    if not is_timeout(exc):
+        raise exc
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    from app.config import settings
+
+    # Trending refresh and retention run once per deployment (app.jobs), not per worker
+    app.background_tasks = []
+    if settings.LOOP_WATCHDOG_ENABLED:
+        app.background_tasks.append(loop_watchdog.start())
+
+
 @app.on_event("shutdown")
 def shutdown_db_client():
+    for task in app.background_tasks:
+        task.cancel()
     app.mongodb_client.close()
 
 app.include_router(auth.router)
@@ -68,6 +115,7 @@ app.include_router(listings.router)
 app.include_router(chat.router)
 app.include_router(community.router)
 app.include_router(concierge.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def read_root():
@@ -83,3 +131,8 @@ def healthcheck():
         database_status = "error"
 
     return {"status": "ok", "database": database_status}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
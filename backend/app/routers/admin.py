@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+
+from app.core.db_monitor import command_monitor
+from app.core.loop_monitor import loop_watchdog
+from app.core.profiling import profile_store, profile_text
+from app.dependencies import require_admin
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/db/slow-queries")
+async def slow_queries(limit: int = Query(20, ge=1, le=200)):
+    """Slowest query shapes (values redacted) by total time spent."""
+    return {
+        "threshold_ms": command_monitor.slow_ms,
+        "shapes": command_monitor.top_slow_shapes(limit),
+    }
+
+
+@router.get("/db/latency")
+async def db_latency():
+    """Command latency summaries by command, collection and route/CRUD method."""
+    return command_monitor.latency()
+
+
+@router.post("/db/reset")
+async def reset_db_stats():
+    command_monitor.reset()
+    return {"status": "ok"}
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recent request profiles, newest first, with their timing breakdown."""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: int, format: str = Query("pstats", pattern="^(pstats|text)$")):
+    """A stored profile: pstats binary (snakeviz, `python -m pstats`) or a text summary."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "text":
+        return PlainTextResponse(profile_text(profile))
+    return Response(
+        profile["stats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'},
+    )
+
+
+@router.get("/loop/stalls")
+async def loop_stalls():
+    """Recent event-loop stalls with the blocking stack and route, newest first."""
+    return {
+        "threshold_ms": round(loop_watchdog.threshold * 1000, 1),
+        "stalls": loop_watchdog.recent_stalls(),
+    }
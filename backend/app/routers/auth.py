@@ -1,11 +1,11 @@
 from datetime import datetime
-import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pymongo.errors import DuplicateKeyError
 
 from app.core.security import create_access_token, get_password_hash, verify_password
+from app.crud.ids import new_id
 from app.dependencies import get_current_user
 from app.schemas.user import Token, UserCreate, UserPublic
 
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 async def register_user(request: Request, payload: UserCreate):
     users = request.app.database["users"]
     user_document = {
-        "_id": str(uuid.uuid4()),
+        "_id": new_id(),
         "name": payload.name,
         "email": payload.email.lower(),
         "hashed_password": get_password_hash(payload.password),
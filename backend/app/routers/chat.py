@@ -1,9 +1,11 @@
 from datetime import datetime
-import uuid
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 
+from app.core.responses import ModelListResponse
+from app.crud.chat import CRUDChat, CRUDMessage
+from app.crud.ids import new_id
 from app.dependencies import get_current_user
 from app.schemas.chat import ChatCreate, ChatPublic, MessageCreate, MessagePublic
 
@@ -20,32 +22,20 @@ async def start_chat(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot chat with yourself")
 
     users = request.app.database["users"]
-    other_user = users.find_one({"_id": payload.participant_id})
+    other_user = users.find_one({"_id": payload.participant_id}, {"_id": 1})
     if not other_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Participant not found")
 
-    chats = request.app.database["chats"]
-    participants = sorted([current_user["_id"], payload.participant_id])
-    participants_hash = "::".join(participants)
-
-    existing = chats.find_one({"participants_hash": participants_hash})
-    if existing:
-        return ChatPublic(**existing)
-
-    chat_document = {
-        "_id": str(uuid.uuid4()),
-        "participants": participants,
-        "participants_hash": participants_hash,
-        "created_at": datetime.utcnow(),
-    }
-    chats.insert_one(chat_document)
-    return ChatPublic(**chat_document)
+    chat, _ = CRUDChat(request.app.database["chats"]).open_chat(
+        participants=[current_user["_id"], payload.participant_id]
+    )
+    return ChatPublic(**chat)
 
 
 @router.get("/", response_model=List[ChatPublic])
 async def my_chats(request: Request, current_user=Depends(get_current_user)):
     chats = request.app.database["chats"].find({"participants": current_user["_id"]}).sort("created_at", -1)
-    return [ChatPublic(**chat) for chat in chats]
+    return ModelListResponse(ChatPublic, chats)
 
 
 def _ensure_chat_access(chat: dict, user_id: str):
@@ -71,7 +61,7 @@ async def get_messages(
         .find({"chat_id": chat_id})
         .sort("created_at", 1)
     )
-    return [MessagePublic(**message) for message in messages_cursor]
+    return ModelListResponse(MessagePublic, messages_cursor)
 
 
 @router.post("/{chat_id}/messages", response_model=MessagePublic, status_code=status.HTTP_201_CREATED)
@@ -81,22 +71,18 @@ async def send_message(
     payload: MessageCreate,
     current_user=Depends(get_current_user),
 ):
-    chats = request.app.database["chats"]
-    chat = chats.find_one({"_id": chat_id})
-    if not chat:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
-
-    _ensure_chat_access(chat, current_user["_id"])
-
-    message_document = {
-        "_id": str(uuid.uuid4()),
-        "chat_id": chat_id,
-        "sender_id": current_user["_id"],
-        "content": payload.content,
-        "created_at": datetime.utcnow(),
-    }
-    request.app.database["messages"].insert_one(message_document)
-    return MessagePublic(**message_document)
+    chat_crud = CRUDChat(request.app.database["chats"])
+    message = CRUDMessage(request.app.database["messages"], chat_crud).create_message(
+        message_in=payload,
+        chat_id=chat_id,
+        sender_id=current_user["_id"]
+    )
+    if message is None:
+        # Failure path only: tell a missing chat from a foreign one
+        if not chat_crud.exists({"_id": chat_id}):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a participant of this chat")
+    return MessagePublic(**message)
 
 
 @router.post("/listing/{listing_id}", response_model=ChatPublic, status_code=status.HTTP_201_CREATED)
@@ -120,59 +106,32 @@ async def start_listing_chat(
 
     # Check if listing owner exists
     users = request.app.database["users"]
-    owner = users.find_one({"_id": listing["owner_id"]})
+    owner = users.find_one({"_id": listing["owner_id"]}, {"_id": 1})
     if not owner:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing owner not found")
 
     # Create or find existing chat
-    chats = request.app.database["chats"]
-    participants = sorted([current_user["_id"], listing["owner_id"]])
-    participants_hash = "::".join(participants)
-
-    existing = chats.find_one({"participants_hash": participants_hash})
-    if existing:
-        # Update chat to include listing context if it doesn't exist
-        if not existing.get("listing_context"):
-            chats.update_one(
-                {"_id": existing["_id"]},
-                {"$set": {"listing_context": {
-                    "listing_id": listing_id,
-                    "listing_title": listing["title"],
-                    "listing_price": listing.get("price", 0)
-                }}}
-            )
-            existing["listing_context"] = {
-                "listing_id": listing_id,
-                "listing_title": listing["title"],
-                "listing_price": listing.get("price", 0)
-            }
-        return ChatPublic(**existing)
-
-    # Create new chat with listing context
-    chat_document = {
-        "_id": str(uuid.uuid4()),
-        "participants": participants,
-        "participants_hash": participants_hash,
-        "listing_context": {
+    chat, created = CRUDChat(request.app.database["chats"]).open_chat(
+        participants=[current_user["_id"], listing["owner_id"]],
+        listing_context={
             "listing_id": listing_id,
             "listing_title": listing["title"],
             "listing_price": listing.get("price", 0)
-        },
-        "created_at": datetime.utcnow(),
-    }
-    chats.insert_one(chat_document)
+        }
+    )
     
-    # Send automatic introductory message
-    intro_message = {
-        "_id": str(uuid.uuid4()),
-        "chat_id": chat_document["_id"],
-        "sender_id": "system",
-        "content": f"💬 Chat started about listing: {listing['title']} (${listing.get('price', 0)})",
-        "created_at": datetime.utcnow(),
-    }
-    request.app.database["messages"].insert_one(intro_message)
+    if created:
+        # Send automatic introductory message
+        intro_message = {
+            "_id": new_id(),
+            "chat_id": chat["_id"],
+            "sender_id": "system",
+            "content": f"💬 Chat started about listing: {listing['title']} (${listing.get('price', 0)})",
+            "created_at": datetime.utcnow(),
+        }
+        request.app.database["messages"].insert_one(intro_message)
     
-    return ChatPublic(**chat_document)
+    return ChatPublic(**chat)
 
 
 @router.get("/listing/{listing_id}/chats", response_model=List[ChatPublic])
@@ -199,4 +158,4 @@ async def get_listing_chats(
         "participants": current_user["_id"]
     }).sort("created_at", -1)
     
-    return [ChatPublic(**chat) for chat in chats]
+    return ModelListResponse(ChatPublic, chats)
@@ -1,10 +1,16 @@
 from datetime import datetime
-import uuid
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
+from app.core.http_cache import collection_validators, conditional_response
+from app.core.responses import ModelListResponse
+from app.crud.community import CRUDCommunityPost
+from app.crud.ids import new_id
+from app.crud.service import get_community_post_crud
+from app.crud.trending import COMMENT_WEIGHT, CRUDTrending, POSTS
 from app.dependencies import get_current_user
+from app.schemas.common import FacetCount
 from app.schemas.community import (
     CommunityCommentCreate,
     CommunityCommentPublic,
@@ -21,18 +27,9 @@ async def create_post(
     payload: CommunityPostCreate,
     current_user=Depends(get_current_user),
 ):
-    posts = request.app.database["community_posts"]
-    post_document = {
-        "_id": str(uuid.uuid4()),
-        "author_id": current_user["_id"],
-        "title": payload.title,
-        "content": payload.content,
-        "tags": payload.tags,
-        "created_at": datetime.utcnow(),
-        "updated_at": None,
-        "like_count": 0,
-    }
-    posts.insert_one(post_document)
+    # Through the CRUD layer so tag counters and trending stay in step
+    post_crud = CRUDCommunityPost(request.app.database["community_posts"])
+    post_document = post_crud.create_post(post_in=payload, author_id=current_user["_id"])
     return CommunityPostPublic(**post_document)
 
 
@@ -49,7 +46,27 @@ async def list_posts(request: Request, tag: Optional[str] = None, limit: int = 5
         .limit(max(1, min(limit, 100)))
         .sort("created_at", -1)
     )
-    return [CommunityPostPublic(**doc) for doc in posts_cursor]
+    validators = collection_validators(request.app.database, "community_posts", tag, limit, skip)
+    return conditional_response(
+        request, validators, lambda: ModelListResponse(CommunityPostPublic, posts_cursor)
+    )
+
+
+@router.get("/tags", response_model=List[FacetCount])
+async def list_tags(post_crud: CRUDCommunityPost = Depends(get_community_post_crud)):
+    """All tags with the number of posts using each."""
+    return post_crud.get_tag_counts()
+
+
+@router.get("/posts/popular", response_model=List[CommunityPostPublic])
+async def popular_posts(
+    limit: int = Query(10, le=50, ge=1),
+    days: int = Query(7, le=90, ge=1),
+    post_crud: CRUDCommunityPost = Depends(get_community_post_crud),
+):
+    """Trending posts created in the last `days` days, read from the precomputed leaderboard."""
+    posts = post_crud.get_popular_posts(limit=limit, days=days)
+    return ModelListResponse(CommunityPostPublic, posts)
 
 
 @router.post(
@@ -70,13 +87,16 @@ async def add_comment(
 
     comments = request.app.database["community_comments"]
     comment_document = {
-        "_id": str(uuid.uuid4()),
+        "_id": new_id(),
         "post_id": post_id,
         "author_id": current_user["_id"],
         "content": payload.content,
         "created_at": datetime.utcnow(),
     }
     comments.insert_one(comment_document)
+    CRUDTrending.for_database(request.app.database).record_activity(
+        kind=POSTS, item_id=post_id, weight=COMMENT_WEIGHT
+    )
     return CommunityCommentPublic(**comment_document)
 
 
@@ -87,4 +107,4 @@ async def list_comments(request: Request, post_id: str):
         .find({"post_id": post_id})
         .sort("created_at", 1)
     )
-    return [CommunityCommentPublic(**doc) for doc in comments_cursor]
+    return ModelListResponse(CommunityCommentPublic, comments_cursor)
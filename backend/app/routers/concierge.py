@@ -13,6 +13,7 @@ Endpoints:
     - GET /api/concierge/services/search - Search for services
     - GET /api/concierge/services/{id}/details - Get service details
     - POST /api/concierge/services/{id}/estimate - Get cost estimate
+    - GET /api/concierge/providers/metrics - Provider circuit breaker metrics (admin token)
     
     - POST /api/concierge/orders/place - Place an order
     - GET /api/concierge/orders/{id} - Get order details
@@ -50,7 +51,8 @@ from ..services.service_provider import (
     ServiceCategory,
     service_registry,
 )
-from ..dependencies import get_current_user
+from ..core.responses import ORJSONResponse
+from ..dependencies import get_current_user, require_admin
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -343,17 +345,17 @@ async def search_services(
         criteria = SearchCriteria(
             category=category,
             query=query,
-            location={"lat": lat, "lng": lng} if lat and lng else None,
+            location={"lat": lat, "lng": lng} if lat is not None and lng is not None else None,
             limit=limit
         )
         
         # Search across all providers
         results = await service_registry.aggregate_search_results(criteria)
         
-        return {
+        return ORJSONResponse({
             "results": results,
             "total": len(results)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error searching services: {e}")
@@ -426,6 +428,12 @@ async def estimate_cost(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/providers/metrics", dependencies=[Depends(require_admin)])
+async def get_provider_metrics():
+    """Circuit breaker state, error rate and hedging counters per provider."""
+    return service_registry.get_provider_metrics()
+
+
 # ============================================================================
 #                           ORDER ENDPOINTS
 # ============================================================================
@@ -1,14 +1,52 @@
-from datetime import datetime
-import uuid
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from app.core.http_cache import (
+    Validators,
+    collection_validators,
+    conditional_response,
+    document_validators,
+    weak_etag,
+)
+from app.core.responses import ModelListResponse, ModelResponse
+from app.crud.listing import CRUDListing
 from app.dependencies import get_current_user
-from app.schemas.listing import ListingCreate, ListingPublic, ListingUpdate
+from app.schemas.common import FacetCount
+from app.schemas.listing import ListingCreate, ListingFacetedSearch, ListingPublic, ListingUpdate
 
 router = APIRouter(prefix="/listings", tags=["listings"])
 
+MAX_RADIUS_KM = 500
+
+
+def parse_near_param(near: str, radius_km: float) -> Tuple[float, float]:
+    """Parse a `lat,lng` query value and validate the search radius."""
+    try:
+        lat_text, lng_text = near.split(",")
+        lat, lng = float(lat_text), float(lng_text)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="near must be formatted as lat,lng",
+        ) from exc
+
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="near is out of range")
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"radius_km must be between 0 and {MAX_RADIUS_KM}",
+        )
+    return lat, lng
+
+
+def missing_or_forbidden(listing_crud: CRUDListing, listing_id: str) -> HTTPException:
+    """Explain a failed owner-scoped write; only runs on the failure path."""
+    if listing_crud.exists({"_id": listing_id}):
+        return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
+
 
 @router.post("/", response_model=ListingPublic, status_code=status.HTTP_201_CREATED)
 async def create_listing(
@@ -16,22 +54,29 @@ async def create_listing(
     payload: ListingCreate,
     current_user=Depends(get_current_user),
 ):
-    listings = request.app.database["listings"]
-    listing_document = {
-        "_id": str(uuid.uuid4()),
-        "owner_id": current_user["_id"],
-        "is_active": True,
-        "created_at": datetime.utcnow(),
-        "updated_at": None,
-        **payload.model_dump(),
-    }
-    listings.insert_one(listing_document)
+    # Through the CRUD layer so category counters stay in step
+    listing_crud = CRUDListing(request.app.database["listings"])
+    listing_document = listing_crud.create_listing(listing_in=payload, owner_id=current_user["_id"])
     return ListingPublic(**listing_document)
 
 
 @router.get("/", response_model=List[ListingPublic])
-async def list_listings(request: Request, limit: int = 50, skip: int = 0):
+async def list_listings(
+    request: Request,
+    limit: int = 50,
+    skip: int = 0,
+    near: Optional[str] = None,
+    radius_km: float = 10,
+):
     limit = max(1, min(limit, 100))
+    if near:
+        lat, lng = parse_near_param(near, radius_km)
+        listing_crud = CRUDListing(request.app.database["listings"])
+        nearby = listing_crud.get_listings_near(
+            lat=lat, lng=lng, radius_km=radius_km, skip=skip, limit=limit
+        )
+        return ModelListResponse(ListingPublic, nearby)
+
     listings = (
         request.app.database["listings"]
         .find({"is_active": True})
@@ -39,8 +84,69 @@ async def list_listings(request: Request, limit: int = 50, skip: int = 0):
         .limit(limit)
         .sort("created_at", -1)
     )
-    results = [ListingPublic(**document) for document in listings]
-    return results
+    return ModelListResponse(ListingPublic, listings)
+
+
+@router.get("/search/faceted", response_model=ListingFacetedSearch)
+async def faceted_search_listings(
+    request: Request,
+    limit: int = Query(50, le=100, ge=1),
+    skip: int = Query(0, ge=0),
+    category: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    price_edges: Optional[str] = Query(None, description="Comma-separated bucket edges, e.g. 0,50,100,500"),
+):
+    """Results, total, category counts and price histogram in one round trip."""
+    edges = None
+    if price_edges:
+        try:
+            edges = [float(edge) for edge in price_edges.split(",")]
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="price_edges must be comma-separated numbers"
+            )
+
+    listing_crud = CRUDListing(request.app.database["listings"])
+    return listing_crud.faceted_search(
+        skip=skip,
+        limit=limit,
+        category=category,
+        location=location,
+        min_price=min_price,
+        max_price=max_price,
+        price_edges=edges
+    )
+
+
+@router.get("/categories", response_model=List[FacetCount])
+async def get_categories(request: Request):
+    """Active listing counts per category, from the facet counters."""
+    counts = CRUDListing(request.app.database["listings"]).get_category_counts()
+    # Counts come from the facet cache, which may lag the version counter; tag the counts themselves
+    validators = Validators(weak_etag(*(f"{row['name']}={row['count']}" for row in counts)))
+    return conditional_response(request, validators, lambda: ModelListResponse(FacetCount, counts))
+
+
+@router.get("/popular", response_model=List[ListingPublic])
+async def get_popular_listings(request: Request, limit: int = Query(10, le=50, ge=1)):
+    """Trending listings, read from the precomputed leaderboard."""
+    listing_crud = CRUDListing(request.app.database["listings"])
+    return ModelListResponse(ListingPublic, listing_crud.get_popular_listings(limit=limit))
+
+
+@router.get("/recent", response_model=List[ListingPublic])
+async def get_recent_listings(request: Request, limit: int = Query(10, le=50, ge=1)):
+    """Most recent active listings; answers conditional GETs with 304."""
+    validators = collection_validators(request.app.database, "listings", limit)
+    listing_crud = CRUDListing(request.app.database["listings"])
+    return conditional_response(
+        request,
+        validators,
+        lambda: ModelListResponse(ListingPublic, listing_crud.get_recent_listings(limit=limit))
+    )
 
 
 @router.get("/{listing_id}", response_model=ListingPublic)
@@ -48,7 +154,12 @@ async def get_listing(request: Request, listing_id: str):
     listing = request.app.database["listings"].find_one({"_id": listing_id})
     if not listing:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
-    return ListingPublic(**listing)
+    # Feeds the trending counters; view_count is not part of the ETag, so
+    # revalidations count as views too
+    CRUDListing(request.app.database["listings"]).increment_view_count(listing_id=listing_id)
+    return conditional_response(
+        request, document_validators(listing), lambda: ModelResponse(ListingPublic, listing)
+    )
 
 
 @router.patch("/{listing_id}", response_model=ListingPublic)
@@ -58,19 +169,14 @@ async def update_listing(
     payload: ListingUpdate,
     current_user=Depends(get_current_user),
 ):
-    listings = request.app.database["listings"]
-    listing = listings.find_one({"_id": listing_id})
-    if not listing:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
-    if listing["owner_id"] != current_user["_id"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
-
-    update_data = {k: v for k, v in payload.model_dump(exclude_unset=True).items() if v is not None}
-    if update_data:
-        update_data["updated_at"] = datetime.utcnow()
-        listings.update_one({"_id": listing_id}, {"$set": update_data})
-        listing.update(update_data)
-
+    listing_crud = CRUDListing(request.app.database["listings"])
+    listing = listing_crud.update_listing(
+        listing_id=listing_id,
+        listing_update=payload,
+        owner_id=current_user["_id"]
+    )
+    if listing is None:
+        raise missing_or_forbidden(listing_crud, listing_id)
     return ListingPublic(**listing)
 
 
@@ -80,14 +186,9 @@ async def delete_listing(
     listing_id: str,
     current_user=Depends(get_current_user),
 ):
-    listings = request.app.database["listings"]
-    listing = listings.find_one({"_id": listing_id})
-    if not listing:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
-    if listing["owner_id"] != current_user["_id"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not permitted")
-
-    listings.delete_one({"_id": listing_id})
+    listing_crud = CRUDListing(request.app.database["listings"])
+    if not listing_crud.delete_listing(listing_id=listing_id, owner_id=current_user["_id"]):
+        raise missing_or_forbidden(listing_crud, listing_id)
     return None
 
 
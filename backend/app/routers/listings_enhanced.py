@@ -1,15 +1,21 @@
 """
 Enhanced listings router demonstrating CRUD usage.
 This is an example of how to integrate the new CRUD functions.
+
+Not mounted by app.main. Routes the app serves live in app.routers.listings
+only (faceted search, categories, popular, recent); don't copy them back here.
 """
 from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 
+from app.core.http_cache import conditional_response, document_validators
+from app.core.responses import ModelListResponse, ModelResponse
 from app.dependencies import get_current_user
 from app.schemas.listing import ListingCreate, ListingPublic, ListingUpdate
 from app.crud.service import get_listing_crud
 from app.crud.listing import CRUDListing
+from app.routers.listings import missing_or_forbidden, parse_near_param
 
 router = APIRouter(prefix="/listings", tags=["listings"])
 
@@ -36,9 +42,25 @@ async def list_listings(
     location: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
+    near: Optional[str] = Query(None, description="lat,lng"),
+    radius_km: float = Query(10, gt=0),
     listing_crud: CRUDListing = Depends(get_listing_crud)
 ):
-    """Get listings with advanced filtering."""
+    """Get listings with advanced filtering, or nearest first when `near` is set."""
+    if near:
+        lat, lng = parse_near_param(near, radius_km)
+        listings = listing_crud.get_listings_near(
+            lat=lat,
+            lng=lng,
+            radius_km=radius_km,
+            skip=skip,
+            limit=limit,
+            category=category,
+            min_price=min_price,
+            max_price=max_price
+        )
+        return [ListingPublic(**listing) for listing in listings]
+    
     listings = listing_crud.get_active_listings(
         skip=skip,
         limit=limit,
@@ -66,32 +88,6 @@ async def search_listings(
     return [ListingPublic(**listing) for listing in listings]
 
 
-@router.get("/categories", response_model=List[str])
-async def get_categories(listing_crud: CRUDListing = Depends(get_listing_crud)):
-    """Get all available categories."""
-    return listing_crud.get_categories()
-
-
-@router.get("/popular", response_model=List[ListingPublic])
-async def get_popular_listings(
-    limit: int = Query(10, le=50, ge=1),
-    listing_crud: CRUDListing = Depends(get_listing_crud)
-):
-    """Get most viewed listings."""
-    listings = listing_crud.get_popular_listings(limit=limit)
-    return [ListingPublic(**listing) for listing in listings]
-
-
-@router.get("/recent", response_model=List[ListingPublic])
-async def get_recent_listings(
-    limit: int = Query(10, le=50, ge=1),
-    listing_crud: CRUDListing = Depends(get_listing_crud)
-):
-    """Get most recent listings."""
-    listings = listing_crud.get_recent_listings(limit=limit)
-    return [ListingPublic(**listing) for listing in listings]
-
-
 @router.get("/my-listings", response_model=List[ListingPublic])
 async def get_my_listings(
     limit: int = Query(50, le=100, ge=1),
@@ -112,6 +108,7 @@ async def get_my_listings(
 
 @router.get("/{listing_id}", response_model=ListingPublic)
 async def get_listing(
+    request: Request,
     listing_id: str,
     listing_crud: CRUDListing = Depends(get_listing_crud)
 ):
@@ -123,10 +120,12 @@ async def get_listing(
             detail="Listing not found"
         )
     
-    # Increment view count
+    # Increment view count (revalidations count as views too)
     listing_crud.increment_view_count(listing_id=listing_id)
     
-    return ListingPublic(**listing)
+    return conditional_response(
+        request, document_validators(listing), lambda: ModelResponse(ListingPublic, listing)
+    )
 
 
 @router.patch("/{listing_id}", response_model=ListingPublic)
@@ -201,26 +200,8 @@ async def delete_listing(
     listing_crud: CRUDListing = Depends(get_listing_crud)
 ):
     """Delete a listing permanently."""
-    # Check if listing exists and belongs to user
-    listing = listing_crud.get(listing_id)
-    if not listing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Listing not found"
-        )
-    
-    if listing.get("owner_id") != current_user["_id"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="Not permitted"
-        )
-    
     # For production, you might want to use deactivate instead of delete
-    success = listing_crud.delete(id=listing_id)
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete listing"
-        )
+    if not listing_crud.delete_listing(listing_id=listing_id, owner_id=current_user["_id"]):
+        raise missing_or_forbidden(listing_crud, listing_id)
     
     return None
\ No newline at end of file
@@ -16,3 +16,8 @@ class DateTrackingModel(BaseModel):
             }
         }
     }
+
+
+class FacetCount(BaseModel):
+    name: str
+    count: int
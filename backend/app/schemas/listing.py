@@ -1,7 +1,24 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+
+from app.schemas.common import FacetCount
+
+
+class GeoPoint(BaseModel):
+    """GeoJSON point; coordinates are [longitude, latitude]."""
+
+    type: Literal["Point"] = "Point"
+    coordinates: List[float] = Field(..., min_length=2, max_length=2)
+
+    @field_validator("coordinates")
+    @classmethod
+    def check_range(cls, value: List[float]) -> List[float]:
+        lng, lat = value
+        if not -180 <= lng <= 180 or not -90 <= lat <= 90:
+            raise ValueError("coordinates must be [lng, lat] within valid ranges")
+        return value
 
 
 class ListingBase(BaseModel):
@@ -10,6 +27,7 @@ class ListingBase(BaseModel):
     price: float = Field(..., ge=0)
     category: Optional[str] = Field(default=None, max_length=80)
     location: Optional[str] = Field(default=None, max_length=120)
+    geo_location: Optional[GeoPoint] = None
     image_urls: List[str] = Field(default_factory=list)
 
 
@@ -22,6 +40,7 @@ class ListingCreate(ListingBase):
                 "price": 450.0,
                 "category": "Sports",
                 "location": "Cape Town",
+                "geo_location": {"type": "Point", "coordinates": [18.4241, -33.9249]},
                 "image_urls": [
                     "https://example.com/bike-front.jpg",
                     "https://example.com/bike-side.jpg",
@@ -37,6 +56,7 @@ class ListingUpdate(BaseModel):
     price: Optional[float] = Field(default=None, ge=0)
     category: Optional[str] = Field(default=None, max_length=80)
     location: Optional[str] = Field(default=None, max_length=120)
+    geo_location: Optional[GeoPoint] = None
     image_urls: Optional[List[str]] = None
     is_active: Optional[bool] = None
 
@@ -47,5 +67,21 @@ class ListingPublic(ListingBase):
     is_active: bool = True
     created_at: datetime
     updated_at: Optional[datetime] = None
+    distance_km: Optional[float] = None
 
     model_config = ConfigDict(populate_by_name=True)
+
+
+class PriceBucket(BaseModel):
+    # min/max are None for the bucket of prices outside the requested edges
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int
+
+
+class ListingFacetedSearch(BaseModel):
+    results: List[ListingPublic]
+    total: int
+    total_is_estimate: bool = False
+    categories: List[FacetCount]
+    price_buckets: List[PriceBucket]
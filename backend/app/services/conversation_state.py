@@ -5,12 +5,15 @@ Manages multi-step conversations for service delivery.
 Tracks user intent, collects required information, and orchestrates service fulfillment.
 """
 
+from collections import Counter
 from enum import Enum
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 import uuid
 
+from app.core.metrics import registry
+
 
 class ConversationStage(str, Enum):
     """Stages in the conversation flow"""
@@ -318,6 +321,24 @@ class ConversationStateMachine:
 _conversation_states: Dict[str, ConversationState] = {}
 
 
+def _conversations_by_stage():
+    """Live (unexpired) conversations per stage, counted at scrape time"""
+    counts = Counter(
+        state.stage.value for state in list(_conversation_states.values())
+        if not state.is_expired()
+    )
+    for stage in ConversationStage:
+        yield (stage.value,), counts.get(stage.value, 0)
+
+
+registry.gauge_callback(
+    "concierge_conversations",
+    "Live concierge conversations by stage",
+    ("stage",),
+    _conversations_by_stage,
+)
+
+
 def get_or_create_conversation(
     user_id: str, 
     session_id: str
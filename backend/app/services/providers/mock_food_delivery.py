@@ -21,6 +21,7 @@ from app.services.service_provider import (
     Order,
     OrderStatusUpdate
 )
+from app.services.ranking import haversine_km
 
 
 class MockFoodDeliveryProvider(ServiceProvider):
@@ -46,6 +47,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
             "minimum_order": 15.00,
             "tags": ["Pizza", "Italian", "Fast Delivery"],
             "image_url": "https://example.com/papas-pizza.jpg",
+            "location": {"lat": 37.7793, "lng": -122.4192},
             "menu": [
                 {"id": "item_1", "name": "Pepperoni Pizza", "price": 18.99, "size": "Large"},
                 {"id": "item_2", "name": "Margherita Pizza", "price": 16.99, "size": "Large"},
@@ -67,6 +69,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
             "minimum_order": 12.00,
             "tags": ["Burgers", "American", "Fast Food"],
             "image_url": "https://example.com/burger-kingdom.jpg",
+            "location": {"lat": 37.7699, "lng": -122.4468},
             "menu": [
                 {"id": "item_7", "name": "Classic Cheeseburger", "price": 12.99},
                 {"id": "item_8", "name": "Bacon BBQ Burger", "price": 14.99},
@@ -88,6 +91,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
             "minimum_order": 20.00,
             "tags": ["Sushi", "Japanese", "Healthy"],
             "image_url": "https://example.com/sushi-sensation.jpg",
+            "location": {"lat": 37.7946, "lng": -122.4075},
             "menu": [
                 {"id": "item_13", "name": "California Roll", "price": 12.99},
                 {"id": "item_14", "name": "Spicy Tuna Roll", "price": 14.99},
@@ -109,6 +113,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
             "minimum_order": 10.00,
             "tags": ["Mexican", "Tacos", "Budget-Friendly"],
             "image_url": "https://example.com/taco-fiesta.jpg",
+            "location": {"lat": 37.7599, "lng": -122.4148},
             "menu": [
                 {"id": "item_19", "name": "Street Tacos (3pc)", "price": 9.99},
                 {"id": "item_20", "name": "Burrito Bowl", "price": 11.99},
@@ -130,6 +135,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
             "minimum_order": 15.00,
             "tags": ["Thai", "Asian", "Spicy"],
             "image_url": "https://example.com/thai-orchid.jpg",
+            "location": {"lat": 37.7858, "lng": -122.4064},
             "menu": [
                 {"id": "item_25", "name": "Pad Thai", "price": 13.99},
                 {"id": "item_26", "name": "Green Curry", "price": 14.99},
@@ -170,8 +176,15 @@ class MockFoodDeliveryProvider(ServiceProvider):
                 )
             
             if matches:
-                # Calculate mock distance (random for now)
-                distance = round(random.uniform(0.5, 5.0), 1)
+                # Real distance when we know where the user is
+                if criteria.location:
+                    distance = round(float(haversine_km(
+                        criteria.location,
+                        restaurant["location"]["lat"],
+                        restaurant["location"]["lng"]
+                    )), 1)
+                else:
+                    distance = round(random.uniform(0.5, 5.0), 1)
                 
                 results.append(ServiceOption(
                     id=restaurant["id"],
@@ -187,6 +200,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
                     minimum_order=restaurant["minimum_order"],
                     tags=restaurant["tags"],
                     distance=distance,
+                    location=restaurant["location"],
                     available=True
                 ))
         
@@ -225,6 +239,7 @@ class MockFoodDeliveryProvider(ServiceProvider):
                 "hours": "10:00 AM - 11:00 PM",
                 "delivery_time": restaurant["delivery_time"]
             },
+            location=restaurant["location"],
             images=[restaurant.get("image_url")],
             reviews={
                 "rating": restaurant["rating"],
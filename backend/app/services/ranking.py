@@ -0,0 +1,164 @@
+"""
+Service Option Ranking
+
+Scores aggregated provider results in a single vectorized pass.
+
+Each candidate is scored on distance from the user, rating, delivery time,
+delivery fee and price level. Features are min-max normalized across the
+candidate set so the weights are comparable, missing values count as the
+worst observed value, and only the top-k are selected (argpartition) and
+ordered instead of sorting the whole candidate list.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from app.services.service_provider import ServiceOption
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class RankingWeights(BaseModel):
+    """Relative importance of each ranking feature"""
+    distance: float = 0.5
+    rating: float = 1.0
+    eta: float = 0.5
+    fee: float = 0.2
+    price_level: float = 0.1
+
+
+def haversine_km(
+    origin: Dict[str, float],
+    lats: np.ndarray,
+    lngs: np.ndarray
+) -> np.ndarray:
+    """Great-circle distance in km from origin to every (lat, lng) pair"""
+    lat1 = np.radians(origin["lat"])
+    lng1 = np.radians(origin["lng"])
+    lat2 = np.radians(lats)
+    lng2 = np.radians(lngs)
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _normalize(values: np.ndarray, higher_is_better: bool) -> np.ndarray:
+    """
+    Min-max scale to [0, 1] where 1 is best; NaN becomes the worst value
+    """
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.zeros_like(values)
+
+    low = values[finite].min()
+    high = values[finite].max()
+    span = high - low
+    if span == 0:
+        scaled = np.where(finite, 1.0, 0.0)
+    else:
+        scaled = (values - low) / span
+        if not higher_is_better:
+            scaled = 1.0 - scaled
+    return np.where(finite, scaled, 0.0)
+
+
+# Column order of the feature matrix
+_FEATURES = ("distance", "rating", "delivery_time", "delivery_fee", "price_level", "lat", "lng")
+
+
+def _feature_matrix(options: List["ServiceOption"]) -> np.ndarray:
+    """
+    One Python pass over the options into an (n, 7) float matrix
+
+    Attribute access on the models is the dominant cost, so every field is
+    read exactly once; None becomes NaN.
+    """
+    nan = float("nan")
+    rows = []
+    append = rows.append
+    for option in options:
+        location = option.location
+        append((
+            nan if option.distance is None else option.distance,
+            nan if option.rating is None else option.rating,
+            nan if option.delivery_time is None else option.delivery_time,
+            nan if option.delivery_fee is None else option.delivery_fee,
+            nan if option.price_level is None else option.price_level,
+            location["lat"] if location else nan,
+            location["lng"] if location else nan,
+        ))
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(_FEATURES))
+
+
+def _distances(
+    features: np.ndarray,
+    origin: Optional[Dict[str, float]]
+) -> np.ndarray:
+    """Haversine distance where coordinates exist, else the provider's distance"""
+    reported = features[:, 0]
+    if not origin or origin.get("lat") is None or origin.get("lng") is None:
+        return reported
+
+    computed = haversine_km(origin, features[:, 5], features[:, 6])
+    return np.where(np.isfinite(computed), computed, reported)
+
+
+def score_options(
+    options: List["ServiceOption"],
+    origin: Optional[Dict[str, float]] = None,
+    weights: Optional[RankingWeights] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Score every option
+
+    Returns:
+        (scores, distances_km) aligned with options
+    """
+    weights = weights or RankingWeights()
+    features = _feature_matrix(options)
+    distances = _distances(features, origin)
+
+    scores = (
+        weights.distance * _normalize(distances, higher_is_better=False)
+        + weights.rating * _normalize(features[:, 1], higher_is_better=True)
+        + weights.eta * _normalize(features[:, 2], higher_is_better=False)
+        + weights.fee * _normalize(features[:, 3], higher_is_better=False)
+        + weights.price_level * _normalize(features[:, 4], higher_is_better=False)
+    )
+    return scores, distances
+
+
+def rank_options(
+    options: List["ServiceOption"],
+    origin: Optional[Dict[str, float]] = None,
+    weights: Optional[RankingWeights] = None,
+    limit: int = 10
+) -> List["ServiceOption"]:
+    """
+    Return the best `limit` options, best first
+    """
+    if not options or limit <= 0:
+        return []
+
+    scores, distances = score_options(options, origin, weights)
+
+    k = min(limit, len(options))
+    if k < len(options):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(options))
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    ranked = []
+    for index in top:
+        option = options[index]
+        if option.distance is None and np.isfinite(distances[index]):
+            option.distance = round(float(distances[index]), 2)
+        ranked.append(option)
+    return ranked
@@ -0,0 +1,448 @@
+"""
+Service Provider Resilience
+
+Per-provider circuit breaker and hedged requests.
+
+Every registered provider is wrapped in a ResilientProvider that keeps a
+rolling window of call outcomes and latencies. When the error rate in the
+window crosses the threshold the circuit opens and calls short-circuit to the
+last cached result (or an empty result) instead of waiting on a broken
+provider. After a cool-down a single probe call is let through (half-open);
+success closes the circuit again.
+
+Idempotent reads (search_options, get_details, get_order_status) can also be
+hedged: if the first attempt has not answered after the provider's observed
+p95 latency, a duplicate request is sent and whichever finishes first wins.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import registry
+from app.core.profiling import add_provider_time
+from app.services.service_provider import (
+    ServiceProvider,
+    ServiceCategory,
+    SearchCriteria,
+    ServiceOption,
+    ServiceDetails,
+    OrderRequest,
+    Order,
+    OrderStatusUpdate,
+)
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_LATENCY = registry.histogram(
+    "provider_call_duration_seconds",
+    "ServiceProvider call latency, hedges and timeouts included",
+    ("provider", "method", "outcome"),
+)
+
+
+class ProviderUnavailableError(Exception):
+    """Raised when a provider's circuit is open and no fallback exists"""
+
+    def __init__(self, provider_name: str, operation: str):
+        super().__init__(f"Provider {provider_name} is unavailable ({operation})")
+        self.provider_name = provider_name
+        self.operation = operation
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class RollingWindow:
+    """
+    Fixed-size window of recent call outcomes and latencies
+    """
+
+    def __init__(self, size: int):
+        self._calls: Deque[Tuple[bool, float]] = deque(maxlen=max(1, size))
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def record(self, success: bool, latency: float):
+        """Record a call outcome with its latency in seconds"""
+        self._calls.append((success, latency))
+
+    def clear(self):
+        self._calls.clear()
+
+    @property
+    def error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        failures = sum(1 for success, _ in self._calls if not success)
+        return failures / len(self._calls)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Latency percentile (0-100) over successful calls in the window"""
+        latencies = sorted(latency for success, latency in self._calls if success)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a rolling window of calls
+    """
+
+    def __init__(
+        self,
+        window_size: int = 50,
+        min_calls: int = 10,
+        error_rate_threshold: float = 0.5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = RollingWindow(window_size)
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self.state = CircuitState.CLOSED
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+        # Counters exposed as metrics
+        self.opened_count = 0
+        self.short_circuited_count = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through to the provider right now"""
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN:
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                self.state = CircuitState.HALF_OPEN
+                self._probe_in_flight = False
+            else:
+                self.short_circuited_count += 1
+                return False
+
+        # Half-open: let exactly one probe through
+        if self._probe_in_flight:
+            self.short_circuited_count += 1
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: float):
+        self.window.record(True, latency)
+        if self.state == CircuitState.HALF_OPEN:
+            self._close()
+
+    def record_failure(self, latency: float):
+        self.window.record(False, latency)
+        if self.state == CircuitState.HALF_OPEN:
+            self._open()
+        elif (
+            self.state == CircuitState.CLOSED
+            and len(self.window) >= self.min_calls
+            and self.window.error_rate >= self.error_rate_threshold
+        ):
+            self._open()
+
+    def release_probe(self):
+        """End a half-open probe that finished without an outcome (cancelled)"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _open(self):
+        self.state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self.opened_count += 1
+
+    def _close(self):
+        self.state = CircuitState.CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.window.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        p95 = self.window.latency_percentile(95)
+        return {
+            "state": self.state.value,
+            "window_calls": len(self.window),
+            "error_rate": round(self.window.error_rate, 4),
+            "p95_latency_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "opened_count": self.opened_count,
+            "short_circuited_count": self.short_circuited_count,
+        }
+
+
+class ResilientProvider(ServiceProvider):
+    """
+    Wraps a ServiceProvider with a circuit breaker, fallbacks and hedging
+    """
+
+    # Methods that are safe to send twice
+    HEDGEABLE_METHODS = ("search_options", "get_details", "get_order_status")
+
+    def __init__(
+        self,
+        provider: ServiceProvider,
+        breaker: Optional[CircuitBreaker] = None,
+        call_timeout: Optional[float] = None,
+        hedge_enabled: Optional[bool] = None,
+        hedge_min_delay: Optional[float] = None,
+        cache_size: int = 256,
+    ):
+        super().__init__(api_key=provider.api_key, config=provider.config)
+        self.provider = provider
+        self.breaker = breaker or CircuitBreaker(
+            window_size=settings.PROVIDER_BREAKER_WINDOW,
+            min_calls=settings.PROVIDER_BREAKER_MIN_CALLS,
+            error_rate_threshold=settings.PROVIDER_BREAKER_ERROR_RATE,
+            reset_timeout=settings.PROVIDER_BREAKER_RESET_SECONDS,
+        )
+        self.call_timeout = (
+            call_timeout if call_timeout is not None else settings.PROVIDER_CALL_TIMEOUT_SECONDS
+        )
+        self.hedge_enabled = (
+            hedge_enabled if hedge_enabled is not None else settings.PROVIDER_HEDGE_ENABLED
+        )
+        self.hedge_min_delay = (
+            hedge_min_delay
+            if hedge_min_delay is not None
+            else settings.PROVIDER_HEDGE_MIN_DELAY_MS / 1000
+        )
+
+        # Per-method latency windows drive the hedge delay
+        self._latencies: Dict[str, RollingWindow] = {
+            method: RollingWindow(settings.PROVIDER_BREAKER_WINDOW)
+            for method in self.HEDGEABLE_METHODS
+        }
+
+        # Last good result per (method, key), served while the circuit is open
+        self._cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._cache_size = cache_size
+
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.fallbacks_served = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider.provider_name
+
+    @property
+    def supported_categories(self) -> List[ServiceCategory]:
+        return self.provider.supported_categories
+
+    # ------------------------------------------------------------------
+    # Provider interface
+    # ------------------------------------------------------------------
+
+    async def search_options(self, criteria: SearchCriteria) -> List[ServiceOption]:
+        return await self._read(
+            "search_options",
+            criteria.model_dump_json(),
+            lambda: self.provider.search_options(criteria),
+            default=[],
+        )
+
+    async def get_details(self, service_id: str) -> ServiceDetails:
+        return await self._read(
+            "get_details",
+            service_id,
+            lambda: self.provider.get_details(service_id),
+        )
+
+    async def get_order_status(self, order_id: str) -> OrderStatusUpdate:
+        return await self._read(
+            "get_order_status",
+            order_id,
+            lambda: self.provider.get_order_status(order_id),
+        )
+
+    async def place_order(self, request: OrderRequest) -> Order:
+        return await self._write("place_order", lambda: self.provider.place_order(request))
+
+    async def cancel_order(self, order_id: str) -> bool:
+        return await self._write("cancel_order", lambda: self.provider.cancel_order(order_id))
+
+    async def estimate_cost(
+        self,
+        service_id: str,
+        items: List[Dict[str, Any]],
+        delivery_address: Dict[str, Any]
+    ) -> Dict[str, float]:
+        return await self._measured(
+            "estimate_cost",
+            lambda: self.provider.estimate_cost(service_id, items, delivery_address),
+        )
+
+    async def validate_delivery_address(
+        self,
+        address: Dict[str, Any]
+    ) -> tuple[bool, Optional[str]]:
+        return await self._measured(
+            "validate_delivery_address",
+            lambda: self.provider.validate_delivery_address(address),
+        )
+
+    # ------------------------------------------------------------------
+    # Call plumbing
+    # ------------------------------------------------------------------
+
+    async def _read(
+        self,
+        method: str,
+        cache_key: str,
+        call: Callable[[], Awaitable[Any]],
+        default: Any = None,
+    ) -> Any:
+        """Breaker-guarded, hedged read with cached/empty fallback"""
+        if not self.breaker.allow_request():
+            return self._fallback(method, cache_key, default)
+
+        try:
+            result = await self._timed(method, lambda: self._hedged(method, call))
+        except Exception as exc:
+            logger.warning(f"{self.provider_name}.{method} failed: {exc}")
+            return self._fallback(method, cache_key, default, cause=exc)
+
+        self._remember(method, cache_key, result)
+        return result
+
+    async def _write(self, method: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Breaker-guarded, non-hedged call; failures propagate"""
+        if not self.breaker.allow_request():
+            raise ProviderUnavailableError(self.provider_name, method)
+        return await self._timed(method, call)
+
+    async def _timed(self, method: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a call under the timeout and feed the outcome to the breaker"""
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call(), timeout=self.call_timeout)
+        except Exception:
+            latency = time.perf_counter() - started
+            self.breaker.record_failure(latency)
+            PROVIDER_LATENCY.observe((self.provider_name, method, "error"), latency)
+            add_provider_time(latency)
+            raise
+        finally:
+            # A cancelled probe records nothing; without this the breaker
+            # would stay half-open with the probe slot taken
+            self.breaker.release_probe()
+
+        latency = time.perf_counter() - started
+        self.breaker.record_success(latency)
+        PROVIDER_LATENCY.observe((self.provider_name, method, "ok"), latency)
+        add_provider_time(latency)
+        if method in self._latencies:
+            self._latencies[method].record(True, latency)
+        return result
+
+    async def _measured(self, method: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Record latency for calls that bypass the breaker"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await call()
+            outcome = "ok"
+            return result
+        finally:
+            latency = time.perf_counter() - started
+            PROVIDER_LATENCY.observe((self.provider_name, method, outcome), latency)
+            add_provider_time(latency)
+
+    def _hedge_delay(self, method: str) -> Optional[float]:
+        """p95 latency of recent successful calls, once enough are observed"""
+        if not self.hedge_enabled:
+            return None
+        window = self._latencies[method]
+        if len(window) < self.breaker.min_calls:
+            return None
+        p95 = window.latency_percentile(95)
+        if p95 is None:
+            return None
+        return max(p95, self.hedge_min_delay)
+
+    async def _hedged(self, method: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Send a duplicate request if the first is slower than p95"""
+        delay = self._hedge_delay(method)
+        if delay is None:
+            return await call()
+
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            hedge = asyncio.ensure_future(call())
+            tasks.append(hedge)
+            self.hedges_sent += 1
+            pending = {primary, hedge}
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            # Also runs when the caller is cancelled mid-wait: no call outlives it
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def _remember(self, method: str, cache_key: str, result: Any):
+        key = (method, cache_key)
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _fallback(
+        self,
+        method: str,
+        cache_key: str,
+        default: Any,
+        cause: Optional[BaseException] = None,
+    ) -> Any:
+        cached = self._cache.get((method, cache_key))
+        if cached is not None:
+            self.fallbacks_served += 1
+            return cached
+        if default is not None:
+            self.fallbacks_served += 1
+            return default
+        raise ProviderUnavailableError(self.provider_name, method) from cause
+
+    def metrics(self) -> Dict[str, Any]:
+        """Breaker state and hedging counters for this provider"""
+        data = self.breaker.metrics()
+        data.update({
+            "provider": self.provider_name,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "fallbacks_served": self.fallbacks_served,
+            "cached_results": len(self._cache),
+        })
+        return data
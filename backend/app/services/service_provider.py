@@ -5,12 +5,16 @@ Universal adapter pattern for integrating various service providers
 (UberEats, DoorDash, Uber, Lyft, TaskRabbit, etc.)
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
 
+from app.core.metrics import registry
+from app.services.ranking import RankingWeights, rank_options
+
 
 class ServiceCategory(str, Enum):
     """Service categories"""
@@ -26,7 +30,7 @@ class ServiceCategory(str, Enum):
 class SearchCriteria(BaseModel):
     """Criteria for searching services"""
     category: ServiceCategory
-    location: Dict[str, float]  # {"lat": 37.7749, "lng": -122.4194}
+    location: Optional[Dict[str, float]] = None  # {"lat": 37.7749, "lng": -122.4194}
     query: Optional[str] = None  # "pizza", "italian", etc.
     filters: Dict[str, Any] = Field(default_factory=dict)  # price_range, rating, etc.
     limit: int = 10
@@ -46,7 +50,8 @@ class ServiceOption(BaseModel):
     delivery_fee: Optional[float] = None
     minimum_order: Optional[float] = None
     tags: List[str] = Field(default_factory=list)
-    distance: Optional[float] = None  # miles/km
+    distance: Optional[float] = None  # km
+    location: Optional[Dict[str, float]] = None  # {"lat": ..., "lng": ...}
     available: bool = True
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
@@ -230,9 +235,14 @@ class ServiceProviderRegistry:
     
     def __init__(self):
         self._providers: Dict[str, ServiceProvider] = {}
+        self.ranking_weights = RankingWeights()
     
     def register(self, provider: ServiceProvider):
-        """Register a service provider"""
+        """Register a service provider behind a circuit breaker"""
+        from app.services.resilience import ResilientProvider
+
+        if not isinstance(provider, ResilientProvider):
+            provider = ResilientProvider(provider)
         self._providers[provider.provider_name] = provider
     
     def get_provider(self, provider_name: str) -> Optional[ServiceProvider]:
@@ -261,23 +271,32 @@ class ServiceProviderRegistry:
         providers = self.get_providers_for_category(criteria.category)
         results = {}
         
-        for provider in providers:
-            try:
-                options = await provider.search_options(criteria)
-                results[provider.provider_name] = options
-            except Exception as e:
+        # Query providers concurrently; a slow one no longer delays the rest
+        outcomes = await asyncio.gather(
+            *(provider.search_options(criteria) for provider in providers),
+            return_exceptions=True
+        )
+        
+        for provider, outcome in zip(providers, outcomes):
+            if isinstance(outcome, Exception):
                 # Log error but continue with other providers
-                print(f"Error searching {provider.provider_name}: {e}")
+                print(f"Error searching {provider.provider_name}: {outcome}")
                 results[provider.provider_name] = []
+            else:
+                results[provider.provider_name] = outcome
         
         return results
     
     async def aggregate_search_results(
         self, 
-        criteria: SearchCriteria
+        criteria: SearchCriteria,
+        weights: Optional[RankingWeights] = None
     ) -> List[ServiceOption]:
         """
-        Search all providers and return aggregated sorted results
+        Search all providers and return the top ranked results
+        
+        Options are scored on distance, rating, ETA, fee and price level
+        (see app.services.ranking) using `weights` or the registry defaults.
         """
         results = await self.search_all_providers(criteria)
         
@@ -286,16 +305,39 @@ class ServiceProviderRegistry:
         for provider_results in results.values():
             all_options.extend(provider_results)
         
-        # Sort by rating and delivery time
-        all_options.sort(
-            key=lambda x: (
-                -(x.rating or 0),  # Higher rating first
-                x.delivery_time or 999  # Faster delivery first
-            )
+        return rank_options(
+            all_options,
+            origin=criteria.location,
+            weights=weights or self.ranking_weights,
+            limit=criteria.limit
         )
-        
-        return all_options[:criteria.limit]
+    
+    def get_provider_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state and call counters per provider"""
+        return {
+            name: provider.metrics()
+            for name, provider in self._providers.items()
+            if hasattr(provider, "metrics")
+        }
 
 
 # Global registry instance
 service_registry = ServiceProviderRegistry()
+
+
+def _breaker_states():
+    """One sample per provider and breaker state; 1 marks the current state"""
+    for name, provider in list(service_registry._providers.items()):
+        if not hasattr(provider, "breaker"):
+            continue
+        current = provider.breaker.state.value
+        for state in ("closed", "open", "half_open"):
+            yield (name, state), 1 if state == current else 0
+
+
+registry.gauge_callback(
+    "provider_circuit_state",
+    "Circuit breaker state per provider",
+    ("provider", "state"),
+    _breaker_states,
+)
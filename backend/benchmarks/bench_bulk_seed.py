@@ -0,0 +1,141 @@
+"""
+Benchmark: seeding listings with bulk_create vs. one create() per document
+
+The per-document baseline is measured on a sample and extrapolated; the bulk
+path seeds the full count in calls of --batch documents (ordered and
+unordered), including the facet counter maintenance CRUDListing does.
+
+After seeding, one --batch of the seeded listings goes through bulk_update,
+bulk_inc, bulk_upsert (half of them read back with their timestamps, half
+new) and bulk_delete; each call's BulkResult is checked against what it
+should have touched.
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.bench_bulk_seed
+    python -m benchmarks.bench_bulk_seed --mongomock --count 20000   # smoke run only
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from app.config import settings
+from app.crud.base import BulkResult
+from app.crud.listing import CRUDListing
+
+BENCH_DATABASE = "zero_world_bench"
+CATEGORIES = ["Sports", "Electronics", "Books", "Furniture", "Clothing", "Toys", "Garden", "Cars"]
+
+
+def listings(count: int, seed_value: int = 7) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed_value)
+    for i in range(count):
+        yield {
+            "title": f"Listing {i}",
+            "description": "Benchmark listing description",
+            "price": round(rng.lognormvariate(4, 1.2), 2),
+            "category": rng.choice(CATEGORIES),
+            "location": "Cape Town",
+            "owner_id": f"user_{i % 500}",
+            "is_active": True,
+            "view_count": 0,
+        }
+
+
+def seed_one_by_one(crud: CRUDListing, count: int) -> float:
+    started = time.perf_counter()
+    for listing in listings(count):
+        crud.create(obj_in=listing)
+    return time.perf_counter() - started
+
+
+def seed_bulk(crud: CRUDListing, count: int, batch: int, ordered: bool) -> float:
+    started = time.perf_counter()
+    pending: List[Dict[str, Any]] = []
+    for listing in listings(count):
+        pending.append(listing)
+        if len(pending) == batch:
+            crud.bulk_create(pending, ordered=ordered)
+            pending = []
+    if pending:
+        crud.bulk_create(pending, ordered=ordered)
+    return time.perf_counter() - started
+
+
+def check(name: str, result: BulkResult, expected: Dict[str, int]) -> None:
+    if result.errors:
+        raise AssertionError(f"{name}: {len(result.errors)} errors, first: {result.errors[0]}")
+    for field, count in expected.items():
+        if getattr(result, field) != count:
+            raise AssertionError(f"{name}: {field}={getattr(result, field)}, expected {count}")
+
+
+def maintain_bulk(crud: CRUDListing, batch: int) -> List[Tuple[str, int, float]]:
+    """Time and check the other bulk methods on `batch` seeded listings."""
+    existing = list(crud.collection.find({}).limit(batch))
+    ids = [listing["_id"] for listing in existing]
+    half = len(existing) // 2
+    new_listings = list(listings(len(existing) - half, seed_value=11))
+    for index, listing in enumerate(new_listings):
+        listing["_id"] = f"bulk-upsert-{index}"
+    # Read-back documents carry created_at/updated_at into the upsert
+    upserts = [{**listing, "price": 1.0} for listing in existing[:half]] + new_listings
+
+    steps: List[Tuple[str, Callable[[], BulkResult], Dict[str, int]]] = [
+        ("bulk_update", lambda: crud.bulk_update([{"_id": i, "is_active": False} for i in ids]),
+         {"matched": len(ids)}),
+        ("bulk_inc", lambda: crud.bulk_inc({i: {"view_count": 1} for i in ids}),
+         {"matched": len(ids), "modified": len(ids)}),
+        ("bulk_upsert", lambda: crud.bulk_upsert(upserts),
+         {"matched": half, "upserted": len(new_listings)}),
+        ("bulk_delete", lambda: crud.bulk_delete(ids + [listing["_id"] for listing in new_listings]),
+         {"deleted": len(ids) + len(new_listings)}),
+    ]
+    timings = []
+    for name, run, expected in steps:
+        started = time.perf_counter()
+        result = run()
+        timings.append((name, len(ids), time.perf_counter() - started))
+        check(name, result, expected)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=5_000, help="Documents for the per-document baseline")
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(settings.get_mongodb_connection_string())
+
+    database = client[BENCH_DATABASE]
+    crud = CRUDListing(database["listings"])
+
+    print(f"{'approach':<22} {'documents':>10} {'seconds':>10} {'docs/s':>12}")
+    runs = (
+        ("create() per doc", args.sample, lambda: seed_one_by_one(crud, args.sample)),
+        ("bulk_create ordered", args.count, lambda: seed_bulk(crud, args.count, args.batch, True)),
+        ("bulk_create unordered", args.count, lambda: seed_bulk(crud, args.count, args.batch, False)),
+    )
+    for name, count, run in runs:
+        client.drop_database(BENCH_DATABASE)
+        seconds = run()
+        print(f"{name:<22} {count:>10} {seconds:>10.2f} {count / seconds:>12.0f}")
+
+    for name, count, seconds in maintain_bulk(crud, args.batch):
+        print(f"{name:<22} {count:>10} {seconds:>10.2f} {count / seconds:>12.0f}")
+
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
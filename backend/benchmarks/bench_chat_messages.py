@@ -0,0 +1,118 @@
+"""
+Benchmark: message send throughput, fused pipeline vs. read-check-write
+
+The legacy path is what CRUDMessage.create_message did before: a participant
+lookup, the insert, then a find plus update for the chat's last message. The
+fused path is the current one: one filtered chat update plus the insert.
+Each worker thread sends to its own chats, so the numbers are messages/s per
+worker with --workers of them running at once.
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.bench_chat_messages
+    python -m benchmarks.bench_chat_messages --mongomock --messages 2000   # smoke run only
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List
+from uuid import uuid4
+
+from app.config import settings
+from app.crud.chat import CRUDChat, CRUDMessage
+from app.schemas.chat import MessageCreate
+
+BENCH_DATABASE = "zero_world_bench"
+
+
+def legacy_send(messages: CRUDMessage, chat_id: str, sender_id: str, content: str):
+    chats = messages.chat_crud.collection
+    chat = chats.find_one({"_id": chat_id})
+    if chat is None or sender_id not in chat["participants"]:
+        return None
+    now = datetime.utcnow()
+    message = {
+        "_id": str(uuid4()),
+        "chat_id": chat_id,
+        "sender_id": sender_id,
+        "content": content,
+        "is_read": False,
+        "edited_at": None,
+        "created_at": now,
+        "updated_at": None,
+    }
+    messages.collection.insert_one(message)
+    if chats.find_one({"_id": chat_id}):
+        chats.update_one(
+            {"_id": chat_id},
+            {"$set": {"last_message": content, "last_message_at": now, "updated_at": now}}
+        )
+    return message
+
+
+def fused_send(messages: CRUDMessage, chat_id: str, sender_id: str, content: str):
+    return messages.create_message(
+        message_in=MessageCreate(content=content), chat_id=chat_id, sender_id=sender_id
+    )
+
+
+def run_workers(send: Callable, messages: CRUDMessage, chat_ids: List[str], count: int, workers: int) -> List[float]:
+    rates: List[float] = []
+    lock = threading.Lock()
+
+    def worker(index: int):
+        chat_id = chat_ids[index]
+        started = time.perf_counter()
+        for i in range(count):
+            send(messages, chat_id, f"user_{index}", f"message {i}")
+        rate = count / (time.perf_counter() - started)
+        with lock:
+            rates.append(rate)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20_000, help="Messages per worker")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(settings.get_mongodb_connection_string())
+
+    print(f"{args.workers} workers x {args.messages} messages")
+    print(f"{'approach':<10} {'msg/s per worker':>18} {'msg/s total':>12} {'round trips':>12}")
+    for name, send, trips in (("legacy", legacy_send, 4), ("fused", fused_send, 2)):
+        client.drop_database(BENCH_DATABASE)
+        database = client[BENCH_DATABASE]
+        database["messages"].create_index([("chat_id", 1), ("created_at", 1)])
+        chat_crud = CRUDChat(database["chats"])
+        chat_crud.collection.create_index("participants_hash", unique=True)
+        messages = CRUDMessage(database["messages"], chat_crud)
+        chat_ids = [
+            chat_crud.open_chat(participants=[f"user_{i}", f"peer_{i}"])[0]["_id"]
+            for i in range(args.workers)
+        ]
+
+        rates = run_workers(send, messages, chat_ids, args.messages, args.workers)
+        per_worker = sum(rates) / len(rates)
+        print(f"{name:<10} {per_worker:>18.0f} {sum(rates):>12.0f} {trips:>12}")
+
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: response compression, bytes saved vs. CPU per encoding and level
+
+Renders the 100-item list pages of bench_serialization (listings, messages,
+posts, concierge services) exactly as the routes do, then compresses each
+body with every available encoder (app.core.compression) at several levels.
+For each it reports the compressed size, the median time to compress one
+body, and the bytes saved per millisecond of CPU; the last is what the
+COMPRESSION_*_LEVEL defaults were picked by. Decompression is client-side
+and not measured.
+
+brotli and zstd rows only appear when those modules are installed.
+
+Run from backend/:
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --items 20 --rounds 500
+"""
+
+import argparse
+import gzip
+import statistics
+import time
+from typing import Dict, List
+
+from app.core.compression import ENCODERS
+from app.core.responses import ModelListResponse, ORJSONResponse
+from app.schemas.chat import MessagePublic
+from app.schemas.community import CommunityPostPublic
+from app.schemas.listing import ListingPublic
+from benchmarks.bench_serialization import PAGES, make_documents
+
+LEVELS = {
+    "gzip": [1, 3, 5, 6, 9],
+    "br": [1, 3, 4, 5, 9, 11],
+    "zstd": [1, 3, 6, 9, 19],
+}
+
+
+def render_pages(items: int) -> Dict[str, bytes]:
+    documents = make_documents(items)
+    services = documents["services"]
+    return {
+        "listings": ModelListResponse(ListingPublic, documents["listings"]).body,
+        "messages": ModelListResponse(MessagePublic, documents["messages"]).body,
+        "posts": ModelListResponse(CommunityPostPublic, documents["posts"]).body,
+        "services": ORJSONResponse({"results": services, "total": len(services)}).body,
+    }
+
+
+def compress(encoding: str, level: int, body: bytes) -> bytes:
+    encoder = ENCODERS[encoding](level)
+    return encoder.compress(body) + encoder.finish()
+
+
+def compress_seconds(encoding: str, level: int, body: bytes, rounds: int) -> List[float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        compress(encoding, level, body)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100, help="documents per page")
+    parser.add_argument("--rounds", type=int, default=200, help="compressions per page and level")
+    args = parser.parse_args()
+
+    pages = render_pages(args.items)
+    assert gzip.decompress(compress("gzip", 6, pages["listings"])) == pages["listings"]
+    missing = sorted(set(LEVELS) - set(ENCODERS))
+
+    print(f"{args.items} items per page, {args.rounds} rounds per page and level")
+    if missing:
+        print(f"not installed: {', '.join(missing)}")
+    for page in PAGES:
+        body = pages[page]
+        print()
+        print(f"{page}: {len(body)} bytes")
+        print(f"{'encoding':<10} {'level':>5} {'bytes':>8} {'ratio':>6} {'p50 (us)':>9} {'saved/ms':>9}")
+        for encoding in ENCODERS:
+            for level in LEVELS[encoding]:
+                size = len(compress(encoding, level, body))
+                seconds = statistics.median(compress_seconds(encoding, level, body, args.rounds))
+                saved_per_ms = (len(body) - size) / (seconds * 1e3)
+                print(f"{encoding:<10} {level:>5} {size:>8} {len(body) / size:>5.1f}x "
+                      f"{seconds * 1e6:>9.1f} {saved_per_ms:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Benchmark: pure-Python concierge hot paths, time and allocations
+
+Every concierge message runs _extract_intent_simple,
+ConversationStateMachine.handle_user_input (which goes through
+ConversationState.add_history/collect_data and advance_stage), and service
+searches run ServiceProviderRegistry.aggregate_search_results. Each case
+times these at a realistic size and at adversarial ones: long histories,
+many extracted fields, many providers, large catalogs.
+
+Cases run in the style of pytest-benchmark: a fresh fixture per round
+(built outside the timer), a fixed number of calls per round, and min /
+median / mean / stddev per call over the rounds. A separate pass under
+tracemalloc records the peak and the retained bytes per call.
+
+With --baseline the medians and peak allocations are compared against a
+stored run; anything over --tolerance is listed and the exit status is 1.
+Time baselines are only comparable on the same machine; allocations mostly
+depend on the Python and pydantic versions.
+
+Run from backend/:
+    python -m benchmarks.bench_concierge_hotpaths
+    python -m benchmarks.bench_concierge_hotpaths -k history --rounds 50
+    python -m benchmarks.bench_concierge_hotpaths --baseline benchmarks/baselines/concierge_hotpaths.json
+    python -m benchmarks.bench_concierge_hotpaths --save-baseline benchmarks/baselines/concierge_hotpaths.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from app.routers.concierge import _extract_intent_simple
+from app.services.conversation_state import (
+    ConversationStage,
+    ConversationState,
+    ConversationStateMachine,
+    ServiceType,
+)
+from app.services.service_provider import (
+    SearchCriteria,
+    ServiceCategory,
+    ServiceOption,
+    ServiceProvider,
+    ServiceProviderRegistry,
+)
+
+ORIGIN = {"lat": 37.7749, "lng": -122.4194}
+FOOD_DATA = {
+    "restaurant_id": "rest_1",
+    "items": [{"id": "item_1", "quantity": 2}],
+    "customizations": {"item_1": "no onions"},
+    "delivery_address": {"street": "1 Main Rd", "city": "Cape Town"},
+    "delivery_time": "now",
+    "payment_method_id": "pm_1",
+}
+
+
+class Case(NamedTuple):
+    name: str
+    # Builds a fresh fixture and returns the call to measure
+    make: Callable[[], Callable[[], Any]]
+    calls: int  # calls per round
+
+
+def conversation(history: int = 0, collected: int = 0) -> ConversationState:
+    state = ConversationState(user_id="bench-user", session_id="bench-session")
+    state.service_type = ServiceType.FOOD_DELIVERY
+    for i in range(collected):
+        state.collected_data[f"field_{i}"] = i
+    state.history = [
+        {"timestamp": "2024-01-01T00:00:00", "event": "user_input", "stage": state.stage,
+         "data": {"message": f"message {i}", "extracted": {}}}
+        for i in range(history)
+    ]
+    return state
+
+
+def extract_case(message: str):
+    def make():
+        return lambda: _extract_intent_simple(message)
+    return make
+
+
+def add_history_case(history: int):
+    def make():
+        state = conversation(history=history)
+        return lambda: state.add_history("user_input", {"message": "two pizzas please", "extracted": {}})
+    return make
+
+
+def collect_data_case(collected: int, value: Any):
+    def make():
+        state = conversation(collected=collected)
+        return lambda: state.collect_data("items", value)
+    return make
+
+
+def advance_stage_case(complete: bool):
+    def make():
+        machine = ConversationStateMachine()
+        state = conversation()
+        if complete:
+            state.collected_data.update(FOOD_DATA)
+
+        def call():
+            state.stage = ConversationStage.ITEM_SELECTION
+            machine.advance_stage(state)
+        return call
+    return make
+
+
+def handle_input_case(history: int, fields: int):
+    def make():
+        machine = ConversationStateMachine()
+        state = conversation(history=history)
+        extracted = {"service_type": ServiceType.FOOD_DELIVERY, "food_type": "pizza"}
+        extracted.update({f"entity_{i}": f"value {i}" for i in range(fields)})
+        return lambda: machine.handle_user_input(state, "I want two large pizzas", extracted)
+    return make
+
+
+class CatalogProvider(ServiceProvider):
+    """Answers searches from a fixed in-memory catalog, without awaiting."""
+
+    def __init__(self, name: str, options: List[ServiceOption]):
+        super().__init__(api_key="bench")
+        self.name = name
+        self.options = options
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    @property
+    def supported_categories(self) -> List[ServiceCategory]:
+        return [ServiceCategory.FOOD]
+
+    async def search_options(self, criteria):
+        return self.options
+
+    async def get_details(self, service_id):
+        raise NotImplementedError
+
+    async def place_order(self, request):
+        raise NotImplementedError
+
+    async def get_order_status(self, order_id):
+        raise NotImplementedError
+
+    async def cancel_order(self, order_id):
+        raise NotImplementedError
+
+
+def catalog(provider: str, size: int, rng: random.Random) -> List[ServiceOption]:
+    return [
+        ServiceOption(
+            id=f"{provider}_{i}",
+            provider=provider,
+            name=f"Option {i}",
+            category="food",
+            rating=round(rng.uniform(3.0, 5.0), 1) if rng.random() > 0.05 else None,
+            price_level=rng.randint(1, 4),
+            delivery_time=rng.randint(10, 70),
+            delivery_fee=round(rng.uniform(0, 8), 2),
+            location={"lat": ORIGIN["lat"] + rng.uniform(-0.2, 0.2), "lng": ORIGIN["lng"] + rng.uniform(-0.2, 0.2)},
+        )
+        for i in range(size)
+    ]
+
+
+def aggregate_case(providers: int, size: int):
+    rng = random.Random(42)
+    catalogs = [catalog(f"provider_{p}", size, rng) for p in range(providers)]
+
+    def make():
+        registry = ServiceProviderRegistry()
+        for p, options in enumerate(catalogs):
+            registry.register(CatalogProvider(f"provider_{p}", options))
+        criteria = SearchCriteria(category=ServiceCategory.FOOD, location=ORIGIN, limit=10)
+        loop = asyncio.new_event_loop()
+
+        def call():
+            return loop.run_until_complete(registry.aggregate_search_results(criteria))
+        call.close = loop.close
+        return call
+    return make
+
+
+LONG_MESSAGE = " ".join(["please could you help me with something later today"] * 200)
+CASES = [
+    Case("extract_intent[short]", extract_case("I'm hungry, get me a pizza"), 1000),
+    Case("extract_intent[no-match]", extract_case("What is the weather like tomorrow?"), 1000),
+    Case("extract_intent[10kB no-match]", extract_case(LONG_MESSAGE), 100),
+    Case("add_history[empty]", add_history_case(0), 1000),
+    Case("add_history[10k events]", add_history_case(10_000), 1000),
+    Case("collect_data[small]", collect_data_case(5, [{"id": "item_1", "quantity": 2}]), 1000),
+    Case("collect_data[1k fields, 1k-item value]", collect_data_case(1000, list(range(1000))), 1000),
+    Case("advance_stage[missing data]", advance_stage_case(complete=False), 1000),
+    Case("advance_stage[complete]", advance_stage_case(complete=True), 1000),
+    Case("handle_user_input[2 fields]", handle_input_case(history=0, fields=0), 500),
+    Case("handle_user_input[10k history, 50 fields]", handle_input_case(history=10_000, fields=50), 100),
+    Case("aggregate_search[3 providers x 20]", aggregate_case(3, 20), 50),
+    Case("aggregate_search[20 providers x 50]", aggregate_case(20, 50), 20),
+    Case("aggregate_search[5 providers x 5k]", aggregate_case(5, 5000), 2),
+]
+
+
+def run_round(case: Case) -> float:
+    call = case.make()
+    try:
+        started = time.perf_counter()
+        for _ in range(case.calls):
+            call()
+        return (time.perf_counter() - started) / case.calls
+    finally:
+        getattr(call, "close", lambda: None)()
+
+
+def allocations(case: Case) -> Dict[str, float]:
+    call = case.make()
+    tracemalloc.start()
+    try:
+        call()  # first call allocates caches that later calls reuse
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(case.calls):
+            call()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        getattr(call, "close", lambda: None)()
+    return {
+        "peak_kib": round((peak - before) / 1024, 2),
+        "retained_b_per_call": round((after - before) / case.calls, 1),
+    }
+
+
+def measure(case: Case, rounds: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        run_round(case)
+    seconds = [run_round(case) for _ in range(rounds)]
+    return {
+        "rounds": rounds,
+        "calls_per_round": case.calls,
+        "min_us": round(min(seconds) * 1e6, 3),
+        "median_us": round(statistics.median(seconds) * 1e6, 3),
+        "mean_us": round(statistics.mean(seconds) * 1e6, 3),
+        "stddev_us": round(statistics.stdev(seconds) * 1e6, 3) if rounds > 1 else 0.0,
+        "ops_per_s": round(1 / statistics.median(seconds), 1),
+        **allocations(case),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for name, before in baseline["cases"].items():
+        now = results.get(name)
+        if now is None:
+            continue
+        if now["median_us"] > before["median_us"] * (1 + tolerance):
+            regressions.append(f"{name}: median {before['median_us']:.2f} -> {now['median_us']:.2f} us")
+        # Allocations are close to deterministic; ignore sub-KiB jitter
+        if now["peak_kib"] > before["peak_kib"] * (1 + tolerance) + 1:
+            regressions.append(f"{name}: peak {before['peak_kib']:.1f} -> {now['peak_kib']:.1f} KiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", dest="keyword", help="only cases whose name contains this")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--baseline", help="compare against these stored results")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if not args.keyword or args.keyword in case.name]
+    results = {}
+    print(f"{'case':<44} {'min (us)':>10} {'median (us)':>12} {'stddev':>9} {'ops/s':>11} "
+          f"{'peak (KiB)':>11} {'retained (B/call)':>18}")
+    for case in cases:
+        stats = results[case.name] = measure(case, args.rounds, args.warmup)
+        print(f"{case.name:<44} {stats['min_us']:>10.2f} {stats['median_us']:>12.2f} {stats['stddev_us']:>9.2f} "
+              f"{stats['ops_per_s']:>11.0f} {stats['peak_kib']:>11.1f} {stats['retained_b_per_call']:>18.1f}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "cases": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        for line in regressions:
+            print(f"  {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
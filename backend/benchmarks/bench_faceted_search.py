@@ -0,0 +1,111 @@
+"""
+Benchmark: single $facet listing search vs. separate queries
+
+The multi-query baseline is what the browse page did before: a page of
+results, a count, a category aggregation and one count per price bucket,
+each a separate round trip over the same filter.
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.bench_faceted_search
+    python -m benchmarks.bench_faceted_search --mongomock   # smoke run only
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from app.config import settings
+from app.crud.listing import CRUDListing, DEFAULT_PRICE_EDGES
+
+BENCH_DATABASE = "zero_world_bench"
+CATEGORIES = ["Sports", "Electronics", "Books", "Furniture", "Clothing", "Toys", "Garden", "Cars"]
+
+
+def seed(collection, count: int, seed_value: int = 7):
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    collection.drop()
+    batch = []
+    for i in range(count):
+        batch.append({
+            "_id": f"listing_{i}",
+            "title": f"Listing {i}",
+            "description": "Benchmark listing description",
+            "price": round(rng.lognormvariate(4, 1.2), 2),
+            "category": rng.choice(CATEGORIES),
+            "location": "Cape Town",
+            "owner_id": f"user_{i % 500}",
+            "is_active": rng.random() > 0.1,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": None,
+        })
+        if len(batch) == 1000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+    collection.create_index([("is_active", 1), ("created_at", -1)])
+
+
+def multi_query(crud: CRUDListing, min_price: float, max_price: float):
+    filter_dict = crud._active_filter(min_price=min_price, max_price=max_price)
+    crud.get_active_listings(limit=50, min_price=min_price, max_price=max_price)
+    crud.count(filter_dict)
+    crud.aggregate([
+        {"$match": filter_dict},
+        {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+    ])
+    for low, high in zip(DEFAULT_PRICE_EDGES, DEFAULT_PRICE_EDGES[1:]):
+        crud.count({**filter_dict, "price": {"$gte": max(low, min_price), "$lt": min(high, max_price)}})
+
+
+def faceted(crud: CRUDListing, min_price: float, max_price: float):
+    crud.faceted_search(limit=50, min_price=min_price, max_price=max_price)
+
+
+def timed(func: Callable, crud: CRUDListing, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(crud, 10, 800)
+        samples.append((time.perf_counter() - started) * 1000)
+    return sorted(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(settings.get_mongodb_connection_string())
+
+    collection = client[BENCH_DATABASE]["listings"]
+    seed(collection, args.count)
+    crud = CRUDListing(collection)
+
+    print(f"{args.count} listings, {args.repeat} runs each")
+    print(f"{'approach':<14} {'p50 (ms)':>10} {'p95 (ms)':>10} {'round trips':>12}")
+    for name, func, trips in (
+        ("multi-query", multi_query, 3 + len(DEFAULT_PRICE_EDGES) - 1),
+        ("$facet", faceted, 1),
+    ):
+        samples = timed(func, crud, args.repeat)
+        p50 = samples[len(samples) // 2]
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{name:<14} {p50:>10.2f} {p95:>10.2f} {trips:>12}")
+
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: message insert throughput and _id index size per id strategy
+
+Random uuid4 strings land all over the _id B-tree; uuid7 and ObjectId-hex
+ids are time-ordered and append at its right edge. The gap grows once the
+_id index no longer fits in cache, so use a --count well above that for
+realistic numbers.
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.bench_id_inserts
+    python -m benchmarks.bench_id_inserts --mongomock --count 20000   # smoke run only
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Optional
+
+from pymongo.errors import OperationFailure
+
+from app.config import settings
+from app.crud.ids import GENERATORS, new_ids, set_id_generator
+
+BENCH_DATABASE = "zero_world_bench"
+
+
+def id_index_mb(database, name: str) -> Optional[float]:
+    try:
+        stats = database.command("collStats", name)
+    except (OperationFailure, NotImplementedError, TypeError):
+        # mongomock has no collStats
+        return None
+    return stats.get("indexSizes", {}).get("_id_", 0) / 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(settings.get_mongodb_connection_string())
+
+    print(f"{args.count} messages, batches of {args.batch}")
+    print(f"{'ids':<10} {'seconds':>10} {'docs/s':>12} {'_id index (MB)':>16}")
+    for strategy in GENERATORS:
+        client.drop_database(BENCH_DATABASE)
+        database = client[BENCH_DATABASE]
+        messages = database["messages"]
+        messages.create_index([("chat_id", 1), ("created_at", 1)])
+        set_id_generator(strategy)
+
+        started = time.perf_counter()
+        for offset in range(0, args.count, args.batch):
+            size = min(args.batch, args.count - offset)
+            now = datetime.utcnow()
+            messages.insert_many([
+                {
+                    "_id": doc_id,
+                    "chat_id": f"chat_{(offset + i) % 5000}",
+                    "sender_id": f"user_{(offset + i) % 1000}",
+                    "content": "Is this still available?",
+                    "is_read": False,
+                    "created_at": now,
+                }
+                for i, doc_id in enumerate(new_ids(size))
+            ], ordered=False)
+        seconds = time.perf_counter() - started
+
+        index_mb = id_index_mb(database, "messages")
+        index_text = f"{index_mb:.1f}" if index_mb is not None else "n/a"
+        print(f"{strategy:<10} {seconds:>10.2f} {args.count / seconds:>12.0f} {index_text:>16}")
+
+    set_id_generator(settings.ID_STRATEGY)
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
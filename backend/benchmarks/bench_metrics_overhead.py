@@ -0,0 +1,151 @@
+"""
+Benchmark: request latency with and without the metrics middleware
+
+Builds two apps over the same routers and database, one bare and one with
+MetricsMiddleware and RequestContextMiddleware (as main.py installs them),
+and drives both in-process through ASGI, interleaving requests so drift hits
+both alike. The target is under 2% added at p50.
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.bench_metrics_overhead
+    python -m benchmarks.bench_metrics_overhead --mongomock
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.core.http_metrics import MetricsMiddleware
+from app.core.request_context import RequestContextMiddleware
+from app.crud.ids import new_ids
+from app.routers import community, listings
+
+BENCH_DATABASE = "zero_world_bench"
+ROUTES = ["/listings/?limit=20", "/listings/{id}", "/community/posts?limit=20"]
+
+
+def build_app(database, instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+        app.add_middleware(RequestContextMiddleware)
+    app.include_router(listings.router)
+    app.include_router(community.router)
+    app.database = database
+    return app
+
+
+def seed(database) -> str:
+    now = datetime.utcnow()
+    ids = new_ids(500)
+    database["listings"].insert_many([
+        {
+            "_id": listing_id,
+            "title": f"Listing {i}",
+            "description": "Metrics overhead listing",
+            "price": 10.0 + i,
+            "category": "Books",
+            "location": "Cape Town",
+            "owner_id": "bench-user",
+            "is_active": True,
+            "view_count": 0,
+            "created_at": now,
+            "updated_at": None,
+        }
+        for i, listing_id in enumerate(ids)
+    ])
+    database["community_posts"].insert_many([
+        {
+            "_id": post_id,
+            "title": f"Post {i}",
+            "content": "Metrics overhead post",
+            "tags": ["bench"],
+            "author_id": "bench-user",
+            "like_count": 0,
+            "comment_count": 0,
+            "created_at": now,
+        }
+        for i, post_id in enumerate(new_ids(200))
+    ])
+    return ids[0]
+
+
+async def request_seconds(app: FastAPI, target: str) -> float:
+    path, _, query = target.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+async def run(apps: Dict[str, FastAPI], targets: List[str], requests: int) -> Dict[str, Dict[str, List[float]]]:
+    timings = {name: {target: [] for target in targets} for name in apps}
+    for target in targets:
+        for _ in range(requests):
+            for name, app in apps.items():
+                timings[name][target].append(await request_seconds(app, target))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(settings.get_mongodb_connection_string())
+
+    client.drop_database(BENCH_DATABASE)
+    database = client[BENCH_DATABASE]
+    listing_id = seed(database)
+    targets = [route.replace("{id}", listing_id) for route in ROUTES]
+    apps = {"bare": build_app(database, False), "metrics": build_app(database, True)}
+
+    # Warm up both apps (route compilation, first connections)
+    asyncio.run(run(apps, targets, 50))
+    timings = asyncio.run(run(apps, targets, args.requests))
+
+    print(f"{args.requests} requests per route and app")
+    print(f"{'route':<28} {'bare p50 (ms)':>14} {'metrics p50 (ms)':>17} {'overhead':>9}")
+    for route, target in zip(ROUTES, targets):
+        bare = statistics.median(timings["bare"][target]) * 1000
+        instrumented = statistics.median(timings["metrics"][target]) * 1000
+        print(f"{route:<28} {bare:>14.3f} {instrumented:>17.3f} {(instrumented / bare - 1) * 100:>8.1f}%")
+
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
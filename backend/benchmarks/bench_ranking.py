@@ -0,0 +1,69 @@
+"""
+Benchmark: vectorized service option ranking vs. the old Python sort
+
+Run from backend/:
+    python -m benchmarks.bench_ranking
+"""
+
+import random
+import time
+from typing import List
+
+from app.services.ranking import rank_options
+from app.services.service_provider import ServiceOption
+
+ORIGIN = {"lat": 37.7749, "lng": -122.4194}
+SIZES = (1_000, 10_000, 50_000, 100_000)
+LIMIT = 10
+REPEAT = 5
+
+
+def make_options(count: int, seed: int = 42) -> List[ServiceOption]:
+    rng = random.Random(seed)
+    return [
+        ServiceOption(
+            id=f"opt_{i}",
+            provider=f"provider_{i % 8}",
+            name=f"Option {i}",
+            category="food",
+            rating=round(rng.uniform(3.0, 5.0), 1) if rng.random() > 0.05 else None,
+            price_level=rng.randint(1, 4),
+            delivery_time=rng.randint(10, 70),
+            delivery_fee=round(rng.uniform(0, 8), 2),
+            location={
+                "lat": ORIGIN["lat"] + rng.uniform(-0.2, 0.2),
+                "lng": ORIGIN["lng"] + rng.uniform(-0.2, 0.2),
+            },
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_sort(options: List[ServiceOption]) -> List[ServiceOption]:
+    ordered = sorted(
+        options,
+        key=lambda x: (-(x.rating or 0), x.delivery_time or 999)
+    )
+    return ordered[:LIMIT]
+
+
+def best_of(func, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    print(f"{'options':>10} {'legacy sort (ms)':>18} {'rank_options (ms)':>18}")
+    for size in SIZES:
+        options = make_options(size)
+        legacy = best_of(legacy_sort, options)
+        ranked = best_of(lambda opts: rank_options(opts, ORIGIN, limit=LIMIT), options)
+        print(f"{size:>10} {legacy * 1000:>18.2f} {ranked * 1000:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark: list response rendering, per-item models vs. ModelListResponse
+
+Serves the same 100-item pages two ways from one in-process app, so only
+the serialization differs (the documents are already in memory):
+
+- legacy: one pydantic model per document in the handler, then FastAPI
+  validates the list against response_model and encodes it
+- fast: ModelListResponse / ORJSONResponse (app.core.responses)
+
+Requests are interleaved and driven through ASGI, as in
+bench_metrics_overhead. The bodies of both variants are checked to be the
+same before timing.
+
+Run from backend/:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --items 500 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fastapi import FastAPI
+
+from app.core.responses import ModelListResponse, ORJSONResponse
+from app.schemas.chat import MessagePublic
+from app.schemas.community import CommunityPostPublic
+from app.schemas.listing import ListingPublic
+from benchmarks.bench_metrics_overhead import request_seconds
+from benchmarks.bench_ranking import make_options
+
+PAGES = ["listings", "messages", "posts", "services"]
+
+
+def make_documents(items: int) -> Dict[str, list]:
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    return {
+        "listings": [
+            {
+                "_id": f"listing-{i}",
+                "title": f"Listing {i}",
+                "description": "Lightly used, collection only. " * 4,
+                "price": round(rng.uniform(5, 2000), 2),
+                "category": "Books",
+                "location": "Cape Town",
+                "geo_location": {"type": "Point", "coordinates": [18.42, -33.92]},
+                "image_urls": [f"https://example.com/{i}/front.jpg", f"https://example.com/{i}/side.jpg"],
+                "owner_id": "bench-user",
+                "is_active": True,
+                "view_count": rng.randrange(500),
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": None,
+            }
+            for i in range(items)
+        ],
+        "messages": [
+            {
+                "_id": f"message-{i}",
+                "chat_id": "bench-chat",
+                "sender_id": ("bench-user", "other-user")[i % 2],
+                "content": "Is this still available? I can pick it up tomorrow.",
+                "is_read": True,
+                "created_at": now + timedelta(minutes=i),
+            }
+            for i in range(items)
+        ],
+        "posts": [
+            {
+                "_id": f"post-{i}",
+                "title": f"Post {i}",
+                "content": "Community garden clean-up this Saturday, bring gloves. " * 3,
+                "tags": ["events", "neighbourhood"],
+                "author_id": "bench-user",
+                "like_count": rng.randrange(50),
+                "comment_count": rng.randrange(20),
+                "created_at": now - timedelta(hours=i),
+            }
+            for i in range(items)
+        ],
+        "services": make_options(items),
+    }
+
+
+def build_app(documents: Dict[str, list]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy/listings", response_model=List[ListingPublic])
+    async def legacy_listings():
+        return [ListingPublic(**doc) for doc in documents["listings"]]
+
+    @app.get("/legacy/messages", response_model=List[MessagePublic])
+    async def legacy_messages():
+        return [MessagePublic(**doc) for doc in documents["messages"]]
+
+    @app.get("/legacy/posts", response_model=List[CommunityPostPublic])
+    async def legacy_posts():
+        return [CommunityPostPublic(**doc) for doc in documents["posts"]]
+
+    @app.get("/legacy/services")
+    async def legacy_services():
+        return {"results": documents["services"], "total": len(documents["services"])}
+
+    @app.get("/fast/listings", response_model=List[ListingPublic])
+    async def fast_listings():
+        return ModelListResponse(ListingPublic, documents["listings"])
+
+    @app.get("/fast/messages", response_model=List[MessagePublic])
+    async def fast_messages():
+        return ModelListResponse(MessagePublic, documents["messages"])
+
+    @app.get("/fast/posts", response_model=List[CommunityPostPublic])
+    async def fast_posts():
+        return ModelListResponse(CommunityPostPublic, documents["posts"])
+
+    @app.get("/fast/services")
+    async def fast_services():
+        return ORJSONResponse({"results": documents["services"], "total": len(documents["services"])})
+
+    return app
+
+
+async def response_body(app: FastAPI, path: str) -> bytes:
+    body = bytearray()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return bytes(body)
+
+
+async def run(app: FastAPI, requests: int) -> Dict[str, Dict[str, List[float]]]:
+    timings = {variant: {page: [] for page in PAGES} for variant in ("legacy", "fast")}
+    for page in PAGES:
+        for _ in range(requests):
+            for variant in timings:
+                timings[variant][page].append(await request_seconds(app, f"/{variant}/{page}"))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100, help="documents per page")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = build_app(make_documents(args.items))
+
+    async def check():
+        for page in PAGES:
+            legacy = json.loads(await response_body(app, f"/legacy/{page}"))
+            fast = json.loads(await response_body(app, f"/fast/{page}"))
+            assert legacy == fast, f"{page}: bodies differ"
+    asyncio.run(check())
+
+    asyncio.run(run(app, 50))
+    timings = asyncio.run(run(app, args.requests))
+
+    print(f"{args.items} items per page, {args.requests} requests per page and variant")
+    print(f"{'page':<10} {'legacy p50 (us)':>16} {'fast p50 (us)':>14} {'saved':>7}")
+    for page in PAGES:
+        legacy = statistics.median(timings["legacy"][page]) * 1e6
+        fast = statistics.median(timings["fast"][page]) * 1e6
+        print(f"{page:<10} {legacy:>16.1f} {fast:>14.1f} {(1 - fast / legacy) * 100:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: per-worker startup cost of index setup
+
+Compares the old boot path (apply the whole index registry on every worker
+start) with the schema version check workers do now. Each boot opens a
+fresh client, as a new uvicorn worker would.
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --mongomock   # smoke run only
+"""
+
+import argparse
+import statistics
+import time
+
+from app.config import settings
+from app.crud.indexes import apply_indexes
+from app.jobs.schema_migrations import SCHEMA_VERSION, applied_version, migrate
+
+BENCH_DATABASE = "zero_world_bench"
+
+
+def boot_ms(make_client, step) -> float:
+    started = time.perf_counter()
+    client = make_client()
+    # The first operation pays for the connection handshake in both paths
+    step(client[BENCH_DATABASE])
+    elapsed = (time.perf_counter() - started) * 1000
+    client.close()
+    return elapsed
+
+
+def version_check(database):
+    assert applied_version(database) >= SCHEMA_VERSION
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boots", type=int, default=20)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        shared = mongomock.MongoClient()
+        # mongomock clients do not share data, so reuse one and skip close()
+        shared.close = lambda: None
+        make_client = lambda: shared
+    else:
+        from pymongo import MongoClient
+        make_client = lambda: MongoClient(settings.get_mongodb_connection_string())
+
+    setup = make_client()
+    setup.drop_database(BENCH_DATABASE)
+    migrate(setup[BENCH_DATABASE])
+
+    print(f"{args.boots} worker boots against an already-migrated database")
+    print(f"{'startup':<22} {'p50 (ms)':>10} {'max (ms)':>10}")
+    for name, step in [("apply_indexes", apply_indexes), ("schema version check", version_check)]:
+        timings = [boot_ms(make_client, step) for _ in range(args.boots)]
+        print(f"{name:<22} {statistics.median(timings):>10.1f} {max(timings):>10.1f}")
+
+    setup.drop_database(BENCH_DATABASE)
+    setup.close()
+
+
+if __name__ == "__main__":
+    main()
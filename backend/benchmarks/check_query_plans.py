@@ -0,0 +1,227 @@
+"""
+Query plan check: every CRUD query shape must be served by an index
+
+Seeds a scratch database, applies the index registry, then runs each CRUD
+read/update path with a command listener attached. Every find, aggregate,
+findAndModify, update, delete and distinct the CRUD layer sent is re-run
+through explain(); a plan containing COLLSCAN or a blocking SORT stage fails
+the check (exit status 1).
+
+Needs a real mongod (mongomock has no explain). Run from backend/:
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.check_query_plans
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from bson import SON
+from pymongo import MongoClient, monitoring
+
+from app.config import settings
+from app.crud.ids import new_ids
+from app.crud.indexes import apply_indexes
+from app.crud.service import CRUDService
+from app.crud.trending import LISTINGS, CRUDTrending
+
+BENCH_DATABASE = "zero_world_plans"
+EXPLAINABLE = {"find", "aggregate", "findAndModify", "update", "delete", "distinct", "count"}
+# Wire-protocol fields explain() does not accept inside the explained command
+STRIPPED_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "writeConcern", "readConcern"}
+BAD_STAGES = {"COLLSCAN", "SORT"}
+CATEGORIES = ["Sports", "Electronics", "Books", "Furniture", "Clothing"]
+
+
+class CommandRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.recording = False
+        self.commands: List[Tuple[str, Dict[str, Any]]] = []
+
+    def started(self, event):
+        if self.recording and event.command_name in EXPLAINABLE:
+            command = {k: v for k, v in event.command.items() if k not in STRIPPED_FIELDS}
+            self.commands.append((event.command_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def seed(database, rng: random.Random):
+    now = datetime.utcnow()
+    user_ids = new_ids(200)
+    database["users"].insert_many([
+        {"_id": user_id, "name": f"User {i}", "email": f"user{i}@example.com", "created_at": now - timedelta(hours=i)}
+        for i, user_id in enumerate(user_ids)
+    ])
+    database["listings"].insert_many([
+        {
+            "_id": listing_id,
+            "title": f"Listing {i}",
+            "description": "Plan check listing",
+            "price": round(rng.uniform(1, 900), 2),
+            "category": rng.choice(CATEGORIES),
+            "location": "Cape Town",
+            "geo_location": {"type": "Point", "coordinates": [18.4 + rng.random() / 10, -33.9 + rng.random() / 10]},
+            "owner_id": rng.choice(user_ids),
+            "is_active": rng.random() > 0.1,
+            "view_count": rng.randint(0, 500),
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": None,
+        }
+        for i, listing_id in enumerate(new_ids(3000))
+    ])
+    chat_ids = new_ids(300)
+    database["chats"].insert_many([
+        {
+            "_id": chat_id,
+            "participants": sorted([user_ids[i % 200], user_ids[(i * 7 + 1) % 200]]),
+            "participants_hash": f"{chat_id}::hash",
+            "last_message_at": now - timedelta(minutes=i),
+            "last_message": "hi",
+            "created_at": now,
+        }
+        for i, chat_id in enumerate(chat_ids)
+    ])
+    database["messages"].insert_many([
+        {
+            "_id": message_id,
+            "chat_id": rng.choice(chat_ids),
+            "sender_id": rng.choice(user_ids),
+            "content": f"message {i}",
+            "is_read": rng.random() > 0.5,
+            "created_at": now - timedelta(seconds=i),
+        }
+        for i, message_id in enumerate(new_ids(6000))
+    ])
+    post_ids = new_ids(600)
+    database["community_posts"].insert_many([
+        {
+            "_id": post_id,
+            "title": f"Post {i}",
+            "content": "Plan check post",
+            "tags": rng.sample(["tips", "diy", "garden", "news", "events"], 2),
+            "author_id": rng.choice(user_ids),
+            "like_count": rng.randint(0, 100),
+            "comment_count": 0,
+            "is_pinned": i < 3,
+            "is_locked": False,
+            "created_at": now - timedelta(hours=i),
+        }
+        for i, post_id in enumerate(post_ids)
+    ])
+    database["community_comments"].insert_many([
+        {
+            "_id": comment_id,
+            "post_id": rng.choice(post_ids),
+            "author_id": rng.choice(user_ids),
+            "content": "Nice",
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i, comment_id in enumerate(new_ids(3000))
+    ])
+    return user_ids, chat_ids, post_ids
+
+
+def query_shapes(crud: CRUDService, trending: CRUDTrending, user_id: str, chat_id: str, post_id: str) -> List[Tuple[str, Callable]]:
+    listing_id = crud.listing.collection.find_one({"owner_id": user_id}, {"_id": 1})["_id"]
+    return [
+        ("user.get_by_email", lambda: crud.user.get_by_email("user3@example.com")),
+        ("user.get_active_users", lambda: crud.user.get_active_users(limit=20)),
+        ("user.search_users", lambda: crud.user.search_users(query="User 1")),
+        ("listing.get_active_listings", lambda: crud.listing.get_active_listings(limit=20)),
+        ("listing.get_active_listings(category)", lambda: crud.listing.get_active_listings(category="Books", limit=20)),
+        ("listing.get_active_listings(price)", lambda: crud.listing.get_active_listings(min_price=10, max_price=100)),
+        ("listing.get_listings_near", lambda: crud.listing.get_listings_near(lat=-33.85, lng=18.45, radius_km=5)),
+        ("listing.faceted_search", lambda: crud.listing.faceted_search(limit=20, min_price=5)),
+        ("listing.get_user_listings", lambda: crud.listing.get_user_listings(owner_id=user_id)),
+        ("listing.search_listings", lambda: crud.listing.search_listings(query="Listing 12")),
+        ("listing.get_popular_listings", lambda: crud.listing.get_popular_listings(limit=10)),
+        ("listing.get_recent_listings", lambda: crud.listing.get_recent_listings(limit=10)),
+        ("listing.get_listings_by_category", lambda: crud.listing.get_listings_by_category(category="Books")),
+        ("listing.get_category_counts", lambda: crud.listing.get_category_counts()),
+        ("listing.increment_view_count", lambda: crud.listing.increment_view_count(listing_id=listing_id)),
+        ("listing.deactivate_listing", lambda: crud.listing.deactivate_listing(listing_id=listing_id, owner_id=user_id)),
+        ("chat.get_user_chats", lambda: crud.chat.get_user_chats(user_id=user_id)),
+        ("chat.is_participant", lambda: crud.chat.is_participant(chat_id=chat_id, user_id=user_id)),
+        ("message.get_chat_messages", lambda: crud.message.get_chat_messages(chat_id=chat_id, user_id=user_id)),
+        ("message.get_unread_count", lambda: crud.message.get_unread_count(user_id=user_id)),
+        ("message.search_messages", lambda: crud.message.search_messages(chat_id=chat_id, query="1", user_id=user_id)),
+        ("message.mark_chat_messages_as_read", lambda: crud.message.mark_chat_messages_as_read(chat_id=chat_id, user_id=user_id)),
+        ("community_post.get_posts", lambda: crud.community_post.get_posts(limit=20)),
+        ("community_post.get_posts(author)", lambda: crud.community_post.get_posts(author_id=user_id)),
+        ("community_post.get_posts_by_tag", lambda: crud.community_post.get_posts_by_tag(tag="diy")),
+        ("community_post.search_posts", lambda: crud.community_post.search_posts(query="Post 4")),
+        ("community_post.get_popular_posts", lambda: crud.community_post.get_popular_posts(limit=10)),
+        ("community_post.get_pinned_posts", lambda: crud.community_post.get_pinned_posts()),
+        ("community_post.get_tag_counts", lambda: crud.community_post.get_tag_counts()),
+        ("community_comment.get_post_comments", lambda: crud.community_comment.get_post_comments(post_id=post_id)),
+        ("community_comment.get_user_comments", lambda: crud.community_comment.get_user_comments(author_id=user_id)),
+        ("trending.refresh", lambda: trending.refresh(kind=LISTINGS)),
+    ]
+
+
+def bad_stages(node: Any) -> List[str]:
+    """Blocking stages anywhere in a winning plan (rejected plans are skipped)."""
+    found: List[str] = []
+    if isinstance(node, dict):
+        if node.get("stage") in BAD_STAGES:
+            found.append(node["stage"])
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                found.extend(bad_stages(value))
+    elif isinstance(node, list):
+        for item in node:
+            found.extend(bad_stages(item))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    recorder = CommandRecorder()
+    client = MongoClient(settings.get_mongodb_connection_string(), event_listeners=[recorder])
+    client.drop_database(BENCH_DATABASE)
+    database = client[BENCH_DATABASE]
+
+    user_ids, chat_ids, post_ids = seed(database, random.Random(args.seed))
+    apply_indexes(database)
+    crud = CRUDService(database)
+    trending = CRUDTrending.for_database(database)
+    # Seed the facet counters first: the one-off rebuild scan is not a query shape
+    crud.listing.get_category_counts()
+    crud.community_post.get_tag_counts()
+    chat = database["chats"].find_one({"_id": chat_ids[0]})
+
+    failures = 0
+    for name, run in query_shapes(crud, trending, chat["participants"][0], chat["_id"], post_ids[0]):
+        recorder.commands.clear()
+        recorder.recording = True
+        try:
+            run()
+        finally:
+            recorder.recording = False
+
+        problems = []
+        for command_name, command in recorder.commands:
+            plan = database.command(SON([("explain", command), ("verbosity", "queryPlanner")]))
+            problems.extend(f"{command_name}:{stage}" for stage in bad_stages(plan))
+
+        failures += bool(problems)
+        status = "FAIL " + ", ".join(sorted(set(problems))) if problems else "ok"
+        print(f"{name:<42} {len(recorder.commands):>3} cmd  {status}")
+
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+    print(f"\n{failures} query shape(s) with COLLSCAN or in-memory SORT")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
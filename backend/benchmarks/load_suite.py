@@ -0,0 +1,457 @@
+"""
+Load suite: mixed traffic through the whole app, with a regression gate
+
+Boots app.main.app in-process (middleware included, startup events skipped)
+on a scratch database, seeds users, listings, chats with messages, posts with
+comments and concierge conversations, then runs --users virtual users for
+--duration seconds. Each virtual user is signed in and picks its next
+request from a weighted mix over the auth, listings, chat, community and
+concierge routes. Data and request sequences come from --seed, so two runs
+send the same traffic.
+
+The report (JSON, --output) has throughput, error count and p50/p95/p99 per
+route. With --baseline the run is compared against a stored report: a route
+whose p95 grew by more than --tolerance, a drop in total throughput by more
+than --tolerance, or a higher error rate is listed as a regression and the
+exit status is 1. Baselines are only comparable on the same machine and
+backend; record one with --save-baseline.
+
+Needs the benchmark extras (httpx drives the app, mongomock backs --mongomock):
+    pip install -r benchmarks/requirements.txt
+
+Run from backend/ against a local mongod (data goes to a scratch database):
+    MONGODB_URL=mongodb://localhost:27017/ python -m benchmarks.load_suite --output load.json
+    python -m benchmarks.load_suite --mongomock --duration 10   # smoke run only
+    python -m benchmarks.load_suite --mongomock --baseline benchmarks/baselines/load_suite_mongomock.json
+    python -m benchmarks.load_suite --mongomock --save-baseline benchmarks/baselines/load_suite_mongomock.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from app.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.crud.ids import new_ids
+from app.crud.trending import CRUDTrending
+from app.jobs.schema_migrations import migrate
+from app.main import app
+from app.routers.concierge import _extract_intent_simple, state_machine
+# Registers the concierge providers, as startup does
+from app.services.providers import service_registry  # noqa: F401
+from app.services.conversation_state import get_or_create_conversation, save_conversation_state
+
+BENCH_DATABASE = "zero_world_bench"
+PASSWORD = "bench-password"
+CATEGORIES = ["Books", "Electronics", "Furniture", "Sports", "Clothing", "Garden"]
+CITIES = ["Cape Town", "Durban", "Johannesburg", "Pretoria"]
+TAGS = ["events", "help", "marketplace", "neighbourhood", "tips"]
+CONCIERGE_MESSAGES = [
+    "I want to order pizza",
+    "Can you get me some sushi for dinner?",
+    "I need a ride to the airport",
+    "Order groceries for the week",
+]
+
+
+class Seeded(NamedTuple):
+    users: List[Dict[str, Any]]
+    listing_ids: List[str]
+    post_ids: List[str]
+    # user id -> ids of the chats the user takes part in
+    chats_by_user: Dict[str, List[str]]
+
+
+class Scenario(NamedTuple):
+    route: str  # report key: method and route template
+    weight: int
+    request: Callable[["VirtualUser"], Dict[str, Any]]
+
+
+class VirtualUser:
+    def __init__(self, user: Dict[str, Any], seeded: Seeded, rng: random.Random):
+        self.user = user
+        self.seeded = seeded
+        self.rng = rng
+        self.headers = {"Authorization": f"Bearer {create_access_token(user['_id'])}"}
+        self.own_listings = user["listing_ids"]
+        self.chats = seeded.chats_by_user.get(user["_id"], [])
+
+    def listing_id(self) -> str:
+        # Skewed towards recent listings, as browsing is
+        ids = self.seeded.listing_ids
+        return ids[min(int(self.rng.expovariate(1 / 50)), len(ids) - 1)]
+
+    def post_id(self) -> str:
+        ids = self.seeded.post_ids
+        return ids[min(int(self.rng.expovariate(1 / 20)), len(ids) - 1)]
+
+
+def _login(vu: VirtualUser):
+    return {"method": "POST", "url": "/auth/login",
+            "data": {"username": vu.user["email"], "password": PASSWORD}}
+
+
+def _create_listing(vu: VirtualUser):
+    return {"method": "POST", "url": "/listings/", "json": {
+        "title": f"Load listing {vu.rng.randrange(10 ** 6)}",
+        "description": "Created by the load suite",
+        "price": round(vu.rng.uniform(5, 500), 2),
+        "category": vu.rng.choice(CATEGORIES),
+        "location": vu.rng.choice(CITIES),
+    }}
+
+
+def _update_listing(vu: VirtualUser):
+    listing_id = vu.rng.choice(vu.own_listings)
+    return {"method": "PATCH", "url": f"/listings/{listing_id}",
+            "json": {"price": round(vu.rng.uniform(5, 500), 2)}}
+
+
+def _create_post(vu: VirtualUser):
+    return {"method": "POST", "url": "/community/posts", "json": {
+        "title": f"Load post {vu.rng.randrange(10 ** 6)}",
+        "content": "Created by the load suite",
+        "tags": vu.rng.sample(TAGS, 2),
+    }}
+
+
+def _start_conversation(vu: VirtualUser):
+    return {"method": "POST", "url": "/concierge/conversation/start", "json": {
+        "session_id": f"load-{vu.rng.randrange(10 ** 6)}",
+        "initial_message": vu.rng.choice(CONCIERGE_MESSAGES),
+    }}
+
+
+SCENARIOS = [
+    Scenario("POST /auth/login", 1, _login),
+    Scenario("GET /auth/me", 4, lambda vu: {"method": "GET", "url": "/auth/me"}),
+    Scenario("GET /listings/", 20, lambda vu: {
+        "method": "GET", "url": "/listings/", "params": {"limit": 20, "skip": vu.rng.choice([0, 0, 0, 20, 40])}}),
+    Scenario("GET /listings/{listing_id}", 25, lambda vu: {"method": "GET", "url": f"/listings/{vu.listing_id()}"}),
+    Scenario("POST /listings/", 3, _create_listing),
+    Scenario("PATCH /listings/{listing_id}", 2, _update_listing),
+    Scenario("GET /chat/", 5, lambda vu: {"method": "GET", "url": "/chat/"}),
+    Scenario("GET /chat/{chat_id}/messages", 8, lambda vu: {
+        "method": "GET", "url": f"/chat/{vu.rng.choice(vu.chats)}/messages"}),
+    Scenario("POST /chat/{chat_id}/messages", 6, lambda vu: {
+        "method": "POST", "url": f"/chat/{vu.rng.choice(vu.chats)}/messages", "json": {"content": "Still available?"}}),
+    Scenario("GET /community/posts", 10, lambda vu: {"method": "GET", "url": "/community/posts", "params": {"limit": 20}}),
+    Scenario("GET /community/posts/popular", 3, lambda vu: {"method": "GET", "url": "/community/posts/popular"}),
+    Scenario("POST /community/posts", 1, _create_post),
+    Scenario("GET /community/posts/{post_id}/comments", 5, lambda vu: {
+        "method": "GET", "url": f"/community/posts/{vu.post_id()}/comments"}),
+    Scenario("POST /community/posts/{post_id}/comments", 3, lambda vu: {
+        "method": "POST", "url": f"/community/posts/{vu.post_id()}/comments", "json": {"content": "Count me in"}}),
+    Scenario("POST /concierge/conversation/start", 2, _start_conversation),
+    Scenario("GET /concierge/services/search", 2, lambda vu: {
+        "method": "GET", "url": "/concierge/services/search", "params": {"category": "food", "query": "pizza"}}),
+    Scenario("GET /concierge/providers/metrics", 1, lambda vu: {
+        "method": "GET", "url": "/concierge/providers/metrics", "headers": {"X-Admin-Token": settings.ADMIN_TOKEN}}),
+]
+
+
+def seed(database, scale: float, rng: random.Random) -> Seeded:
+    now = datetime.utcnow()
+    hashed_password = get_password_hash(PASSWORD)
+
+    user_ids = new_ids(max(10, int(200 * scale)))
+    users = [
+        {
+            "_id": user_id,
+            "name": f"Load User {i}",
+            "email": f"load-user-{i}@example.com",
+            "hashed_password": hashed_password,
+            "created_at": now - timedelta(days=i),
+            "bio": None,
+            "avatar_url": None,
+        }
+        for i, user_id in enumerate(user_ids)
+    ]
+    database["users"].insert_many(users)
+
+    listing_ids = new_ids(int(2000 * scale))
+    listings = []
+    for i, listing_id in enumerate(listing_ids):
+        listings.append({
+            "_id": listing_id,
+            "title": f"Listing {i}",
+            "description": "Seeded by the load suite",
+            "price": round(rng.uniform(5, 2000), 2),
+            "category": rng.choice(CATEGORIES),
+            "location": rng.choice(CITIES),
+            "owner_id": user_ids[i % len(user_ids)],
+            "image_urls": [],
+            "is_active": rng.random() > 0.05,
+            "view_count": rng.randrange(500),
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": None,
+        })
+    database["listings"].insert_many(listings)
+
+    chats, messages = [], []
+    chats_by_user: Dict[str, List[str]] = defaultdict(list)
+    for i, chat_id in enumerate(new_ids(int(300 * scale))):
+        first = user_ids[i % len(user_ids)]
+        second = user_ids[(i + 1 + rng.randrange(len(user_ids) - 1)) % len(user_ids)]
+        if second == first:
+            continue
+        started = now - timedelta(hours=i)
+        chats.append({"_id": chat_id, "participants": [first, second], "created_at": started})
+        chats_by_user[first].append(chat_id)
+        chats_by_user[second].append(chat_id)
+        for j, message_id in enumerate(new_ids(rng.randrange(5, 40))):
+            messages.append({
+                "_id": message_id,
+                "chat_id": chat_id,
+                "sender_id": (first, second)[j % 2],
+                "content": f"Message {j}",
+                "is_read": True,
+                "created_at": started + timedelta(minutes=j),
+            })
+    database["chats"].insert_many(chats)
+    database["messages"].insert_many(messages)
+
+    post_ids = new_ids(int(400 * scale))
+    posts, comments = [], []
+    for i, post_id in enumerate(post_ids):
+        created = now - timedelta(hours=i)
+        comment_count = rng.randrange(0, 12)
+        posts.append({
+            "_id": post_id,
+            "title": f"Post {i}",
+            "content": "Seeded by the load suite",
+            "tags": rng.sample(TAGS, 2),
+            "author_id": user_ids[i % len(user_ids)],
+            "like_count": rng.randrange(50),
+            "comment_count": comment_count,
+            "created_at": created,
+        })
+        comments.extend(
+            {
+                "_id": comment_id,
+                "post_id": post_id,
+                "author_id": rng.choice(user_ids),
+                "content": f"Comment {j}",
+                "created_at": created + timedelta(minutes=j),
+            }
+            for j, comment_id in enumerate(new_ids(comment_count))
+        )
+    database["community_posts"].insert_many(posts)
+    if comments:
+        database["community_comments"].insert_many(comments)
+    CRUDTrending.for_database(database).refresh_all()
+
+    # Concierge state lives in process memory
+    for i, user_id in enumerate(user_ids[::2]):
+        conversation = get_or_create_conversation(user_id=user_id, session_id=f"seed-{i}")
+        message = rng.choice(CONCIERGE_MESSAGES)
+        state_machine.handle_user_input(conversation, message, _extract_intent_simple(message))
+        save_conversation_state(conversation)
+
+    for i, user in enumerate(users):
+        user["listing_ids"] = listing_ids[i::len(user_ids)][:20]
+    return Seeded(users, listing_ids, post_ids, dict(chats_by_user))
+
+
+async def virtual_user(client: httpx.AsyncClient, vu: VirtualUser, deadline: float, samples):
+    scenarios = [
+        s for s in SCENARIOS
+        if (vu.chats or "/chat/" not in s.route) and (vu.own_listings or not s.route.startswith("PATCH"))
+    ]
+    weights = [s.weight for s in scenarios]
+    while time.perf_counter() < deadline:
+        scenario = vu.rng.choices(scenarios, weights)[0]
+        request = scenario.request(vu)
+        started = time.perf_counter()
+        headers = {**vu.headers, **request.pop("headers", {})}
+        response = await client.request(headers=headers, **request)
+        samples[scenario.route].append((time.perf_counter() - started, response.status_code))
+        # Let the other users in even when every call finished without awaiting
+        await asyncio.sleep(0)
+
+
+async def drive(seeded: Seeded, users: int, duration: float, rng_seed: int):
+    samples = defaultdict(list)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            virtual_user(client, VirtualUser(
+                seeded.users[i % len(seeded.users)], seeded, random.Random(rng_seed * 1000 + i)
+            ), deadline, samples)
+            for i in range(users)
+        ))
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(samples, elapsed: float) -> Dict[str, Any]:
+    routes = {}
+    for route in sorted(samples):
+        seconds = sorted(duration for duration, _ in samples[route])
+        statuses = Counter(str(status) for _, status in samples[route])
+        routes[route] = {
+            "requests": len(seconds),
+            "errors": sum(count for status, count in statuses.items() if int(status) >= 400),
+            "statuses": dict(sorted(statuses.items())),
+            "throughput_rps": round(len(seconds) / elapsed, 2),
+            "p50_ms": round(percentile(seconds, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(seconds, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(seconds, 0.99) * 1000, 3),
+        }
+    everything = sorted(duration for route in samples.values() for duration, _ in route)
+    total = {
+        "requests": len(everything),
+        "errors": sum(route["errors"] for route in routes.values()),
+        "throughput_rps": round(len(everything) / elapsed, 2),
+    }
+    if everything:
+        total.update({
+            "p50_ms": round(percentile(everything, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(everything, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(everything, 0.99) * 1000, 3),
+        })
+    return {"routes": routes, "total": total}
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_delta_ms: float,
+    min_requests: int,
+) -> List[str]:
+    """Regressions of `report` against `baseline`, one line each."""
+    regressions = []
+    for route, before in baseline["routes"].items():
+        now = report["routes"].get(route)
+        # A p95 over a handful of samples is noise
+        if now is None or min(now["requests"], before["requests"]) < min_requests:
+            continue
+        grown = now["p95_ms"] - before["p95_ms"]
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance) and grown > min_delta_ms:
+            regressions.append(
+                f"{route}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms "
+                f"(+{grown / before['p95_ms'] * 100:.0f}%)"
+            )
+        error_rate_before = before["errors"] / max(1, before["requests"])
+        error_rate_now = now["errors"] / max(1, now["requests"])
+        if error_rate_now > error_rate_before + 0.01:
+            regressions.append(
+                f"{route}: error rate {error_rate_before:.1%} -> {error_rate_now:.1%}"
+            )
+
+    before, now = baseline["total"]["throughput_rps"], report["total"]["throughput_rps"]
+    if now < before * (1 - tolerance):
+        regressions.append(f"total: throughput {before:.1f} -> {now:.1f} req/s")
+    return regressions
+
+
+def connect(use_mongomock: bool):
+    if use_mongomock:
+        import mongomock
+        return mongomock.MongoClient()
+
+    from pymongo import MongoClient
+    from app.core.db_monitor import command_monitor, pool_monitor
+    event_listeners = []
+    if settings.DB_MONITOR_ENABLED:
+        event_listeners.append(command_monitor)
+    if settings.METRICS_ENABLED:
+        event_listeners.append(pool_monitor)
+    return MongoClient(
+        settings.get_mongodb_connection_string(),
+        event_listeners=event_listeners,
+        **settings.get_mongodb_client_options()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds first")
+    parser.add_argument("--scale", type=float, default=1.0, help="seed data multiplier")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this report")
+    parser.add_argument("--save-baseline", help="write the report as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore p95 growth smaller than this")
+    parser.add_argument("--min-requests", type=int, default=50,
+                        help="skip routes with fewer samples than this")
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    # The operational endpoints in the mix need an admin token
+    settings.ADMIN_TOKEN = settings.ADMIN_TOKEN or "load-suite-admin"
+    client = connect(args.mongomock)
+    client.drop_database(BENCH_DATABASE)
+    database = client[BENCH_DATABASE]
+    if not args.mongomock:
+        migrate(database)
+    app.mongodb_client = client
+    app.database = database
+    seeded = seed(database, args.scale, random.Random(args.seed))
+    if args.warmup:
+        asyncio.run(drive(seeded, args.users, args.warmup, args.seed + 1))
+    samples, elapsed = asyncio.run(drive(seeded, args.users, args.duration, args.seed))
+
+    report = {
+        "meta": {
+            "backend": "mongomock" if args.mongomock else "mongod",
+            "users": args.users,
+            "duration_s": round(elapsed, 2),
+            "scale": args.scale,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        **summarize(samples, elapsed),
+    }
+    client.drop_database(BENCH_DATABASE)
+    client.close()
+
+    print(f"{args.users} users, {elapsed:.1f} s, {report['total']['requests']} requests")
+    print(f"{'route':<44} {'req/s':>8} {'errors':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for route, stats in report["routes"].items():
+        print(f"{route:<44} {stats['throughput_rps']:>8.1f} {stats['errors']:>7} "
+              f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+
+    regressions: Optional[List[str]] = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline["meta"]["backend"] != report["meta"]["backend"]:
+            print(f"Warning: baseline was recorded on {baseline['meta']['backend']}")
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms, args.min_requests)
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        for line in regressions:
+            print(f"  {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Shared fixtures: the app on a fresh mongomock database per test.
+
+Startup events (Mongo connection, migrations, background tasks) are not
+run; each test gets an empty database under a unique name, so module-level
+caches keyed by collection name never leak between tests.
+
+Run from backend/:
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import uuid
+
+import mongomock
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()[f"test_{uuid.uuid4().hex}"]
+
+
+@pytest.fixture
+def client(database):
+    app.database = database
+    return TestClient(app)
@@ -0,0 +1,22 @@
+"""Documents as the CRUD layer stores them, for seeding test databases."""
+from datetime import datetime, timedelta
+
+
+def make_listing(index: int, **overrides):
+    now = datetime.utcnow()
+    listing = {
+        "_id": f"listing-{index}",
+        "title": f"Listing {index}",
+        "description": "Lightly used, collection only.",
+        "price": 10.0 + index,
+        "category": "Books",
+        "location": "Cape Town",
+        "image_urls": [],
+        "owner_id": "owner",
+        "is_active": True,
+        "view_count": 0,
+        "created_at": now - timedelta(minutes=index),
+        "updated_at": None,
+    }
+    listing.update(overrides)
+    return listing
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from app.crud.versions import CRUDVersions
+from app.jobs.backfill_listing_geo import backfill
+
+GAZETTEER = {"berlin": (52.52, 13.405)}
+
+
+class TestBackfill:
+    def test_updates_timestamp_and_bumps_version(self, database):
+        listings = database["listings"]
+        listings.insert_many([
+            {"_id": "a", "location": "Berlin, Germany", "geo_location": None, "updated_at": datetime(2020, 1, 1)},
+            {"_id": "b", "location": "Atlantis", "geo_location": None},
+        ])
+        versions = CRUDVersions.for_database(database)
+        before = versions.current("listings")["version"]
+
+        stats = backfill(listings, GAZETTEER)
+
+        assert stats["updated"] == 1
+        listing = listings.find_one({"_id": "a"})
+        assert listing["geo_location"]["coordinates"] == [13.405, 52.52]
+        assert listing["updated_at"] > datetime(2020, 1, 1)
+        assert versions.current("listings")["version"] == before + 1
+
+    def test_dry_run_leaves_version(self, database):
+        database["listings"].insert_one({"_id": "a", "location": "Berlin", "geo_location": None})
+        versions = CRUDVersions.for_database(database)
+        before = versions.current("listings")["version"]
+
+        backfill(database["listings"], GAZETTEER, dry_run=True)
+
+        assert versions.current("listings")["version"] == before
@@ -0,0 +1,29 @@
+from app.crud.chat import CRUDChat, CRUDMessage
+from app.schemas.chat import MessageCreate
+
+
+class TestCreateMessage:
+    """The chat's last message only ever points at a stored message."""
+
+    def _crud(self, database):
+        database["chats"].insert_one({"_id": "chat", "participants": ["alice", "bob"]})
+        return CRUDMessage(database["messages"], CRUDChat(database["chats"]))
+
+    def test_participant_message_updates_chat(self, database):
+        message = self._crud(database).create_message(
+            message_in=MessageCreate(content="hello"), chat_id="chat", sender_id="alice"
+        )
+
+        stored = database["messages"].find_one({"_id": message["_id"]})
+        chat = database["chats"].find_one({"_id": "chat"})
+        assert chat["last_message"] == "hello"
+        assert chat["last_message_at"] == stored["created_at"]
+
+    def test_non_participant_leaves_no_message(self, database):
+        message = self._crud(database).create_message(
+            message_in=MessageCreate(content="hello"), chat_id="chat", sender_id="mallory"
+        )
+
+        assert message is None
+        assert database["messages"].count_documents({}) == 0
+        assert "last_message" not in database["chats"].find_one({"_id": "chat"})
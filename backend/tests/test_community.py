@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from app.crud.community import CRUDCommunityPost
+from app.crud.trending import POSTS
+
+
+def seed_posts(database, ranked_ids, old_ids):
+    now = datetime.utcnow()
+    database["community_posts"].insert_many(
+        {
+            "_id": post_id,
+            "created_at": now - timedelta(days=30 if post_id in old_ids else 1),
+            "like_count": index,
+        }
+        for index, post_id in enumerate(ranked_ids)
+    )
+    database["leaderboards"].insert_one({
+        "_id": f"trending:{POSTS}",
+        "entries": [{"item_id": post_id, "score": 100 - rank} for rank, post_id in enumerate(ranked_ids)],
+    })
+
+
+class TestPopularPosts:
+    """A full page as long as enough posts pass the created_at filter."""
+
+    def test_pages_past_filtered_leaderboard_entries(self, database):
+        ranked = [f"post-{index}" for index in range(40)]
+        seed_posts(database, ranked, old_ids=set(ranked[:25]))
+
+        posts = CRUDCommunityPost(database["community_posts"]).get_popular_posts(limit=5)
+
+        assert [post["_id"] for post in posts] == ranked[25:30]
+
+    def test_short_leaderboard_is_filled_by_likes(self, database):
+        ranked = [f"post-{index}" for index in range(3)]
+        seed_posts(database, ranked, old_ids={"post-0"})
+        database["community_posts"].insert_many([
+            {"_id": "unranked-liked", "created_at": datetime.utcnow(), "like_count": 50},
+            {"_id": "unranked", "created_at": datetime.utcnow(), "like_count": 0},
+        ])
+
+        posts = CRUDCommunityPost(database["community_posts"]).get_popular_posts(limit=4)
+
+        assert [post["_id"] for post in posts] == ["post-1", "post-2", "unranked-liked", "unranked"]
@@ -0,0 +1,22 @@
+from app.crud.base import CRUDBase
+
+
+class TestBulkErrorIndexes:
+    """Error indexes refer to the caller's input even when entries are skipped."""
+
+    def _crud(self, database):
+        collection = database["bulk"]
+        collection.insert_many([{"_id": "a", "k": 1}, {"_id": "b", "k": 2}])
+        collection.create_index("k", unique=True)
+        return CRUDBase(collection)
+
+    def test_bulk_update_skips_entry_without_id(self, database):
+        result = self._crud(database).bulk_update([{"k": 5}, {"_id": "b", "k": 1}])
+
+        assert [error["index"] for error in result.errors] == [1]
+        assert result.errors[0]["code"] == 11000
+
+    def test_bulk_inc_skips_empty_amounts(self, database):
+        result = self._crud(database).bulk_inc({"a": {}, "b": {"k": -1}})
+
+        assert [error["index"] for error in result.errors] == [1]
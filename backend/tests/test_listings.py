@@ -0,0 +1,25 @@
+from tests.factories import make_listing
+
+
+class TestRecentListings:
+    def test_recent_listings_answer_revalidation_with_304(self, client, database):
+        database["listings"].insert_many([make_listing(i) for i in range(3)])
+
+        response = client.get("/listings/recent")
+        assert response.status_code == 200
+        assert [listing["_id"] for listing in response.json()] == ["listing-0", "listing-1", "listing-2"]
+        etag = response.headers["etag"]
+
+        revalidated = client.get("/listings/recent", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.content == b""
+
+    def test_recent_listings_etag_varies_with_limit(self, client, database):
+        database["listings"].insert_many([make_listing(i) for i in range(3)])
+
+        etag = client.get("/listings/recent").headers["etag"]
+
+        response = client.get("/listings/recent?limit=2", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
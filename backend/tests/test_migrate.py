@@ -0,0 +1,36 @@
+from app.crud.utils import DatabaseUtils
+
+
+def mark(document):
+    document["migrated"] = True
+    return document
+
+
+class TestMigrateData:
+    """Unnamed migrations start fresh; names and resume=True pick up checkpoints."""
+
+    def _seed(self, database):
+        database["source"].insert_many([{"_id": f"doc-{index:02d}"} for index in range(20)])
+        return database["source"], database["target"]
+
+    def test_second_unnamed_run_copies_again(self, database):
+        source, target = self._seed(database)
+
+        assert DatabaseUtils.migrate_data(source, target) == 20
+        target.delete_many({})
+        assert DatabaseUtils.migrate_data(source, target, mark) == 20
+        assert target.count_documents({"migrated": True}) == 20
+
+    def test_named_run_resumes(self, database):
+        source, target = self._seed(database)
+
+        DatabaseUtils.migrate_data(source, target, name="copy")
+        DatabaseUtils.migrate_data(source, target, mark, name="copy")
+        assert target.count_documents({"migrated": True}) == 0
+
+    def test_resume_reuses_default_name(self, database):
+        source, target = self._seed(database)
+
+        DatabaseUtils.migrate_data(source, target, resume=True)
+        DatabaseUtils.migrate_data(source, target, mark, resume=True)
+        assert target.count_documents({"migrated": True}) == 0
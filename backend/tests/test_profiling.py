@@ -0,0 +1,33 @@
+import pytest
+
+from app.config import settings
+from tests.factories import make_listing
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+def server_timing(header: str) -> dict:
+    timings = {}
+    for metric in header.split(","):
+        name, _, duration = metric.strip().partition(";dur=")
+        timings[name] = float(duration)
+    return timings
+
+
+class TestRequestProfiling:
+    @pytest.fixture(autouse=True)
+    def admin_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", ADMIN_TOKEN)
+
+    def test_list_response_serialization_is_attributed(self, client, database):
+        database["listings"].insert_many([make_listing(i) for i in range(50)])
+
+        response = client.get(
+            "/listings/", headers={"X-Profile": "1", "X-Admin-Token": ADMIN_TOKEN}
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()) == 50
+        timings = server_timing(response.headers["server-timing"])
+        assert timings["serialize"] > 0
+        assert timings["serialize"] < timings["total"]
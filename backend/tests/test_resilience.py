@@ -0,0 +1,43 @@
+import asyncio
+
+from app.services.providers.mock_food_delivery import MockFoodDeliveryProvider
+from app.services.resilience import CircuitBreaker, ResilientProvider
+
+
+def hedging_provider():
+    provider = ResilientProvider(
+        MockFoodDeliveryProvider(),
+        breaker=CircuitBreaker(window_size=10, min_calls=1, error_rate_threshold=0.5, reset_timeout=30),
+        hedge_enabled=True,
+        hedge_min_delay=0.01,
+    )
+    provider._latencies["get_details"].record(True, 0.01)
+    return provider
+
+
+class TestHedgedCancellation:
+    """Cancelling the caller cancels every in-flight provider call."""
+
+    def _cancel_after(self, seconds):
+        provider = hedging_provider()
+        calls = []
+
+        async def call():
+            calls.append(asyncio.current_task())
+            await asyncio.sleep(10)
+
+        async def run():
+            caller = asyncio.ensure_future(provider._hedged("get_details", call))
+            await asyncio.sleep(seconds)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            # Checked before asyncio.run cancels whatever is left
+            return [task.cancelled() for task in calls]
+
+        return asyncio.run(run())
+
+    def test_cancel_before_hedge(self):
+        assert self._cancel_after(0.001) == [True]
+
+    def test_cancel_after_hedge(self):
+        assert self._cancel_after(0.05) == [True, True]